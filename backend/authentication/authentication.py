@@ -1,7 +1,8 @@
 # authentication/authentication.py
 from rest_framework.authentication import BaseAuthentication
 from rest_framework.exceptions import AuthenticationFailed
-from .supabase_client import supabase
+from .identity import resolve_user
+from .tokens import verify_token_cached
 
 
 class SupabaseJWTAuthentication(BaseAuthentication):
@@ -14,20 +15,12 @@ class SupabaseJWTAuthentication(BaseAuthentication):
         token = auth_header.split(" ")[1]
 
         try:
-            # Use Supabase's built-in token verification
-            user_response = supabase.auth.get_user(token)
+            # Verify locally (or via Supabase, see SUPABASE_JWT_VERIFICATION),
+            # reusing the result for repeat requests with the same token
+            claims = verify_token_cached(token)
 
-            if not user_response or not user_response.user:
-                raise AuthenticationFailed("Invalid token.")
-
-            email = user_response.user.email
-
-            # Get the Django user
-            from .models import User
-
-            try:
-                user = User.objects.get(email=email)
-            except User.DoesNotExist:
+            user = resolve_user(claims)
+            if user is None:
                 raise AuthenticationFailed("User not found in local database.")
 
             return (user, token)
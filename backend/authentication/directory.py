@@ -0,0 +1,139 @@
+"""
+User Directory
+Recipient lookups by username or email, case-insensitively.
+
+find_user() compares UPPER(username) / UPPER(email) with UPPER(value), which
+is exactly the expression the functional indexes on users are built on
+(users_username_upper_idx, users_email_upper_idx), so a lookup is one index
+probe per column instead of a scan.
+
+lookup() caches positive results (id, username, email) in the default
+cache. Each user's cached identifiers are listed under one key so the
+post_save/post_delete handlers in signals.py can drop every one of them
+when the user changes; entries also expire after
+USER_DIRECTORY_CACHE_TTL_SECONDS to bound staleness from a racing reader.
+
+search_prefix() serves the transfer-screen autocomplete: an ordered
+LIKE 'PREFIX%' range scan on UPPER(username) (users_username_upper_prefix_idx
+on PostgreSQL) that stops after `limit` rows. Results are only usernames,
+are cached per prefix for USER_LOOKUP_PREFIX_CACHE_SECONDS and are not
+invalidated on save; transfers always re-resolve the chosen username.
+"""
+
+import hashlib
+from typing import Optional
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+from django.db.models import Q, Value
+from django.db.models.functions import Collate, Upper
+
+KEY_PREFIX = "user-directory"
+
+
+def _key(identifier: str) -> str:
+    return f"{KEY_PREFIX}:id:{hashlib.sha256(identifier.encode()).hexdigest()}"
+
+
+def _user_key(user_id) -> str:
+    return f"{KEY_PREFIX}:user:{user_id}"
+
+
+def find_user(identifier: str):
+    """
+    Load the user whose username or email matches, ignoring case
+
+    Returns:
+        User object or None
+    """
+    from .models import User
+
+    identifier = (identifier or "").strip()
+    if not identifier:
+        return None
+
+    value = Upper(Value(identifier))
+    return (
+        User.objects.alias(username_upper=Upper("username"), email_upper=Upper("email"))
+        .filter(Q(username_upper=value) | Q(email_upper=value))
+        .order_by("pk")
+        .first()
+    )
+
+
+def lookup(identifier: str) -> Optional[dict]:
+    """
+    Find a user by username or email, from the cache when possible
+
+    Returns:
+        Dict with id, username and email, or None (misses are not cached)
+    """
+    identifier = (identifier or "").strip()
+    if not identifier:
+        return None
+
+    ttl = settings.USER_DIRECTORY_CACHE_TTL_SECONDS
+    key = _key(identifier)
+    if ttl > 0:
+        entry = cache.get(key)
+        if entry is not None:
+            return entry
+
+    user = find_user(identifier)
+    if user is None:
+        return None
+
+    entry = {"id": user.pk, "username": user.username, "email": user.email}
+    if ttl > 0:
+        user_key = _user_key(user.pk)
+        keys = cache.get(user_key) or []
+        if key not in keys:
+            keys.append(key)
+        cache.set_many({key: entry, user_key: keys}, timeout=ttl)
+    return entry
+
+
+def invalidate(user):
+    """Drop every cached identifier of a user"""
+    user_key = _user_key(user.pk)
+    keys = cache.get(user_key) or []
+    cache.delete_many([*keys, user_key])
+
+
+def search_prefix(prefix: str, limit: int) -> list:
+    """
+    Active users whose username starts with `prefix`, ignoring case
+
+    Returns:
+        Up to `limit` dicts with id and username, ordered by username
+    """
+    prefix = (prefix or "").strip().upper()
+    if not prefix:
+        return []
+
+    ttl = settings.USER_LOOKUP_PREFIX_CACHE_SECONDS
+    key = f"{KEY_PREFIX}:prefix:{limit}:{hashlib.sha256(prefix.encode()).hexdigest()}"
+    if ttl > 0:
+        results = cache.get(key)
+        if results is not None:
+            return results
+
+    from .models import User
+
+    username_upper = Upper("username")
+    if connection.vendor == "postgresql":
+        # Byte order, like users_username_upper_prefix_idx: the index then
+        # serves both the LIKE range and the ORDER BY, and the scan stops
+        # after `limit` rows instead of sorting every match
+        username_upper = Collate(username_upper, "C")
+
+    results = list(
+        User.objects.alias(username_upper=username_upper)
+        .filter(username_upper__startswith=prefix, is_active=True)
+        .order_by("username_upper", "pk")
+        .values("id", "username")[:limit]
+    )
+    if ttl > 0:
+        cache.set(key, results, timeout=ttl)
+    return results
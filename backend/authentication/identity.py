@@ -0,0 +1,105 @@
+"""
+Supabase Identity Map
+Per-process cache of Django users keyed on the Supabase sub claim, so an
+authenticated request does not need a users query once the user is known.
+Entries are dropped by the post_save/post_delete handlers in signals.py and
+expire after SUPABASE_IDENTITY_CACHE_TTL_SECONDS to bound cross-process staleness.
+"""
+
+import copy
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+
+
+class IdentityMap:
+    """Bounded LRU of sub → User"""
+
+    def __init__(self):
+        self._entries = OrderedDict()
+        self._subs_by_pk = {}
+        self._lock = threading.Lock()
+
+    def get(self, sub: str):
+        """Return a private copy of the cached user, or None"""
+        with self._lock:
+            entry = self._entries.get(sub)
+            if entry is None:
+                return None
+            if entry[0] <= time.monotonic():
+                self._drop(sub)
+                return None
+            self._entries.move_to_end(sub)
+            # Each request gets its own instance so attribute changes made
+            # while handling one request never leak into another.
+            return copy.copy(entry[1])
+
+    def put(self, sub: str, user):
+        max_size = settings.SUPABASE_IDENTITY_CACHE_SIZE
+        if max_size <= 0:
+            return
+
+        expires_at = time.monotonic() + settings.SUPABASE_IDENTITY_CACHE_TTL_SECONDS
+        with self._lock:
+            self._entries[sub] = (expires_at, copy.copy(user))
+            self._entries.move_to_end(sub)
+            self._subs_by_pk[user.pk] = sub
+            while len(self._entries) > max_size:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self._subs_by_pk.pop(evicted.pk, None)
+
+    def invalidate(self, user):
+        """Forget a user however it was keyed"""
+        with self._lock:
+            sub = self._subs_by_pk.pop(user.pk, None)
+            if sub is not None:
+                self._entries.pop(sub, None)
+            if user.supabase_id is not None:
+                self._entries.pop(str(user.supabase_id), None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._subs_by_pk.clear()
+
+    def _drop(self, sub: str):
+        _, user = self._entries.pop(sub)
+        self._subs_by_pk.pop(user.pk, None)
+
+
+identity_map = IdentityMap()
+
+
+def resolve_user(claims: dict):
+    """
+    Find the Django user for verified token claims
+
+    Looks up by supabase_id first; users created before that column existed
+    are matched once by email and have their supabase_id stored.
+
+    Returns:
+        User object or None
+    """
+    from .models import User
+
+    sub = claims.get("sub")
+    if not sub:
+        return None
+
+    user = identity_map.get(sub)
+    if user is not None:
+        return user
+
+    user = User.objects.filter(supabase_id=sub).first()
+    if user is None:
+        user = User.objects.filter(email=claims.get("email"), supabase_id__isnull=True).first()
+        if user is None:
+            return None
+        # update() rather than save() so the backfill skips the post_save fan-out
+        User.objects.filter(pk=user.pk).update(supabase_id=sub)
+        user.supabase_id = sub
+
+    identity_map.put(sub, user)
+    return user
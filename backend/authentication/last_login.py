@@ -0,0 +1,154 @@
+"""
+Write-coalesced last_login tracking
+
+LoginUserView records a stamp in the cache instead of updating the users
+row. Pending stamps are written with one bulk UPDATE per batch, at most
+once every LAST_LOGIN_FLUSH_INTERVAL_SECONDS (started by the next login
+after the interval, on a background thread so no login request waits for
+it), when the process exits, and by `manage.py flush_last_login`. Repeat
+logins within LAST_LOGIN_GRANULARITY_SECONDS keep the first stamp.
+
+The buffer lives in the default cache; with the per-process locmem
+backend each worker flushes its own stamps, with a shared cache (Redis,
+Memcached) any process (including the management command) can flush
+them all.
+"""
+
+import atexit
+import threading
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections
+from django.db.models import Case, DateTimeField, Value, When
+from django.utils import timezone
+
+KEY_PREFIX = "last_login"
+SEQ_KEY = f"{KEY_PREFIX}:seq"
+FLUSHED_KEY = f"{KEY_PREFIX}:flushed"
+FLUSH_DUE_KEY = f"{KEY_PREFIX}:flush_due"
+FLUSH_LOCK_KEY = f"{KEY_PREFIX}:flush_lock"
+
+# A slot still missing this long after the flush first saw it belongs to a
+# login that died between taking a sequence number and writing the slot
+SLOT_GAP_TIMEOUT_SECONDS = 60
+
+_atexit_registered = False
+
+
+def _stamp_key(email):
+    return f"{KEY_PREFIX}:stamp:{email}"
+
+
+def _slot_key(seq):
+    return f"{KEY_PREFIX}:slot:{seq}"
+
+
+def _gap_expired(seq, now) -> bool:
+    """Whether a missing slot has been missing for SLOT_GAP_TIMEOUT_SECONDS"""
+    first_seen = cache.get_or_set(
+        f"{KEY_PREFIX}:gap:{seq}", now, timeout=SLOT_GAP_TIMEOUT_SECONDS * 10
+    )
+    return (now - first_seen).total_seconds() >= SLOT_GAP_TIMEOUT_SECONDS
+
+
+def _background_flush():
+    try:
+        flush_last_logins()
+    finally:
+        connections.close_all()
+
+
+def _schedule_flush():
+    threading.Thread(target=_background_flush, name="last-login-flush", daemon=True).start()
+
+
+def record_login(email, when=None):
+    """
+    Buffer a login stamp for a user
+
+    Args:
+        email: User email (the login identifier)
+        when: Login time (default: now)
+    """
+    global _atexit_registered
+
+    granularity = settings.LAST_LOGIN_GRANULARITY_SECONDS
+    if granularity and not cache.add(f"{KEY_PREFIX}:recent:{email}", 1, timeout=granularity):
+        return
+
+    when = when or timezone.now()
+    stamp_ttl = max(granularity, settings.LAST_LOGIN_FLUSH_INTERVAL_SECONDS) * 10
+    cache.set(_stamp_key(email), when, timeout=stamp_ttl)
+
+    cache.add(SEQ_KEY, 0, timeout=None)
+    seq = cache.incr(SEQ_KEY)
+    # Expires with the stamp, so a slot written after the flush gave up on
+    # it does not stay in the cache forever
+    cache.set(_slot_key(seq), email, timeout=stamp_ttl)
+
+    if not _atexit_registered:
+        atexit.register(flush_last_logins)
+        _atexit_registered = True
+
+    if cache.add(FLUSH_DUE_KEY, 1, timeout=settings.LAST_LOGIN_FLUSH_INTERVAL_SECONDS):
+        _schedule_flush()
+
+
+def flush_last_logins(batch_size: int = 1000) -> int:
+    """
+    Write buffered stamps to users.last_login
+
+    Each batch is a single UPDATE ... SET last_login = CASE email ... END.
+    Only one process flushes at a time. A login takes its sequence number
+    before it writes its slot, so the flush stops at the first missing
+    slot (picked up by the next flush) rather than skipping past it.
+
+    Returns:
+        Number of stamps written
+    """
+    from .models import User
+
+    if not cache.add(FLUSH_LOCK_KEY, 1, timeout=60):
+        return 0
+
+    written = 0
+    try:
+        flushed = cache.get(FLUSHED_KEY, 0)
+        seq = cache.get(SEQ_KEY, 0)
+        now = timezone.now()
+        blocked = False
+
+        while flushed < seq and not blocked:
+            upto = min(seq, flushed + batch_size)
+            slots = cache.get_many([_slot_key(n) for n in range(flushed + 1, upto + 1)])
+            for n in range(flushed + 1, upto + 1):
+                if _slot_key(n) not in slots and not _gap_expired(n, now):
+                    upto, blocked = n - 1, True
+                    break
+            if upto == flushed:
+                break
+            slot_keys = [_slot_key(n) for n in range(flushed + 1, upto + 1)]
+
+            emails = {slots[key] for key in slot_keys if key in slots}
+            stamps = {
+                key.split(":", 2)[2]: when
+                for key, when in cache.get_many([_stamp_key(e) for e in emails]).items()
+            }
+
+            if stamps:
+                User.objects.filter(email__in=stamps).update(
+                    last_login=Case(
+                        *[When(email=email, then=Value(when)) for email, when in stamps.items()],
+                        output_field=DateTimeField(),
+                    )
+                )
+                written += len(stamps)
+
+            cache.delete_many(slot_keys)
+            flushed = upto
+            cache.set(FLUSHED_KEY, flushed, timeout=None)
+    finally:
+        cache.delete(FLUSH_LOCK_KEY)
+
+    return written
@@ -0,0 +1,23 @@
+"""
+Flush buffered login stamps to users.last_login
+
+    python manage.py flush_last_login
+
+Run on shutdown (or from cron) so stamps recorded since the last
+periodic flush are not lost. See authentication/last_login.py.
+"""
+
+from django.core.management.base import BaseCommand
+
+from authentication.last_login import flush_last_logins
+
+
+class Command(BaseCommand):
+    help = "Write buffered last_login stamps to the database"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        written = flush_last_logins(batch_size=options["batch_size"])
+        self.stdout.write(self.style.SUCCESS(f"Flushed {written} last_login stamps"))
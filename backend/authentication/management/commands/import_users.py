@@ -0,0 +1,78 @@
+"""
+Bulk user provisioning
+
+    python manage.py import_users partner_users.csv
+    python manage.py import_users partner_users.ndjson --batch-size 5000
+
+Streams a CSV (with a header row) or NDJSON file and creates users, their
+profiles and wallets in chunked bulk INSERTs. Existing emails are skipped,
+so an interrupted import can simply be run again; invalid rows are listed
+on stderr.
+"""
+
+import csv
+import json
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from authentication.models import User
+
+
+class Command(BaseCommand):
+    help = "Bulk-create users, profiles and wallets from a CSV or NDJSON file"
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="CSV or NDJSON file to import")
+        parser.add_argument(
+            "--format",
+            choices=["csv", "ndjson"],
+            help="File format (default: inferred from the extension)",
+        )
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        path = options["path"]
+        file_format = options["format"] or (
+            "ndjson" if path.endswith((".ndjson", ".jsonl")) else "csv"
+        )
+        started = time.monotonic()
+
+        def report(totals):
+            processed = sum(totals.values())
+            elapsed = time.monotonic() - started
+            self.stdout.write(
+                f"{processed} rows ({totals['created']} created, "
+                f"{totals['existing']} existing, {totals['invalid']} invalid) "
+                f"- {processed / elapsed if elapsed else 0:.0f} rows/sec"
+            )
+
+        def skipped(row, reason):
+            email = row.get("email") if isinstance(row, dict) else row
+            self.stderr.write(f"Skipped {email!r}: {reason}")
+
+        try:
+            with open(path, newline="", encoding="utf-8") as handle:
+                if file_format == "csv":
+                    rows = csv.DictReader(handle)
+                else:
+                    rows = (json.loads(line) for line in handle if line.strip())
+
+                totals = User.objects.bulk_import(
+                    rows,
+                    batch_size=options["batch_size"],
+                    on_chunk=report,
+                    on_invalid=skipped,
+                )
+        except OSError as e:
+            raise CommandError(f"Could not read {path}: {e}")
+        except json.JSONDecodeError as e:
+            raise CommandError(f"Invalid NDJSON in {path}: {e}")
+
+        elapsed = time.monotonic() - started
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Imported {totals['created']} users in {elapsed:.1f}s "
+                f"({sum(totals.values()) / elapsed if elapsed else 0:.0f} rows/sec)"
+            )
+        )
@@ -1,4 +1,10 @@
+from django.apps import apps
 from django.contrib.auth.base_user import BaseUserManager
+from django.core.exceptions import ValidationError
+from django.db import IntegrityError, transaction
+
+IMPORT_FIELDS = ("first_name", "last_name", "phone_number", "supabase_id")
+
 
 class UserManager(BaseUserManager):
     def create_user(self, email, username=None, password=None, **extra_fields):
@@ -19,4 +25,128 @@ class UserManager(BaseUserManager):
         if extra_fields.get('is_superuser') is not True:
             raise ValueError('Superuser must have is_superuser=True.')
         
-        return self.create_user(email, username, password, **extra_fields)
\ No newline at end of file
+        return self.create_user(email, username, password, **extra_fields)
+
+    def bulk_import(self, rows, batch_size=1000, on_chunk=None, on_invalid=None):
+        """
+        Create users with their UserProfile and Wallet rows in chunks
+
+        Bypasses the per-row post_save signals: each chunk is three
+        bulk INSERTs in one transaction, so an interrupted import never
+        leaves a user without its profile or wallet. Emails that already
+        exist are skipped, which makes re-running a partial import safe.
+        If a chunk hits a unique constraint (e.g. a user signed up between
+        the existence check and the INSERT) it is retried row by row.
+
+        Args:
+            rows: Iterable of dicts with email and optional username,
+                first_name, last_name, phone_number, supabase_id
+            batch_size: Rows per chunk
+            on_chunk: Optional callback receiving the running totals
+            on_invalid: Optional callback receiving (row, reason) for each
+                skipped invalid row
+
+        Returns:
+            Dict of counts: created, existing (email already present) and
+            invalid (malformed row or username/supabase_id already taken)
+        """
+        totals = {"created": 0, "existing": 0, "invalid": 0}
+        chunk = []
+
+        for row in rows:
+            chunk.append(row)
+            if len(chunk) >= batch_size:
+                self._import_chunk(chunk, totals, on_invalid)
+                chunk = []
+                if on_chunk:
+                    on_chunk(totals)
+
+        if chunk:
+            self._import_chunk(chunk, totals, on_invalid)
+            if on_chunk:
+                on_chunk(totals)
+
+        return totals
+
+    def _import_chunk(self, rows, totals, on_invalid=None):
+        def invalid(row, reason):
+            totals["invalid"] += 1
+            if on_invalid:
+                on_invalid(row, reason)
+
+        candidates = {}
+        for row in rows:
+            email = row.get("email") if isinstance(row, dict) else None
+            if not isinstance(email, str) or not email.strip():
+                invalid(row, "email is required")
+                continue
+            email = self.normalize_email(email.strip())
+            if email in candidates:
+                totals["existing"] += 1
+                continue
+            candidates[email] = row
+
+        existing = set(
+            self.filter(email__in=list(candidates)).values_list("email", flat=True)
+        )
+
+        users = []
+        for email, row in candidates.items():
+            if email in existing:
+                totals["existing"] += 1
+                continue
+            username = row.get("username") or email.split("@")[0]
+            user = self.model(
+                email=email,
+                username=username.strip() if isinstance(username, str) else username,
+                **{field: row[field] for field in IMPORT_FIELDS if row.get(field)},
+            )
+            user.set_unusable_password()
+            try:
+                # Validates and converts the values (supabase_id to a UUID)
+                # without touching the database
+                user.clean_fields(exclude=["password"])
+            except ValidationError as e:
+                errors = (f"{field}: {' '.join(messages)}" for field, messages in e.message_dict.items())
+                invalid(row, "; ".join(errors))
+                continue
+            users.append((user, row))
+
+        taken = set(
+            self.filter(
+                username__in=[user.username for user, _ in users]
+            ).values_list("username", flat=True)
+        )
+        fresh = []
+        for user, row in users:
+            if user.username in taken:
+                invalid(row, "username is already taken")
+                continue
+            taken.add(user.username)
+            fresh.append((user, row))
+
+        try:
+            self._insert([user for user, _ in fresh])
+        except IntegrityError:
+            # Another writer got in first; find the conflicting rows one by one
+            for user, row in fresh:
+                try:
+                    self._insert([user])
+                except IntegrityError:
+                    if self.filter(email=user.email).exists():
+                        totals["existing"] += 1
+                    else:
+                        invalid(row, "username or supabase_id is already taken")
+                else:
+                    totals["created"] += 1
+        else:
+            totals["created"] += len(fresh)
+
+    def _insert(self, users):
+        UserProfile = apps.get_model("authentication", "UserProfile")
+        Wallet = apps.get_model("wallet", "Wallet")
+
+        with transaction.atomic(using=self._db):
+            users = self.bulk_create(users)
+            UserProfile.objects.bulk_create([UserProfile(user=user) for user in users])
+            Wallet.objects.bulk_create([Wallet(user=user) for user in users])
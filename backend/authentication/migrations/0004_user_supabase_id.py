@@ -0,0 +1,27 @@
+# Generated by Django 5.2.18 on 2026-10-18 16:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        (
+            "authentication",
+            "0003_userprofile_alter_user_options_user_email_verified_and_more",
+        ),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="user",
+            name="supabase_id",
+            field=models.UUIDField(
+                blank=True,
+                editable=False,
+                help_text="Supabase Auth user id (the JWT sub claim)",
+                null=True,
+                unique=True,
+            ),
+        ),
+    ]
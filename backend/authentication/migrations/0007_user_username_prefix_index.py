@@ -0,0 +1,32 @@
+# UPPER(username) text_pattern_ops serves the LIKE 'PREFIX%' scans of the
+# recipient autocomplete (directory.search_prefix) under any collation.
+# Operator classes are PostgreSQL-only; other backends skip this index.
+
+from django.db import migrations
+
+INDEX_NAME = "users_username_upper_prefix_idx"
+
+
+def create_prefix_index(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute(
+        f"CREATE INDEX IF NOT EXISTS {INDEX_NAME} ON users (UPPER(username) text_pattern_ops)"
+    )
+
+
+def drop_prefix_index(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute(f"DROP INDEX IF EXISTS {INDEX_NAME}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("authentication", "0006_user_upper_indexes"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_prefix_index, drop_prefix_index),
+    ]
@@ -0,0 +1,40 @@
+# Rebuilds the recipient autocomplete index on UPPER(username) COLLATE "C".
+# A text_pattern_ops index serves the LIKE 'PREFIX%' range but not an
+# ORDER BY under the default collation, so short prefixes read and sorted
+# every match. directory.search_prefix filters and orders on the same "C"
+# expression, so one index range scan returns the first `limit` rows.
+# PostgreSQL-only, like the index it replaces.
+
+from django.db import migrations
+
+OLD_INDEX_NAME = "users_username_upper_prefix_idx"
+INDEX_NAME = "users_username_upper_c_idx"
+
+
+def create_c_index(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute(
+        f'CREATE INDEX IF NOT EXISTS {INDEX_NAME} ON users ((UPPER(username) COLLATE "C"))'
+    )
+    schema_editor.execute(f"DROP INDEX IF EXISTS {OLD_INDEX_NAME}")
+
+
+def restore_pattern_index(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute(
+        f"CREATE INDEX IF NOT EXISTS {OLD_INDEX_NAME} ON users (UPPER(username) text_pattern_ops)"
+    )
+    schema_editor.execute(f"DROP INDEX IF EXISTS {INDEX_NAME}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("authentication", "0007_user_username_prefix_index"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_c_index, restore_pattern_index),
+    ]
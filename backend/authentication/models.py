@@ -3,16 +3,82 @@ User and UserProfile Models
 """
 
 from django.db import models
+from django.db.models.functions import Upper
 from django.contrib.auth.models import AbstractBaseUser, PermissionsMixin
 from .managers import UserManager
 
 
+class DirtyFieldsMixin:
+    """
+    Remembers field values as loaded/saved so callers can tell whether an
+    instance has unsaved changes and write only those columns
+    """
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._snapshot_fields()
+        return instance
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        self._snapshot_fields(kwargs.get("update_fields"))
+
+    def _snapshot_fields(self, field_names=None):
+        loaded = getattr(self, "_loaded_values", {}) if field_names else {}
+        for field in self._meta.concrete_fields:
+            if field_names and field.name not in field_names:
+                continue
+            if field.attname in self.__dict__:
+                loaded[field.name] = getattr(self, field.attname)
+        self._loaded_values = loaded
+
+    def get_dirty_fields(self):
+        """Return names of fields changed since the last load or save"""
+        loaded = getattr(self, "_loaded_values", {})
+        return [
+            field.name
+            for field in self._meta.concrete_fields
+            if field.name in loaded and getattr(self, field.attname) != loaded[field.name]
+        ]
+
+    def save_if_dirty(self) -> bool:
+        """
+        Save only the changed fields (plus auto_now timestamps)
+
+        Returns:
+            True if a write was issued
+        """
+        if self._state.adding:
+            self.save()
+            return True
+
+        dirty = self.get_dirty_fields()
+        if not dirty:
+            return False
+
+        dirty += [
+            field.name
+            for field in self._meta.concrete_fields
+            if getattr(field, "auto_now", False) and field.name not in dirty
+        ]
+        self.save(update_fields=dirty)
+        return True
+
+
 class User(AbstractBaseUser, PermissionsMixin):
     """
     Custom User Model - Core authentication fields
     """
     email = models.EmailField(unique=True)
     username = models.CharField(max_length=150, unique=True)
+    supabase_id = models.UUIDField(
+        unique=True,
+        null=True,
+        blank=True,
+        editable=False,
+        help_text="Supabase Auth user id (the JWT sub claim)",
+    )
 
     # Basic info
     first_name = models.CharField(max_length=150, blank=True)
@@ -29,6 +95,7 @@ class User(AbstractBaseUser, PermissionsMixin):
     # Timestamps
     date_joined = models.DateTimeField(auto_now_add=True)
     last_login = models.DateTimeField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
     objects = UserManager()
 
@@ -39,6 +106,11 @@ class User(AbstractBaseUser, PermissionsMixin):
         db_table = "users"
         verbose_name = "User"
         verbose_name_plural = "Users"
+        indexes = [
+            # Case-insensitive recipient lookups (see directory.py)
+            models.Index(Upper("username"), name="users_username_upper_idx"),
+            models.Index(Upper("email"), name="users_email_upper_idx"),
+        ]
 
     def __str__(self):
         return self.email
@@ -58,7 +130,7 @@ class User(AbstractBaseUser, PermissionsMixin):
         return self.username[:2].upper()
 
 
-class UserProfile(models.Model):
+class UserProfile(DirtyFieldsMixin, models.Model):
     """
     Extended User Profile - Additional information
     One-to-one relationship with User
@@ -2,8 +2,10 @@
 Authentication Signals
 Auto-create UserProfile when User is created
 """
-from django.db.models.signals import post_save
+from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
+from . import directory
+from .identity import identity_map
 from .models import User, UserProfile
 
 
@@ -17,9 +19,33 @@ def create_user_profile(sender, instance, created, **kwargs):
 
 
 @receiver(post_save, sender=User)
-def save_user_profile(sender, instance, **kwargs):
+def save_user_profile(sender, instance, update_fields=None, **kwargs):
     """
     Signal to save UserProfile when User is saved
+
+    Only a profile already loaded on the instance is considered, and only
+    its changed fields are written. Saves restricted with update_fields
+    (e.g. last_login) never touch the profile.
+    """
+    if update_fields is not None or not User.profile.is_cached(instance):
+        return
+
+    profile = getattr(instance, 'profile', None)
+    if profile is not None:
+        profile.save_if_dirty()
+
+
+@receiver([post_save, post_delete], sender=User)
+def invalidate_user_identity(sender, instance, **kwargs):
+    """
+    Signal to drop a changed or deleted User from the identity map
+    """
+    identity_map.invalidate(instance)
+
+
+@receiver([post_save, post_delete], sender=User)
+def invalidate_user_directory(sender, instance, **kwargs):
+    """
+    Signal to drop a changed or deleted User's cached recipient lookups
     """
-    if hasattr(instance, 'profile'):
-        instance.profile.save()
\ No newline at end of file
+    directory.invalidate(instance)
@@ -1,7 +1,88 @@
-from supabase import create_client, Client
+"""
+Supabase Client
+The client is built on first use, once per process, so importing this module
+(management commands, test runs, worker boot) never pays for it. A client
+created in a pre-fork master is not reused by the forked workers.
+
+SUPABASE_CLIENT_BACKEND selects the implementation:
+    "supabase" → the real Supabase client
+    "stub"     → authentication.supabase_stub, for offline benchmarking
+
+The stub accepts unknown emails with any password, so it is refused unless
+DEBUG is on or the process is a test run, and its tokens are signed with
+SUPABASE_STUB_JWT_SECRET, never the real SUPABASE_JWT_SECRET.
+"""
+
+import os
+import sys
+import threading
+
 from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+
+_client = None
+_client_pid = None
+_lock = threading.Lock()
+
+
+def _running_tests() -> bool:
+    return sys.argv[1:2] == ["test"] or "pytest" in sys.modules
+
+
+def stub_enabled() -> bool:
+    """
+    True if the stub backend is selected (and allowed here)
+
+    Raises:
+        ImproperlyConfigured: If the stub is selected outside DEBUG or tests
+    """
+    if settings.SUPABASE_CLIENT_BACKEND != "stub":
+        return False
+    if not (settings.DEBUG or _running_tests()):
+        raise ImproperlyConfigured(
+            "SUPABASE_CLIENT_BACKEND=stub is only allowed with DEBUG=True or in tests"
+        )
+    return True
+
+
+def _build_client():
+    if stub_enabled():
+        from .supabase_stub import StubSupabaseClient
+
+        return StubSupabaseClient()
+
+    from supabase import create_client
+
+    return create_client(settings.SUPABASE_URL, settings.SUPABASE_SERVICE_KEY)
+
+
+def get_supabase():
+    """Return this process's Supabase client, creating it if needed"""
+    global _client, _client_pid
+
+    pid = os.getpid()
+    if _client is None or _client_pid != pid:
+        with _lock:
+            if _client is None or _client_pid != pid:
+                _client = _build_client()
+                _client_pid = pid
+    return _client
+
+
+def reset_supabase():
+    """Drop the cached client (e.g. after changing SUPABASE_CLIENT_BACKEND)"""
+    global _client, _client_pid
+
+    with _lock:
+        _client = None
+        _client_pid = None
+
+
+class _LazySupabase:
+    """Module-level stand-in that forwards attribute access to get_supabase()"""
+
+    def __getattr__(self, name):
+        return getattr(get_supabase(), name)
+
 
-supabase: Client = create_client(
-    settings.SUPABASE_URL,
-    settings.SUPABASE_SERVICE_KEY
-)
\ No newline at end of file
+supabase = _LazySupabase()
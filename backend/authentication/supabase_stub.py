@@ -0,0 +1,117 @@
+"""
+Local Supabase Stub
+In-process stand-in for the parts of the Supabase Auth client the views use,
+selected with SUPABASE_CLIENT_BACKEND=stub so auth endpoints can be
+benchmarked offline. Tokens are HS256 JWTs signed with the stub-only
+SUPABASE_STUB_JWT_SECRET, which local verification accepts only while the
+stub backend is active (see supabase_client.stub_enabled).
+
+Not for production: credentials live in process memory only, and the client
+refuses to build unless DEBUG is on or tests are running.
+"""
+
+import hashlib
+import hmac
+import secrets
+import threading
+import time
+import uuid
+from types import SimpleNamespace
+
+import jwt
+from django.conf import settings
+
+STUB_TOKEN_LIFETIME_SECONDS = 3600
+
+
+def _hash_password(password: str) -> str:
+    return hashlib.sha256(password.encode()).hexdigest()
+
+
+class StubAuth:
+    """Implements sign_up, sign_in_with_password, get_user and update_user"""
+
+    def __init__(self):
+        self._passwords = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _user(email: str):
+        # Ids are derived from the email so every worker agrees on them
+        return SimpleNamespace(id=str(uuid.uuid5(uuid.NAMESPACE_URL, email)), email=email)
+
+    @staticmethod
+    def _session(user):
+        now = int(time.time())
+        access_token = jwt.encode(
+            {
+                "sub": user.id,
+                "email": user.email,
+                "aud": settings.SUPABASE_JWT_AUDIENCE,
+                "iss": settings.SUPABASE_JWT_ISSUER,
+                "role": "authenticated",
+                "iat": now,
+                "exp": now + STUB_TOKEN_LIFETIME_SECONDS,
+            },
+            settings.SUPABASE_STUB_JWT_SECRET,
+            algorithm="HS256",
+        )
+        return SimpleNamespace(
+            access_token=access_token,
+            refresh_token=secrets.token_urlsafe(24),
+            expires_in=STUB_TOKEN_LIFETIME_SECONDS,
+        )
+
+    def sign_up(self, credentials: dict):
+        email = credentials["email"]
+        with self._lock:
+            if email in self._passwords:
+                return SimpleNamespace(user=None, session=None)
+            self._passwords[email] = _hash_password(credentials["password"])
+
+        user = self._user(email)
+        return SimpleNamespace(user=user, session=self._session(user))
+
+    def sign_in_with_password(self, credentials: dict):
+        """
+        Emails this process has not seen sign in with any password, so a
+        benchmark does not depend on which worker handled the sign-up.
+        """
+        email = credentials["email"]
+        with self._lock:
+            stored = self._passwords.get(email)
+
+        if stored is not None and not hmac.compare_digest(
+            stored, _hash_password(credentials["password"])
+        ):
+            return SimpleNamespace(user=None, session=None)
+
+        user = self._user(email)
+        return SimpleNamespace(user=user, session=self._session(user))
+
+    def get_user(self, token: str):
+        try:
+            claims = jwt.decode(
+                token,
+                settings.SUPABASE_STUB_JWT_SECRET,
+                algorithms=["HS256"],
+                audience=settings.SUPABASE_JWT_AUDIENCE,
+            )
+        except jwt.PyJWTError:
+            return SimpleNamespace(user=None)
+        return SimpleNamespace(user=SimpleNamespace(id=claims["sub"], email=claims["email"]))
+
+    def update_user(self, attributes: dict, jwt=None):
+        user = self.get_user(jwt).user
+        if user is None:
+            return SimpleNamespace(user=None)
+
+        if "password" in attributes:
+            with self._lock:
+                self._passwords[user.email] = _hash_password(attributes["password"])
+        return SimpleNamespace(user=user)
+
+
+class StubSupabaseClient:
+    def __init__(self):
+        self.auth = StubAuth()
@@ -1,3 +1,688 @@
-from django.test import TestCase
+"""
+Authentication Tests
+"""
 
-# Create your tests here.
+import json
+import tempfile
+import time
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+import jwt
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management import call_command
+from django.test import TestCase, RequestFactory, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework.exceptions import AuthenticationFailed
+
+from . import directory
+from .authentication import SupabaseJWTAuthentication
+from .identity import identity_map
+from . import last_login
+from .last_login import FLUSH_DUE_KEY, SEQ_KEY, flush_last_logins, record_login
+from .models import User, UserProfile
+from .supabase_client import get_supabase, reset_supabase
+from .supabase_stub import StubSupabaseClient
+from .tokens import (
+    TokenVerificationError,
+    token_cache,
+    _check_not_revoked,
+    revoke_token,
+    verify_locally,
+    verify_token,
+    verify_token_cached,
+)
+
+JWT_SECRET = "test-jwt-secret-with-enough-bytes-for-hs256"
+JWT_ISSUER = "https://example.supabase.co/auth/v1"
+
+
+def make_token(email, sub="00000000-0000-0000-0000-000000000001", **overrides):
+    """Build an HS256 access token shaped like the ones Supabase issues"""
+    claims = {
+        "sub": sub,
+        "email": email,
+        "aud": "authenticated",
+        "iss": JWT_ISSUER,
+        "exp": int(time.time()) + 3600,
+        **overrides,
+    }
+    return jwt.encode(claims, JWT_SECRET, algorithm="HS256")
+
+
+@override_settings(
+    SUPABASE_JWT_VERIFICATION="local",
+    SUPABASE_JWT_REMOTE_FALLBACK=False,
+    SUPABASE_JWT_SECRET=JWT_SECRET,
+    SUPABASE_JWT_AUDIENCE="authenticated",
+    SUPABASE_JWT_ISSUER=JWT_ISSUER,
+)
+class LocalTokenVerificationTestCase(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            email="test@example.com", username="testuser"
+        )
+        self.factory = RequestFactory()
+        self.auth = SupabaseJWTAuthentication()
+        token_cache.clear()
+        identity_map.clear()
+
+    def authenticate(self, token):
+        request = self.factory.get("/", HTTP_AUTHORIZATION=f"Bearer {token}")
+        return self.auth.authenticate(request)
+
+    def test_valid_token_is_verified_without_remote_call(self):
+        """A well-formed token never reaches Supabase"""
+        with mock.patch("authentication.tokens.verify_remotely") as remote:
+            user, _ = self.authenticate(make_token(self.user.email))
+
+        self.assertEqual(user, self.user)
+        remote.assert_not_called()
+
+    def test_expired_token_is_rejected(self):
+        token = make_token(self.user.email, exp=int(time.time()) - 3600)
+
+        with self.assertRaises(AuthenticationFailed):
+            self.authenticate(token)
+
+    def test_wrong_audience_is_rejected(self):
+        with self.assertRaises(AuthenticationFailed):
+            self.authenticate(make_token(self.user.email, aud="anon"))
+
+    def test_wrong_issuer_is_rejected(self):
+        with self.assertRaises(AuthenticationFailed):
+            self.authenticate(make_token(self.user.email, iss="https://evil.example"))
+
+    def test_bad_signature_is_rejected(self):
+        token = jwt.encode(
+            {"sub": "x", "email": self.user.email, "aud": "authenticated",
+             "iss": JWT_ISSUER, "exp": int(time.time()) + 3600},
+            "another-secret-with-enough-bytes-for-hs256",
+            algorithm="HS256",
+        )
+
+        with self.assertRaises(AuthenticationFailed):
+            self.authenticate(token)
+
+    @override_settings(SUPABASE_JWT_SECRET=None, SUPABASE_JWT_REMOTE_FALLBACK=True)
+    def test_falls_back_to_remote_when_configured(self):
+        """Without a local key the remote call is used only if fallback is on"""
+        claims = {"sub": "00000000-0000-0000-0000-0000000000ab", "email": self.user.email}
+        with mock.patch("authentication.tokens.verify_remotely", return_value=claims) as remote:
+            user, _ = self.authenticate(make_token(self.user.email))
+
+        self.assertEqual(user, self.user)
+        remote.assert_called_once()
+
+
+@override_settings(
+    SUPABASE_JWT_VERIFICATION="local",
+    SUPABASE_JWT_SECRET=JWT_SECRET,
+    SUPABASE_JWT_AUDIENCE="authenticated",
+    SUPABASE_JWT_ISSUER=JWT_ISSUER,
+    SUPABASE_TOKEN_CACHE_SIZE=2,
+    SUPABASE_TOKEN_CACHE_TTL_SECONDS=300,
+)
+class VerifiedTokenCacheTestCase(TestCase):
+
+    def setUp(self):
+        token_cache.clear()
+        cache.clear()
+
+    def tearDown(self):
+        cache.clear()
+
+    def test_repeat_token_is_a_cache_hit(self):
+        token = make_token("test@example.com")
+
+        with mock.patch("authentication.tokens.verify_locally", wraps=verify_locally) as verify:
+            first = verify_token_cached(token)
+            second = verify_token_cached(token)
+
+        self.assertEqual(first, second)
+        self.assertEqual(verify.call_count, 1)
+        self.assertEqual(token_cache.stats()["hits"], 1)
+        self.assertEqual(token_cache.stats()["misses"], 1)
+
+    def test_entry_expires_with_token(self):
+        token = make_token("test@example.com")
+        token_cache.set(token, {"sub": "a", "exp": time.time() - 1})
+
+        self.assertIsNone(token_cache.get(token))
+
+    def test_least_recently_used_entry_is_evicted(self):
+        tokens = [make_token(f"user{i}@example.com") for i in range(3)]
+        for token in tokens:
+            token_cache.set(token, {"sub": "a", "exp": time.time() + 60})
+
+        self.assertIsNone(token_cache.get(tokens[0]))
+        self.assertIsNotNone(token_cache.get(tokens[2]))
+        self.assertEqual(token_cache.stats()["size"], 2)
+
+    def test_revoked_token_is_verified_again(self):
+        token = make_token("revoked@example.com")
+        token_cache.set(token, {"sub": "a", "exp": time.time() + 60})
+
+        revoke_token(token)
+
+        self.assertIsNone(token_cache.get(token))
+
+    @override_settings(
+        SUPABASE_JWT_VERIFICATION="local",
+        SUPABASE_JWT_SECRET=JWT_SECRET,
+        SUPABASE_JWT_AUDIENCE="authenticated",
+        SUPABASE_JWT_ISSUER=JWT_ISSUER,
+    )
+    def test_revocation_applies_to_other_workers(self):
+        token = make_token("revoked@example.com")
+        verify_token_cached(token)
+
+        revoke_token(token)
+        # Another worker's in-process cache still holds the claims
+        token_cache.set(token, {"sub": "a", "exp": time.time() + 60})
+
+        with self.assertRaises(TokenVerificationError):
+            verify_token_cached(token)
+        with self.assertRaises(TokenVerificationError):
+            verify_token(token)
+
+    @override_settings(
+        SUPABASE_JWT_VERIFICATION="local",
+        SUPABASE_JWT_SECRET=JWT_SECRET,
+        SUPABASE_JWT_AUDIENCE="authenticated",
+        SUPABASE_JWT_ISSUER=JWT_ISSUER,
+    )
+    def test_denylist_is_checked_once_per_verification(self):
+        token = make_token("test@example.com")
+
+        with mock.patch(
+            "authentication.tokens._check_not_revoked", wraps=_check_not_revoked
+        ) as check:
+            verify_token_cached(token)
+            verify_token_cached(token)
+
+        self.assertEqual(check.call_count, 2)
+
+
+@override_settings(
+    SUPABASE_JWT_VERIFICATION="local",
+    SUPABASE_JWT_SECRET=JWT_SECRET,
+    SUPABASE_JWT_AUDIENCE="authenticated",
+    SUPABASE_JWT_ISSUER=JWT_ISSUER,
+    SUPABASE_IDENTITY_CACHE_SIZE=100,
+    SUPABASE_IDENTITY_CACHE_TTL_SECONDS=60,
+)
+class IdentityMapTestCase(TestCase):
+
+    SUB = "00000000-0000-0000-0000-0000000000aa"
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            email="test@example.com", username="testuser"
+        )
+        self.factory = RequestFactory()
+        self.auth = SupabaseJWTAuthentication()
+        token_cache.clear()
+        identity_map.clear()
+
+    def authenticate(self, token):
+        request = self.factory.get("/", HTTP_AUTHORIZATION=f"Bearer {token}")
+        return self.auth.authenticate(request)[0]
+
+    def test_first_login_backfills_supabase_id(self):
+        self.authenticate(make_token(self.user.email, sub=self.SUB))
+
+        self.user.refresh_from_db()
+        self.assertEqual(str(self.user.supabase_id), self.SUB)
+
+    def test_repeat_request_runs_no_queries(self):
+        token = make_token(self.user.email, sub=self.SUB)
+        self.authenticate(token)
+
+        with self.assertNumQueries(0):
+            user = self.authenticate(token)
+
+        self.assertEqual(user.pk, self.user.pk)
+
+    def test_resolution_survives_email_change(self):
+        User.objects.filter(pk=self.user.pk).update(supabase_id=self.SUB)
+
+        user = self.authenticate(make_token("changed@example.com", sub=self.SUB))
+
+        self.assertEqual(user.pk, self.user.pk)
+
+    def test_saving_user_invalidates_cached_identity(self):
+        token = make_token(self.user.email, sub=self.SUB)
+        self.authenticate(token)
+
+        user = User.objects.get(pk=self.user.pk)
+        user.first_name = "Updated"
+        user.save()
+
+        self.assertIsNone(identity_map.get(self.SUB))
+        self.assertEqual(self.authenticate(token).first_name, "Updated")
+
+    def test_profile_update_does_not_revert_queryset_writes(self):
+        token = make_token(self.user.email, sub=self.SUB)
+        self.authenticate(token)
+        stamp = timezone.now()
+        # Not seen by the cached snapshot (no post_save)
+        User.objects.filter(pk=self.user.pk).update(last_login=stamp)
+
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f"Bearer {token}")
+        response = client.patch("/api/auth/profile/update/", {"first_name": "Updated"})
+
+        self.assertEqual(response.status_code, 200)
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.first_name, "Updated")
+        self.assertEqual(self.user.last_login, stamp)
+
+
+@override_settings(
+    SUPABASE_CLIENT_BACKEND="stub",
+    SUPABASE_JWT_VERIFICATION="local",
+    SUPABASE_JWT_SECRET=JWT_SECRET,
+    SUPABASE_JWT_AUDIENCE="authenticated",
+    SUPABASE_JWT_ISSUER=JWT_ISSUER,
+)
+class StubSupabaseClientTestCase(TestCase):
+
+    def setUp(self):
+        reset_supabase()
+        token_cache.clear()
+        identity_map.clear()
+        cache.clear()
+        # Logins here must not start a background last_login flush
+        cache.set(FLUSH_DUE_KEY, 1)
+        self.client = APIClient()
+
+    def tearDown(self):
+        reset_supabase()
+
+    def test_client_is_built_lazily_from_settings(self):
+        self.assertIsInstance(get_supabase(), StubSupabaseClient)
+        self.assertIs(get_supabase(), get_supabase())
+
+    def test_register_login_and_profile_run_offline(self):
+        credentials = {"email": "stub@example.com", "password": "s3cret-pass"}
+
+        response = self.client.post("/api/auth/register/", {**credentials, "username": "stub"})
+        self.assertEqual(response.status_code, 201)
+
+        response = self.client.post("/api/auth/login/", credentials)
+        self.assertEqual(response.status_code, 200)
+
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {response.data['access_token']}")
+        response = self.client.get("/api/auth/profile/")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["email"], "stub@example.com")
+
+    def test_stub_is_refused_outside_debug_and_tests(self):
+        with override_settings(DEBUG=False), mock.patch(
+            "authentication.supabase_client._running_tests", return_value=False
+        ):
+            with self.assertRaises(ImproperlyConfigured):
+                get_supabase()
+
+    def test_stub_tokens_are_not_signed_with_the_real_secret(self):
+        session = get_supabase().auth.sign_up(
+            {"email": "stub@example.com", "password": "s3cret-pass"}
+        ).session
+
+        with self.assertRaises(jwt.InvalidSignatureError):
+            jwt.decode(session.access_token, JWT_SECRET, algorithms=["HS256"], audience="authenticated")
+
+    def test_wrong_password_is_rejected(self):
+        get_supabase().auth.sign_up({"email": "stub@example.com", "password": "right-pass"})
+
+        response = self.client.post(
+            "/api/auth/login/", {"email": "stub@example.com", "password": "wrong-pass"}
+        )
+
+        self.assertEqual(response.status_code, 401)
+
+    def test_login_issues_no_user_writes(self):
+        """last_login stamp must not fan out into profile/wallet writes"""
+        User.objects.create_user(email="stub@example.com", username="stub")
+        credentials = {"email": "stub@example.com", "password": "s3cret-pass"}
+        cache.set(FLUSH_DUE_KEY, 1)
+
+        # The stamp is buffered; nothing touches users/profiles/wallets
+        with self.assertNumQueries(0):
+            response = self.client.post("/api/auth/login/", credentials)
+
+        self.assertEqual(response.status_code, 200)
+
+
+class ChangeAwareUserSignalsTestCase(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            email="test@example.com", username="testuser"
+        )
+
+    def test_plain_user_save_skips_unloaded_profile(self):
+        user = User.objects.get(pk=self.user.pk)
+
+        # UPDATE users only; no profile/wallet SELECT or UPDATE
+        with self.assertNumQueries(1):
+            user.save()
+
+    def test_clean_loaded_profile_is_not_rewritten(self):
+        user = User.objects.select_related("profile").get(pk=self.user.pk)
+
+        with self.assertNumQueries(1):
+            user.save()
+
+    def test_dirty_loaded_profile_is_saved(self):
+        user = User.objects.select_related("profile").get(pk=self.user.pk)
+        user.profile.city = "Lagos"
+
+        with self.assertNumQueries(2):
+            user.save()
+
+        self.assertEqual(UserProfile.objects.get(pk=self.user.pk).city, "Lagos")
+
+
+class BulkUserImportTestCase(TestCase):
+
+    def rows(self, count, start=0):
+        return [
+            {"email": f"partner{i}@example.com", "first_name": f"P{i}"}
+            for i in range(start, start + count)
+        ]
+
+    def test_creates_users_profiles_and_wallets(self):
+        from wallet.models import Wallet
+
+        totals = User.objects.bulk_import(self.rows(25), batch_size=10)
+
+        self.assertEqual(totals, {"created": 25, "existing": 0, "invalid": 0})
+        self.assertEqual(UserProfile.objects.count(), 25)
+        self.assertEqual(Wallet.objects.count(), 25)
+
+    def test_rerun_is_idempotent_on_email(self):
+        User.objects.bulk_import(self.rows(10))
+
+        totals = User.objects.bulk_import(self.rows(15))
+
+        self.assertEqual(totals, {"created": 5, "existing": 10, "invalid": 0})
+        self.assertEqual(User.objects.count(), 15)
+
+    def test_chunk_does_not_fire_per_row_signals(self):
+        # 2 lookups + 3 bulk INSERTs (+ savepoint pair) regardless of chunk size
+        with self.assertNumQueries(7):
+            User.objects.bulk_import(self.rows(50), batch_size=50)
+
+    def test_malformed_rows_are_skipped_and_reported(self):
+        skipped = []
+        rows = self.rows(2) + [
+            {"email": 42},
+            {"email": "not-an-email"},
+            {"email": "bad-uuid@example.com", "supabase_id": "not-a-uuid"},
+        ]
+
+        totals = User.objects.bulk_import(
+            rows, on_invalid=lambda row, reason: skipped.append((row, reason))
+        )
+
+        self.assertEqual(totals, {"created": 2, "existing": 0, "invalid": 3})
+        self.assertEqual([row for row, _ in skipped], rows[2:])
+        self.assertIn("supabase_id", skipped[2][1])
+
+    def test_concurrent_insert_falls_back_to_rows(self):
+        rows = self.rows(3)
+        User.objects.create_user(email="partner1@example.com", username="racer")
+        original = User.objects.filter
+
+        def stale_existence_check(*args, **kwargs):
+            # As if partner1 signed up right after the existence check ran
+            if "email__in" in kwargs:
+                return original(pk__in=[])
+            return original(*args, **kwargs)
+
+        with mock.patch.object(User.objects, "filter", side_effect=stale_existence_check):
+            totals = User.objects.bulk_import(rows)
+
+        self.assertEqual(totals, {"created": 2, "existing": 1, "invalid": 0})
+        self.assertEqual(User.objects.count(), 3)
+
+    def test_command_streams_ndjson(self):
+        with tempfile.NamedTemporaryFile("w", suffix=".ndjson") as handle:
+            handle.write("\n".join(json.dumps(row) for row in self.rows(3)))
+            handle.flush()
+            out = StringIO()
+            call_command("import_users", handle.name, stdout=out)
+
+        self.assertEqual(User.objects.count(), 3)
+        self.assertIn("rows/sec", out.getvalue())
+
+
+class ProfileConditionalGetTestCase(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            email="test@example.com", username="testuser"
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def test_profile_is_loaded_in_one_query(self):
+        with self.assertNumQueries(1):
+            response = self.client.get("/api/auth/profile/")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["profile"]["country"], "Nigeria")
+        self.assertIn("ETag", response)
+
+    def test_matching_etag_returns_304(self):
+        etag = self.client.get("/api/auth/profile/")["ETag"]
+
+        response = self.client.get("/api/auth/profile/", HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response["ETag"], etag)
+
+    def test_profile_change_changes_etag(self):
+        etag = self.client.get("/api/auth/profile/")["ETag"]
+
+        profile = UserProfile.objects.get(pk=self.user.pk)
+        profile.city = "Abuja"
+        profile.save()
+
+        response = self.client.get("/api/auth/profile/", HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+
+
+@override_settings(LAST_LOGIN_FLUSH_INTERVAL_SECONDS=30, LAST_LOGIN_GRANULARITY_SECONDS=60)
+class LastLoginBufferTestCase(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        cache.set(FLUSH_DUE_KEY, 1)
+        self.users = [
+            User.objects.create_user(email=f"user{i}@example.com", username=f"user{i}")
+            for i in range(3)
+        ]
+
+    def test_stamps_are_buffered_until_flush(self):
+        record_login(self.users[0].email)
+
+        self.users[0].refresh_from_db()
+        self.assertIsNone(self.users[0].last_login)
+
+        self.assertEqual(flush_last_logins(), 1)
+        self.users[0].refresh_from_db()
+        self.assertIsNotNone(self.users[0].last_login)
+
+    def test_flush_is_a_single_update(self):
+        for user in self.users:
+            record_login(user.email)
+
+        with self.assertNumQueries(1):
+            self.assertEqual(flush_last_logins(), 3)
+
+        self.assertEqual(User.objects.filter(last_login__isnull=False).count(), 3)
+
+    def test_repeat_logins_within_granularity_keep_first_stamp(self):
+        first = timezone.now() - timedelta(seconds=5)
+        record_login(self.users[0].email, when=first)
+        record_login(self.users[0].email)
+
+        flush_last_logins()
+
+        self.users[0].refresh_from_db()
+        self.assertEqual(self.users[0].last_login, first)
+
+    def test_login_after_interval_schedules_background_flush(self):
+        cache.delete(FLUSH_DUE_KEY)
+
+        with mock.patch.object(last_login, "_schedule_flush") as schedule:
+            record_login(self.users[0].email)
+
+        schedule.assert_called_once_with()
+        # Nothing was written inside the login request itself
+        self.users[0].refresh_from_db()
+        self.assertIsNone(self.users[0].last_login)
+
+    def test_flush_stops_at_slot_not_written_yet(self):
+        record_login(self.users[0].email)
+        # A concurrent login took sequence number 2 but has not written its slot
+        cache.incr(SEQ_KEY)
+        record_login(self.users[2].email)
+
+        self.assertEqual(flush_last_logins(), 1)
+
+        # The late slot appears; the next flush picks it up and the one after
+        cache.set(last_login._slot_key(2), self.users[1].email)
+        cache.set(last_login._stamp_key(self.users[1].email), timezone.now())
+        self.assertEqual(flush_last_logins(), 2)
+        self.assertEqual(User.objects.filter(last_login__isnull=False).count(), 3)
+
+    def test_flush_skips_slot_missing_past_timeout(self):
+        # Sequence number 1 was taken by a login that never wrote its slot
+        cache.set(SEQ_KEY, 1)
+        record_login(self.users[0].email)
+
+        self.assertEqual(flush_last_logins(), 0)
+        later = timezone.now() + timedelta(seconds=last_login.SLOT_GAP_TIMEOUT_SECONDS)
+        with mock.patch("authentication.last_login.timezone.now", return_value=later):
+            self.assertEqual(flush_last_logins(), 1)
+
+    def test_flush_command(self):
+        record_login(self.users[1].email)
+        out = StringIO()
+
+        call_command("flush_last_login", stdout=out)
+
+        self.assertIn("Flushed 1", out.getvalue())
+
+
+@override_settings(
+    LOGIN_THROTTLE_IP_CAPACITY=10,
+    LOGIN_THROTTLE_IP_WINDOW_SECONDS=60,
+    LOGIN_THROTTLE_EMAIL_CAPACITY=3,
+    LOGIN_THROTTLE_EMAIL_WINDOW_SECONDS=300,
+)
+class LoginThrottleTestCase(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.supabase = mock.patch("authentication.views.supabase").start()
+        self.supabase.auth.sign_in_with_password.return_value = mock.Mock(user=None)
+        self.addCleanup(mock.patch.stopall)
+
+    def attempt(self, email, ip="10.0.0.1"):
+        return self.client.post(
+            "/api/auth/login/", {"email": email, "password": "guess"}, REMOTE_ADDR=ip
+        )
+
+    def test_email_bucket_rejects_before_remote_call(self):
+        statuses = [self.attempt("victim@example.com").status_code for _ in range(5)]
+
+        self.assertEqual(statuses, [401, 401, 401, 429, 429])
+        self.assertEqual(self.supabase.auth.sign_in_with_password.call_count, 3)
+
+    def test_email_bucket_applies_across_ips(self):
+        for i in range(3):
+            self.attempt("victim@example.com", ip=f"10.0.0.{i}")
+
+        self.assertEqual(self.attempt("victim@example.com", ip="10.0.0.99").status_code, 429)
+
+    def test_ip_bucket_rejects_credential_stuffing(self):
+        statuses = [self.attempt(f"user{i}@example.com").status_code for i in range(12)]
+
+        self.assertEqual(statuses.count(429), 2)
+        self.assertEqual(self.supabase.auth.sign_in_with_password.call_count, 10)
+
+    def test_bucket_refills_over_time(self):
+        for _ in range(3):
+            self.attempt("victim@example.com")
+
+        with mock.patch("authentication.throttling.time.time", return_value=time.time() + 300):
+            self.assertEqual(self.attempt("victim@example.com").status_code, 401)
+
+    def test_forged_forwarded_for_does_not_reset_ip_bucket(self):
+        statuses = [
+            self.client.post(
+                "/api/auth/login/",
+                {"email": f"user{i}@example.com", "password": "guess"},
+                REMOTE_ADDR="10.0.0.1",
+                HTTP_X_FORWARDED_FOR=f"198.51.100.{i}",
+            ).status_code
+            for i in range(12)
+        ]
+
+        self.assertEqual(statuses.count(429), 2)
+
+
+class UserDirectoryTestCase(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(email="Ada@Example.com", username="AdaLovelace")
+
+    def test_find_user_ignores_case(self):
+        for identifier in ["adalovelace", "ADALOVELACE", " ada@example.com ", "ADA@EXAMPLE.COM"]:
+            self.assertEqual(directory.find_user(identifier), self.user, identifier)
+        self.assertIsNone(directory.find_user("ada"))
+        self.assertIsNone(directory.find_user(""))
+
+    def test_lookup_caches_positive_results(self):
+        with self.assertNumQueries(1):
+            entry = directory.lookup("adalovelace")
+        self.assertEqual(
+            entry, {"id": self.user.pk, "username": "AdaLovelace", "email": self.user.email}
+        )
+
+        with self.assertNumQueries(0):
+            self.assertEqual(directory.lookup("adalovelace"), entry)
+
+        # Misses are not cached
+        with self.assertNumQueries(2):
+            self.assertIsNone(directory.lookup("nobody"))
+            self.assertIsNone(directory.lookup("nobody"))
+
+    def test_user_save_invalidates_every_cached_identifier(self):
+        directory.lookup("adalovelace")
+        directory.lookup("ada@example.com")
+
+        self.user.username = "Countess"
+        self.user.save()
+
+        self.assertIsNone(directory.lookup("adalovelace"))
+        self.assertEqual(directory.lookup("ada@example.com")["username"], "Countess")
+
+    @override_settings(USER_DIRECTORY_CACHE_TTL_SECONDS=0)
+    def test_cache_can_be_disabled(self):
+        directory.lookup("adalovelace")
+        with self.assertNumQueries(1):
+            directory.lookup("adalovelace")
@@ -0,0 +1,107 @@
+"""
+Login and Lookup Throttling
+Fixed-window throttles backed by Django's cache framework. They run in
+APIView.initial(), so rejected attempts never reach Supabase or the
+users table.
+"""
+
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework.throttling import BaseThrottle
+
+
+class FixedWindowThrottle(BaseThrottle):
+    """
+    Each key may make `capacity` attempts per `window` seconds; further
+    attempts in the same window are rejected with 429.
+
+    The counter is spent with cache.add + cache.incr, which are atomic on
+    Redis (and within a process on locmem), so concurrent attempts can
+    never all read the same count and slip through together.
+    """
+
+    scope = None
+
+    def get_rate(self):
+        """Return (capacity, window_seconds)"""
+        raise NotImplementedError
+
+    def get_ident_key(self, request, view):
+        """Return the bucket identity, or None to skip throttling"""
+        raise NotImplementedError
+
+    def allow_request(self, request, view):
+        ident = self.get_ident_key(request, view)
+        if ident is None:
+            return True
+
+        capacity, window = self.get_rate()
+        now = time.time()
+        window_index = int(now // window)
+        key = f"throttle:{self.scope}:{ident}:{window_index}"
+
+        cache.add(key, 0, timeout=window)
+        try:
+            count = cache.incr(key)
+        except ValueError:
+            # Expired between add and incr: this attempt opens a new window
+            cache.add(key, 1, timeout=window)
+            count = 1
+
+        if count > capacity:
+            self.wait_seconds = (window_index + 1) * window - now
+            return False
+        return True
+
+    def wait(self):
+        return getattr(self, "wait_seconds", None)
+
+
+class LoginIPThrottle(FixedWindowThrottle):
+    """Per-client-IP bucket for password attempts"""
+
+    scope = "login_ip"
+
+    def get_rate(self):
+        return settings.LOGIN_THROTTLE_IP_CAPACITY, settings.LOGIN_THROTTLE_IP_WINDOW_SECONDS
+
+    def get_ident_key(self, request, view):
+        return self.get_ident(request)
+
+
+class LoginEmailThrottle(FixedWindowThrottle):
+    """Per-account bucket for password attempts, whichever IP they come from"""
+
+    scope = "login_email"
+
+    def get_rate(self):
+        return settings.LOGIN_THROTTLE_EMAIL_CAPACITY, settings.LOGIN_THROTTLE_EMAIL_WINDOW_SECONDS
+
+    def get_ident_key(self, request, view):
+        if request.user and request.user.is_authenticated:
+            email = request.user.email
+        elif hasattr(request.data, "get"):
+            email = request.data.get("email")
+        else:
+            email = None
+
+        if not email or not isinstance(email, str):
+            return None
+        return hashlib.sha256(email.strip().lower().encode()).hexdigest()
+
+
+class UserLookupThrottle(FixedWindowThrottle):
+    """Per-user bucket for recipient lookups and autocomplete keystrokes"""
+
+    scope = "user_lookup"
+
+    def get_rate(self):
+        return settings.USER_LOOKUP_THROTTLE_CAPACITY, settings.USER_LOOKUP_THROTTLE_WINDOW_SECONDS
+
+    def get_ident_key(self, request, view):
+        if request.user and request.user.is_authenticated:
+            return str(request.user.pk)
+        return self.get_ident(request)
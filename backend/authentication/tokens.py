@@ -0,0 +1,268 @@
+"""
+Supabase Access Token Verification
+Verifies bearer tokens locally (HS256 secret or cached JWKS) or remotely
+via supabase.auth.get_user(), depending on SUPABASE_JWT_VERIFICATION.
+Verified claims are kept in a bounded in-process cache until the token expires.
+Revoked tokens are kept on a denylist in the default Django cache until
+they expire, and every verification (cached or not) checks it. The
+denylist is only shared between workers when REDIS_URL is configured;
+with the local-memory fallback a revocation applies to its own process.
+"""
+
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+import jwt
+from django.conf import settings
+from django.core.cache import cache
+
+from .supabase_client import stub_enabled, supabase
+
+SYMMETRIC_ALGORITHMS = ("HS256",)
+ASYMMETRIC_ALGORITHMS = ("RS256", "ES256")
+
+DENYLIST_KEY_PREFIX = "revoked_token"
+
+_jwks_client = None
+_jwks_lock = threading.Lock()
+
+
+class TokenVerificationError(Exception):
+    """The token is invalid (bad signature, expired, wrong audience, ...)"""
+
+
+class LocalVerificationUnavailable(Exception):
+    """The token could not be checked locally (no secret, JWKS unreachable, unknown kid)"""
+
+
+def _get_jwks_client():
+    """Return the process-wide JWKS client, creating it on first use"""
+    global _jwks_client
+
+    if _jwks_client is None:
+        with _jwks_lock:
+            if _jwks_client is None:
+                if not settings.SUPABASE_JWKS_URL:
+                    raise LocalVerificationUnavailable("SUPABASE_JWKS_URL is not configured")
+                _jwks_client = jwt.PyJWKClient(
+                    settings.SUPABASE_JWKS_URL,
+                    cache_jwk_set=True,
+                    lifespan=settings.SUPABASE_JWKS_CACHE_SECONDS,
+                )
+    return _jwks_client
+
+
+def verify_locally(token: str) -> dict:
+    """
+    Verify signature, exp, aud and iss without leaving the process
+
+    Returns:
+        Dict of verified claims
+
+    Raises:
+        TokenVerificationError: If the token is invalid
+        LocalVerificationUnavailable: If no key is available to check it
+    """
+    try:
+        algorithm = jwt.get_unverified_header(token).get("alg")
+    except jwt.PyJWTError as e:
+        raise TokenVerificationError(str(e))
+
+    if algorithm in SYMMETRIC_ALGORITHMS:
+        if stub_enabled():
+            key = settings.SUPABASE_STUB_JWT_SECRET
+        elif not settings.SUPABASE_JWT_SECRET:
+            raise LocalVerificationUnavailable("SUPABASE_JWT_SECRET is not configured")
+        else:
+            key = settings.SUPABASE_JWT_SECRET
+    elif algorithm in ASYMMETRIC_ALGORITHMS:
+        try:
+            key = _get_jwks_client().get_signing_key_from_jwt(token).key
+        except jwt.PyJWKClientError as e:
+            raise LocalVerificationUnavailable(str(e))
+    else:
+        raise TokenVerificationError(f"Unsupported signing algorithm: {algorithm}")
+
+    try:
+        return jwt.decode(
+            token,
+            key,
+            algorithms=[algorithm],
+            audience=settings.SUPABASE_JWT_AUDIENCE,
+            issuer=settings.SUPABASE_JWT_ISSUER,
+            leeway=settings.SUPABASE_JWT_LEEWAY_SECONDS,
+            options={"require": ["exp", "sub"]},
+        )
+    except jwt.PyJWTError as e:
+        raise TokenVerificationError(str(e))
+
+
+def verify_remotely(token: str) -> dict:
+    """
+    Verify the token with a round trip to Supabase Auth
+
+    Returns:
+        Dict with the same shape as the local claims (sub, email)
+    """
+    user_response = supabase.auth.get_user(token)
+
+    if not user_response or not user_response.user:
+        raise TokenVerificationError("Invalid token.")
+
+    return {"sub": user_response.user.id, "email": user_response.user.email}
+
+
+class VerifiedTokenCache:
+    """
+    Bounded LRU cache of verified token claims
+
+    Entries are keyed on a SHA-256 of the token (the raw bearer token is
+    never stored) and expire at the token's own exp, capped by
+    SUPABASE_TOKEN_CACHE_TTL_SECONDS. A size of 0 disables the cache.
+    """
+
+    def __init__(self):
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _key(token: str) -> bytes:
+        return hashlib.sha256(token.encode()).digest()
+
+    @property
+    def max_size(self) -> int:
+        return settings.SUPABASE_TOKEN_CACHE_SIZE
+
+    def get(self, token: str) -> Optional[dict]:
+        """Return cached claims for a token, or None on a miss"""
+        key = self._key(token)
+
+        with self._lock:
+            entry = self._entries.get(key)
+
+            if entry is None or entry[0] <= time.time():
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, token: str, claims: dict):
+        """Cache verified claims until the token expires"""
+        if self.max_size <= 0:
+            return
+
+        expires_at = time.time() + settings.SUPABASE_TOKEN_CACHE_TTL_SECONDS
+        exp = claims.get("exp")
+        if exp is None:
+            # Remote verification does not return exp; it is only read
+            # here after Supabase has already accepted the token.
+            try:
+                exp = jwt.decode(token, options={"verify_signature": False}).get("exp")
+            except jwt.PyJWTError:
+                return
+        if exp is not None:
+            expires_at = min(expires_at, float(exp))
+
+        key = self._key(token)
+        with self._lock:
+            self._entries[key] = (expires_at, claims)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def revoke(self, token: str):
+        """Drop a token so its next use is verified again"""
+        with self._lock:
+            self._entries.pop(self._key(token), None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> dict:
+        """Hit/miss counters for sizing the cache"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "size": len(self._entries),
+                "max_size": self.max_size,
+            }
+
+
+token_cache = VerifiedTokenCache()
+
+
+def _denylist_key(token: str) -> str:
+    return f"{DENYLIST_KEY_PREFIX}:{hashlib.sha256(token.encode()).hexdigest()}"
+
+
+def revoke_token(token: str):
+    """
+    Reject a token until it expires (on every worker when REDIS_URL is set)
+
+    The token goes on the denylist (keyed on its SHA-256, kept
+    until exp) and is dropped from this process's token_cache.
+    """
+    try:
+        exp = jwt.decode(token, options={"verify_signature": False}).get("exp")
+    except jwt.PyJWTError:
+        exp = None
+    if exp is not None:
+        timeout = max(int(float(exp) - time.time()) + settings.SUPABASE_JWT_LEEWAY_SECONDS, 1)
+    else:
+        timeout = settings.SUPABASE_REVOKED_TOKEN_TTL_SECONDS
+
+    cache.set(_denylist_key(token), 1, timeout=timeout)
+    token_cache.revoke(token)
+
+
+def _check_not_revoked(token: str):
+    if cache.get(_denylist_key(token)) is not None:
+        raise TokenVerificationError("Token has been revoked.")
+
+
+def verify_token_cached(token: str) -> dict:
+    """Verify a token, serving repeat requests from token_cache"""
+    claims = token_cache.get(token)
+    if claims is None:
+        # verify_token checks the denylist
+        claims = verify_token(token)
+        token_cache.set(token, claims)
+    else:
+        _check_not_revoked(token)
+    return claims
+
+
+def verify_token(token: str) -> dict:
+    """
+    Verify a Supabase access token using the configured mode
+
+    Local mode only falls back to the remote call when
+    SUPABASE_JWT_REMOTE_FALLBACK is enabled and the token could not be
+    checked locally; tokens that fail local checks are never retried.
+    Revoked tokens are rejected in both modes.
+    """
+    _check_not_revoked(token)
+    if settings.SUPABASE_JWT_VERIFICATION == "remote":
+        return verify_remotely(token)
+
+    try:
+        return verify_locally(token)
+    except LocalVerificationUnavailable:
+        if not settings.SUPABASE_JWT_REMOTE_FALLBACK:
+            raise
+        return verify_remotely(token)
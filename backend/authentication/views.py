@@ -7,10 +7,15 @@ from rest_framework.response import Response
 from rest_framework import status
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.parsers import MultiPartParser, FormParser
-from django.utils import timezone
+from django.utils.cache import patch_cache_control
+from django.utils.http import parse_etags, quote_etag
+import hashlib
 
 from .supabase_client import supabase
 from .authentication import SupabaseJWTAuthentication
+from .tokens import revoke_token
+from .last_login import record_login
+from .throttling import LoginIPThrottle, LoginEmailThrottle
 from .models import User, UserProfile
 from .serializers import (
     UserSerializer,
@@ -49,7 +54,7 @@ class RegisterUserView(APIView):
             )
 
         # Create user (profile will be auto-created via signal)
-        User.objects.create(email=email, username=username)
+        User.objects.create(email=email, username=username, supabase_id=response.user.id)
 
         return Response(
             {"message": "User created successfully."}, status=status.HTTP_201_CREATED
@@ -57,6 +62,8 @@ class RegisterUserView(APIView):
 
 
 class LoginUserView(APIView):
+    throttle_classes = [LoginIPThrottle, LoginEmailThrottle]
+
     def post(self, request):
         data = request.data
         email = data.get("email")
@@ -78,13 +85,8 @@ class LoginUserView(APIView):
                 status=status.HTTP_401_UNAUTHORIZED
             )
 
-        # Update last login
-        try:
-            user = User.objects.get(email=email)
-            user.last_login = timezone.now()
-            user.save(update_fields=["last_login"])
-        except User.DoesNotExist:
-            pass
+        # Update last login (buffered, written in batches)
+        record_login(email)
 
         return Response({
             "access_token": response.session.access_token,
@@ -104,8 +106,37 @@ class ProfileView(APIView):
 
     def get(self, request):
         """Get complete user profile"""
-        serializer = UserSerializer(request.user)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        user = User.objects.select_related("profile").get(pk=request.user.pk)
+
+        etag = self.get_etag(user)
+        if etag in parse_etags(request.headers.get("If-None-Match", "")):
+            response = Response(status=status.HTTP_304_NOT_MODIFIED)
+        else:
+            serializer = UserSerializer(user)
+            response = Response(serializer.data, status=status.HTTP_200_OK)
+
+        response["ETag"] = etag
+        patch_cache_control(response, private=True, no_cache=True)
+        return response
+
+    @staticmethod
+    def get_etag(user):
+        """
+        Version of the serialized profile: changes whenever the user row
+        (updated_at, or last_login which is saved with update_fields) or
+        the profile row changes
+        """
+        profile = getattr(user, "profile", None)
+        version = ":".join(
+            str(value)
+            for value in (
+                user.pk,
+                user.updated_at.isoformat(),
+                user.last_login.isoformat() if user.last_login else "",
+                profile.updated_at.isoformat() if profile else "",
+            )
+        )
+        return quote_etag(hashlib.sha1(version.encode()).hexdigest())
 
 
 class UpdateProfileView(APIView):
@@ -129,12 +160,18 @@ class UpdateProfileView(APIView):
 
         validated_data = serializer.validated_data
 
-        # Update User model fields
-        user_fields = ["first_name", "last_name", "username", "phone_number"]
+        # Update User model fields. request.user may be a cached snapshot,
+        # so only the submitted columns are written (a full save would
+        # revert last_login flushes and other workers' edits)
+        user_fields = [
+            field
+            for field in ["first_name", "last_name", "username", "phone_number"]
+            if field in validated_data
+        ]
         for field in user_fields:
-            if field in validated_data:
-                setattr(request.user, field, validated_data[field])
-        request.user.save()
+            setattr(request.user, field, validated_data[field])
+        if user_fields:
+            request.user.save(update_fields=[*user_fields, "updated_at"])
 
         # Update UserProfile fields
         profile_fields = [
@@ -146,11 +183,12 @@ class UpdateProfileView(APIView):
             "country",
             "postal_code",
         ]
+        profile_fields = [field for field in profile_fields if field in validated_data]
         profile = request.user.profile
         for field in profile_fields:
-            if field in validated_data:
-                setattr(profile, field, validated_data[field])
-        profile.save()
+            setattr(profile, field, validated_data[field])
+        if profile_fields:
+            profile.save(update_fields=[*profile_fields, "updated_at"])
 
         # Return updated profile
         user_serializer = UserSerializer(request.user)
@@ -207,6 +245,7 @@ class ChangePasswordView(APIView):
 
     authentication_classes = [SupabaseJWTAuthentication]
     permission_classes = [IsAuthenticated]
+    throttle_classes = [LoginIPThrottle, LoginEmailThrottle]
 
     def post(self, request):
         """Change password"""
@@ -240,6 +279,7 @@ class ChangePasswordView(APIView):
             )
 
             if update_response.user:
+                revoke_token(token)
                 return Response(
                     {"message": "Password changed successfully"},
                     status=status.HTTP_200_OK,
@@ -313,6 +353,7 @@ class DeleteAccountView(APIView):
 
     authentication_classes = [SupabaseJWTAuthentication]
     permission_classes = [IsAuthenticated]
+    throttle_classes = [LoginIPThrottle, LoginEmailThrottle]
 
     def delete(self, request):
         """Delete account (soft delete)"""
@@ -337,7 +378,8 @@ class DeleteAccountView(APIView):
 
             # Soft delete - deactivate account
             request.user.is_active = False
-            request.user.save()
+            request.user.save(update_fields=["is_active", "updated_at"])
+            revoke_token(request.auth)
 
             return Response(
                 {"message": "Account deactivated successfully"},
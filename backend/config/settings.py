@@ -26,6 +26,92 @@ SUPABASE_URL = os.getenv("SUPABASE_URL")
 SUPABASE_ANON_KEY = os.getenv("SUPABASE_ANON_KEY")
 SUPABASE_JWT_SECRET = os.getenv("SUPABASE_JWT_SECRET")
 SUPABASE_SERVICE_KEY = os.getenv("SUPABASE_SERVICE_KEY")  # only if needed
+# "supabase" for the real client, "stub" for the offline benchmarking stub
+# (DEBUG or tests only; its tokens use the stub-only secret below)
+SUPABASE_CLIENT_BACKEND = os.getenv("SUPABASE_CLIENT_BACKEND", "supabase")
+SUPABASE_STUB_JWT_SECRET = os.getenv(
+    "SUPABASE_STUB_JWT_SECRET", "supabase-stub-only-secret-never-valid-in-production"
+)
+
+# Access token verification
+# "local"  → verify signature, exp, aud and iss in-process (HS256 secret or JWKS)
+# "remote" → call supabase.auth.get_user() on every request
+SUPABASE_JWT_VERIFICATION = os.getenv("SUPABASE_JWT_VERIFICATION", "local")
+SUPABASE_JWT_REMOTE_FALLBACK = os.getenv("SUPABASE_JWT_REMOTE_FALLBACK", "False") == "True"
+SUPABASE_JWT_AUDIENCE = os.getenv("SUPABASE_JWT_AUDIENCE", "authenticated")
+SUPABASE_JWT_ISSUER = os.getenv(
+    "SUPABASE_JWT_ISSUER",
+    f"{SUPABASE_URL.rstrip('/')}/auth/v1" if SUPABASE_URL else None,
+)
+SUPABASE_JWKS_URL = os.getenv(
+    "SUPABASE_JWKS_URL",
+    f"{SUPABASE_URL.rstrip('/')}/auth/v1/.well-known/jwks.json" if SUPABASE_URL else None,
+)
+SUPABASE_JWKS_CACHE_SECONDS = int(os.getenv("SUPABASE_JWKS_CACHE_SECONDS", "600"))
+SUPABASE_JWT_LEEWAY_SECONDS = int(os.getenv("SUPABASE_JWT_LEEWAY_SECONDS", "10"))
+
+# In-process cache of verified tokens (entries never outlive the token's exp)
+SUPABASE_TOKEN_CACHE_SIZE = int(os.getenv("SUPABASE_TOKEN_CACHE_SIZE", "10000"))
+SUPABASE_TOKEN_CACHE_TTL_SECONDS = int(os.getenv("SUPABASE_TOKEN_CACHE_TTL_SECONDS", "300"))
+# Revoked tokens stay on the shared denylist until their exp; this is the
+# fallback for a token without one
+SUPABASE_REVOKED_TOKEN_TTL_SECONDS = int(os.getenv("SUPABASE_REVOKED_TOKEN_TTL_SECONDS", "86400"))
+
+# Per-process sub → User identity map used by SupabaseJWTAuthentication
+SUPABASE_IDENTITY_CACHE_SIZE = int(os.getenv("SUPABASE_IDENTITY_CACHE_SIZE", "5000"))
+SUPABASE_IDENTITY_CACHE_TTL_SECONDS = int(os.getenv("SUPABASE_IDENTITY_CACHE_TTL_SECONDS", "60"))
+
+# Cached username/email → user lookups for transfers (0 disables)
+USER_DIRECTORY_CACHE_TTL_SECONDS = int(os.getenv("USER_DIRECTORY_CACHE_TTL_SECONDS", "300"))
+
+# Recipient autocomplete (?prefix=): minimum prefix, result cap, how long a
+# prefix's results are cached, and a per-user token bucket for keystrokes
+USER_LOOKUP_PREFIX_MIN_LENGTH = int(os.getenv("USER_LOOKUP_PREFIX_MIN_LENGTH", "2"))
+USER_LOOKUP_PREFIX_MAX_RESULTS = int(os.getenv("USER_LOOKUP_PREFIX_MAX_RESULTS", "10"))
+USER_LOOKUP_PREFIX_CACHE_SECONDS = int(os.getenv("USER_LOOKUP_PREFIX_CACHE_SECONDS", "30"))
+USER_LOOKUP_THROTTLE_CAPACITY = int(os.getenv("USER_LOOKUP_THROTTLE_CAPACITY", "30"))
+USER_LOOKUP_THROTTLE_WINDOW_SECONDS = int(os.getenv("USER_LOOKUP_THROTTLE_WINDOW_SECONDS", "10"))
+
+# Login throttling: at most CAPACITY attempts per fixed WINDOW of seconds
+LOGIN_THROTTLE_IP_CAPACITY = int(os.getenv("LOGIN_THROTTLE_IP_CAPACITY", "20"))
+LOGIN_THROTTLE_IP_WINDOW_SECONDS = int(os.getenv("LOGIN_THROTTLE_IP_WINDOW_SECONDS", "60"))
+LOGIN_THROTTLE_EMAIL_CAPACITY = int(os.getenv("LOGIN_THROTTLE_EMAIL_CAPACITY", "5"))
+LOGIN_THROTTLE_EMAIL_WINDOW_SECONDS = int(os.getenv("LOGIN_THROTTLE_EMAIL_WINDOW_SECONDS", "300"))
+
+# Reverse proxies in front of the app. Throttles key on the client IP that
+# DRF derives from X-Forwarded-For with this many trusted hops; with 0 the
+# header is ignored and REMOTE_ADDR is used, so it cannot be forged
+REST_FRAMEWORK = {
+    "NUM_PROXIES": int(os.getenv("NUM_PROXIES", "0")),
+}
+
+# Login stamps are buffered in the cache and written in batches
+# (see authentication/last_login.py)
+LAST_LOGIN_FLUSH_INTERVAL_SECONDS = int(os.getenv("LAST_LOGIN_FLUSH_INTERVAL_SECONDS", "30"))
+LAST_LOGIN_GRANULARITY_SECONDS = int(os.getenv("LAST_LOGIN_GRANULARITY_SECONDS", "60"))
+
+# Wallet credits/debits: one conditional UPDATE ... RETURNING per posting.
+# False restores the SELECT ... FOR UPDATE path (see benchmark_wallet_credits)
+WALLET_ATOMIC_BALANCE_UPDATES = os.getenv("WALLET_ATOMIC_BALANCE_UPDATES", "True") == "True"
+
+# Transaction history pages (cursor pagination) and the cap on the
+# default, estimated count; ?count=exact always counts every row
+WALLET_TRANSACTION_PAGE_SIZE = int(os.getenv("WALLET_TRANSACTION_PAGE_SIZE", "50"))
+WALLET_TRANSACTION_MAX_PAGE_SIZE = int(os.getenv("WALLET_TRANSACTION_MAX_PAGE_SIZE", "200"))
+WALLET_TRANSACTION_COUNT_CAP = int(os.getenv("WALLET_TRANSACTION_COUNT_CAP", "1000"))
+
+# Balance reads are cached and written through on commit (0 disables)
+WALLET_BALANCE_CACHE_TTL_SECONDS = int(os.getenv("WALLET_BALANCE_CACHE_TTL_SECONDS", "300"))
+
+# Statement exports stream rows from a server-side cursor in chunks of this size
+WALLET_STATEMENT_CHUNK_SIZE = int(os.getenv("WALLET_STATEMENT_CHUNK_SIZE", "2000"))
+
+# Idempotency-Key replays for money-moving wallet endpoints: how long a
+# stored response is served (cache and table; purge_idempotency_keys)
+IDEMPOTENCY_KEY_TTL_SECONDS = int(os.getenv("IDEMPOTENCY_KEY_TTL_SECONDS", "86400"))
+# A key still IN_PROGRESS after this long belongs to a dead worker and is
+# taken over by the next retry
+IDEMPOTENCY_IN_FLIGHT_TIMEOUT_SECONDS = int(os.getenv("IDEMPOTENCY_IN_FLIGHT_TIMEOUT_SECONDS", "300"))
 
 # Payment Gateway Keys
 PAYSTACK_SECRET_KEY = os.getenv("PAYSTACK_SECRET_KEY")
@@ -162,6 +248,25 @@ DATABASES = {
 # }
 
 
+# Cache
+# Shared Redis cache when REDIS_URL is set, per-process locmem otherwise
+# (throttling, buffered last_login stamps)
+REDIS_URL = os.getenv("REDIS_URL")
+if REDIS_URL:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": REDIS_URL,
+        }
+    }
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        }
+    }
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
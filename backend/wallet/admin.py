@@ -3,23 +3,32 @@ Wallet Admin Configuration
 Django admin interface for wallet management
 """
 from django.contrib import admin
-from .models import Wallet, WalletTransaction
+from .models import (
+    Wallet,
+    WalletTransaction,
+    IdempotencyKey,
+    WalletReconciliationCheckpoint,
+    WalletBalanceSnapshot,
+    WalletDailySummary,
+)
 
 
 @admin.register(Wallet)
 class WalletAdmin(admin.ModelAdmin):
     """Admin interface for Wallet model"""
-    list_display = ['user', 'balance', 'created_at', 'updated_at']
+    list_display = ['user', 'balance', 'balance_shards', 'created_at', 'updated_at']
     list_filter = ['created_at', 'updated_at']
     search_fields = ['user__email', 'user__username']
-    readonly_fields = ['created_at', 'updated_at']
+    # balance_shards is changed with `manage.py set_wallet_shards` so that
+    # slot balances are folded first
+    readonly_fields = ['balance_shards', 'created_at', 'updated_at']
     
     fieldsets = (
         ('User Information', {
             'fields': ('user',)
         }),
         ('Balance', {
-            'fields': ('balance',)
+            'fields': ('balance', 'balance_shards')
         }),
         ('Timestamps', {
             'fields': ('created_at', 'updated_at'),
@@ -63,6 +72,7 @@ class WalletTransactionAdmin(admin.ModelAdmin):
         'balance_before',
         'balance_after',
         'reference',
+        'reversal_of',
         'created_at',
         'updated_at'
     ]
@@ -75,7 +85,8 @@ class WalletTransactionAdmin(admin.ModelAdmin):
                 'transaction_type',
                 'amount',
                 'status',
-                'source'
+                'source',
+                'reversal_of'
             )
         }),
         ('Balance Information', {
@@ -108,4 +119,85 @@ class WalletTransactionAdmin(admin.ModelAdmin):
 
     def has_delete_permission(self, request, obj=None):
         """Prevent transaction deletion"""
-        return False
\ No newline at end of file
+        return False
+
+@admin.register(IdempotencyKey)
+class IdempotencyKeyAdmin(admin.ModelAdmin):
+    """Admin interface for IdempotencyKey model (read-only)"""
+    list_display = ['key', 'user', 'endpoint', 'status', 'response_status', 'created_at']
+    list_filter = ['status', 'endpoint', 'created_at']
+    search_fields = ['key', 'user__email', 'user__username']
+    readonly_fields = [
+        'user',
+        'key',
+        'endpoint',
+        'request_fingerprint',
+        'status',
+        'response_status',
+        'response_body',
+        'created_at',
+        'updated_at'
+    ]
+
+    def has_add_permission(self, request):
+        """Keys are only created by the idempotent API endpoints"""
+        return False
+
+
+@admin.register(WalletReconciliationCheckpoint)
+class WalletReconciliationCheckpointAdmin(admin.ModelAdmin):
+    """Admin interface for reconciliation checkpoints (read-only, written by reconcile_wallets)"""
+    list_display = ['wallet', 'is_balanced', 'ledger_balance', 'last_transaction_id', 'checked_at']
+    list_filter = ['is_balanced', 'checked_at']
+    search_fields = ['wallet__user__email', 'wallet__user__username']
+    readonly_fields = [
+        'wallet',
+        'last_transaction_id',
+        'pending_transaction_ids',
+        'ledger_balance',
+        'chain_balance',
+        'wallet_version',
+        'is_balanced',
+        'checked_at'
+    ]
+
+    def has_add_permission(self, request):
+        """Checkpoints are only created by the reconcile_wallets command"""
+        return False
+
+
+@admin.register(WalletBalanceSnapshot)
+class WalletBalanceSnapshotAdmin(admin.ModelAdmin):
+    """Admin interface for daily balance snapshots (read-only, written by snapshot_wallet_balances)"""
+    list_display = ['wallet', 'snapshot_date', 'balance', 'created_at']
+    list_filter = ['snapshot_date']
+    search_fields = ['wallet__user__email', 'wallet__user__username']
+    date_hierarchy = 'snapshot_date'
+    readonly_fields = ['wallet', 'snapshot_date', 'balance', 'created_at']
+
+    def has_add_permission(self, request):
+        """Snapshots are only created by the snapshot_wallet_balances command"""
+        return False
+
+
+@admin.register(WalletDailySummary)
+class WalletDailySummaryAdmin(admin.ModelAdmin):
+    """Admin interface for the daily summary rollup (read-only, maintained by WalletService)"""
+    list_display = ['wallet', 'summary_date', 'source', 'inflow', 'outflow', 'credit_count', 'debit_count']
+    list_filter = ['source', 'summary_date']
+    search_fields = ['wallet__user__email', 'wallet__user__username']
+    date_hierarchy = 'summary_date'
+    readonly_fields = [
+        'wallet',
+        'summary_date',
+        'source',
+        'inflow',
+        'outflow',
+        'credit_count',
+        'debit_count',
+        'updated_at'
+    ]
+
+    def has_add_permission(self, request):
+        """Rows are written by WalletService and backfill_wallet_summaries"""
+        return False
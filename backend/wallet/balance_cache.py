@@ -0,0 +1,181 @@
+"""
+Wallet balance cache
+
+Balance reads (WalletBalanceView, WalletDetailView) are served from the
+default cache. Every balance write publishes the new balance with
+transaction.on_commit, so the cache is updated write-through as soon as
+the write is durable and never holds uncommitted balances.
+
+Entries are versioned by Wallet.version, which every balance write
+increments while holding the row lock (WalletService locks the row or
+updates it in a single statement), so versions follow commit order:
+  - a write replaces the entry only if its version is not older, checked
+    and written atomically (a Lua script on Redis, which also keeps the
+    version in a plain `<key>:version` counter; a process lock for the
+    per-process local-memory cache), so out-of-order commits from
+    concurrent requests cannot roll the cached balance back
+  - reads that miss only *add* the value they loaded, under the same
+    check, so a slow reader cannot overwrite a fresher write-through
+  - each process remembers the last version it committed per wallet and
+    ignores older entries, so a process never serves a balance older than
+    its own last committed write
+
+Sharded wallets (see WalletBalanceShard) are never cached: their credits
+do not touch the wallet row.
+"""
+
+import threading
+from collections import OrderedDict
+from typing import Optional
+
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.core.cache.backends.redis import RedisCache
+from django.db import transaction
+
+KEY_PREFIX = "wallet:balance"
+FLOOR_SIZE = 10000
+
+_floors = OrderedDict()
+_floors_lock = threading.Lock()
+_store_lock = threading.Lock()
+
+# KEYS: entry, version counter. ARGV: version, serialized entry, timeout,
+# "1" to only fill a missing entry (populate). Returns 1 if written.
+_STORE_SCRIPT = """
+if ARGV[4] == "1" and redis.call("EXISTS", KEYS[1]) == 1 then
+    return 0
+end
+local current = tonumber(redis.call("GET", KEYS[2]) or "-1")
+if current > tonumber(ARGV[1]) then
+    return 0
+end
+redis.call("SET", KEYS[1], ARGV[2], "EX", ARGV[3])
+redis.call("SET", KEYS[2], ARGV[1], "EX", ARGV[3])
+return 1
+"""
+
+
+def _key(wallet_id):
+    return f"{KEY_PREFIX}:{wallet_id}"
+
+
+def _enabled() -> bool:
+    return settings.WALLET_BALANCE_CACHE_TTL_SECONDS > 0
+
+
+def get(wallet_id) -> Optional[dict]:
+    """
+    Return the cached entry for a wallet, or None on a miss
+
+    Entry keys: version, balance, updated_at, created_at (may be None)
+    """
+    if not _enabled():
+        return None
+
+    entry = cache.get(_key(wallet_id))
+    if entry is None:
+        return None
+
+    with _floors_lock:
+        floor = _floors.get(wallet_id, 0)
+    if entry["version"] < floor:
+        return None
+    return entry
+
+
+def populate(wallet):
+    """Cache a wallet just loaded from the database, unless a write got there first"""
+    if not _enabled() or wallet.balance_shards:
+        return
+
+    _compare_and_set(
+        _key(wallet.pk),
+        {
+            "version": wallet.version,
+            "balance": wallet.balance,
+            "updated_at": wallet.updated_at,
+            "created_at": wallet.created_at,
+        },
+        only_if_missing=True,
+    )
+
+
+def publish(wallet_id, version, balance, updated_at, created_at=None):
+    """Write a new balance through to the cache once the current transaction commits"""
+    if _enabled():
+        transaction.on_commit(
+            lambda: _store(wallet_id, version, balance, updated_at, created_at)
+        )
+
+
+def invalidate(wallet_id):
+    """Drop a wallet's entry once the current transaction commits"""
+    if _enabled():
+        transaction.on_commit(lambda: cache.delete(_key(wallet_id)))
+
+
+def _store(wallet_id, version, balance, updated_at, created_at):
+    with _floors_lock:
+        _floors[wallet_id] = max(version, _floors.get(wallet_id, 0))
+        _floors.move_to_end(wallet_id)
+        while len(_floors) > FLOOR_SIZE:
+            _floors.popitem(last=False)
+
+    key = _key(wallet_id)
+    if created_at is None:
+        # created_at never changes, so reading it outside the atomic write is safe
+        current = cache.get(key)
+        created_at = current.get("created_at") if current else None
+
+    _compare_and_set(
+        key,
+        {
+            "version": version,
+            "balance": balance,
+            "updated_at": updated_at,
+            "created_at": created_at,
+        },
+    )
+
+
+def _compare_and_set(key, entry, only_if_missing=False) -> bool:
+    """
+    Write entry unless the cache holds a newer version (or, with
+    only_if_missing, any entry), atomically
+
+    Returns:
+        True if the entry was written
+    """
+    timeout = settings.WALLET_BALANCE_CACHE_TTL_SECONDS
+    backend = caches["default"]
+
+    if isinstance(backend, RedisCache):
+        full_key = backend.make_and_validate_key(key)
+        client = backend._cache.get_client(full_key, write=True)
+        written = client.eval(
+            _STORE_SCRIPT,
+            2,
+            full_key,
+            f"{full_key}:version",
+            entry["version"],
+            backend._cache._serializer.dumps(entry),
+            timeout,
+            "1" if only_if_missing else "0",
+        )
+        return bool(written)
+
+    # Local-memory cache: private to this process, so a process lock makes
+    # the check and the write atomic
+    with _store_lock:
+        current = cache.get(key)
+        if current is not None and (only_if_missing or current["version"] > entry["version"]):
+            return False
+        cache.set(key, entry, timeout=timeout)
+        return True
+
+
+def clear():
+    """Forget this process's version floors (tests)"""
+    with _floors_lock:
+        _floors.clear()
@@ -0,0 +1,218 @@
+"""
+Idempotency-Key support for money-moving endpoints
+
+A client sends `Idempotency-Key: <unique value>` with a POST. The first
+request claims the key (a row in wallet_idempotency_keys, unique per user)
+and runs normally; its response is stored on the row and in the cache.
+Retries with the same key are answered from the cache (one lookup, no
+ledger write) with `Idempotent-Replayed: true`. A retry that arrives while
+the first request is still running gets 409, and reusing a key for a
+different request body or endpoint gets 422.
+
+The handler runs in the same database transaction that stores the
+response on the key row, so a ledger write and its key's outcome commit
+together. Responses with a 5xx status release the key so the client can
+retry. A key left IN_PROGRESS by a worker that died (whose ledger write
+was therefore rolled back) is taken over by the first retry with the same
+request once it is IDEMPOTENCY_IN_FLIGHT_TIMEOUT_SECONDS old.
+Requests without the header behave exactly as before.
+"""
+
+import functools
+import hashlib
+import json
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.response import Response
+
+from .models import IdempotencyKey
+
+HEADER = "Idempotency-Key"
+REPLAY_HEADER = "Idempotent-Replayed"
+MAX_KEY_LENGTH = 255
+
+# How long the in-flight marker shields the table from retry storms; the
+# row itself stays authoritative after it expires
+IN_FLIGHT_TIMEOUT = 60
+
+
+def _cache_key(user_id, key):
+    return f"idempotency:{user_id}:{hashlib.sha256(key.encode()).hexdigest()}"
+
+
+def request_fingerprint(request) -> str:
+    """SHA-256 of method, path and the parsed request body"""
+    data = request.data
+    if hasattr(data, "lists"):
+        data = dict(data.lists())
+    payload = json.dumps(
+        [request.method, request.path, data],
+        sort_keys=True,
+        cls=DjangoJSONEncoder,
+    )
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def _entry(record):
+    """Cache representation of an IdempotencyKey row"""
+    return {
+        "status": record.status,
+        "fingerprint": record.request_fingerprint,
+        "response_status": record.response_status,
+        "response_body": record.response_body,
+    }
+
+
+def _claim(request, key, fingerprint):
+    """
+    Insert the key row, or load the one that already exists
+
+    A stale IN_PROGRESS row for the same request is taken over with a
+    conditional UPDATE on updated_at, so only one retry wins it.
+
+    Returns:
+        (record, created); record is None if the key was released
+        between the failed INSERT and the lookup
+    """
+    try:
+        with transaction.atomic():
+            record = IdempotencyKey.objects.create(
+                user=request.user,
+                key=key,
+                endpoint=request.path,
+                request_fingerprint=fingerprint,
+            )
+        return record, True
+    except IntegrityError:
+        record = IdempotencyKey.objects.filter(user=request.user, key=key).first()
+
+    stale_before = timezone.now() - timedelta(seconds=settings.IDEMPOTENCY_IN_FLIGHT_TIMEOUT_SECONDS)
+    if (
+        record is not None
+        and record.status == "IN_PROGRESS"
+        and record.request_fingerprint == fingerprint
+        and record.updated_at < stale_before
+    ):
+        taken = IdempotencyKey.objects.filter(
+            pk=record.pk, status="IN_PROGRESS", updated_at=record.updated_at
+        ).update(updated_at=timezone.now())
+        if taken:
+            record.refresh_from_db()
+            return record, True
+    return record, False
+
+
+def _release(record, cache_key):
+    """Forget a key whose request failed so the client may retry it"""
+    cache.delete(cache_key)
+    record.delete()
+
+
+def _replay(entry, fingerprint):
+    if entry["status"] != "COMPLETED":
+        return Response(
+            {"error": f"A request with this {HEADER} is still being processed"},
+            status=status.HTTP_409_CONFLICT,
+        )
+
+    if entry["fingerprint"] != fingerprint:
+        return Response(
+            {"error": f"{HEADER} has already been used for a different request"},
+            status=status.HTTP_422_UNPROCESSABLE_ENTITY,
+        )
+
+    response = Response(entry["response_body"], status=entry["response_status"])
+    response[REPLAY_HEADER] = "true"
+    return response
+
+
+def idempotent(view_method):
+    """
+    Make an APIView handler honour the Idempotency-Key header
+
+    Usage:
+        @idempotent
+        def post(self, request): ...
+    """
+
+    @functools.wraps(view_method)
+    def wrapper(view, request, *args, **kwargs):
+        key = request.headers.get(HEADER)
+        if key is None:
+            return view_method(view, request, *args, **kwargs)
+
+        key = key.strip()
+        if not key or len(key) > MAX_KEY_LENGTH:
+            return Response(
+                {"error": f"{HEADER} must be 1-{MAX_KEY_LENGTH} characters"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        fingerprint = request_fingerprint(request)
+        cache_key = _cache_key(request.user.pk, key)
+
+        entry = cache.get(cache_key)
+        if entry is not None:
+            return _replay(entry, fingerprint)
+
+        record, created = _claim(request, key, fingerprint)
+
+        if not created:
+            if record is None:
+                return Response(
+                    {"error": f"A request with this {HEADER} is still being processed"},
+                    status=status.HTTP_409_CONFLICT,
+                )
+            entry = _entry(record)
+            if record.status == "COMPLETED":
+                cache.set(cache_key, entry, timeout=settings.IDEMPOTENCY_KEY_TTL_SECONDS)
+            return _replay(entry, fingerprint)
+
+        cache.set(cache_key, _entry(record), timeout=IN_FLIGHT_TIMEOUT)
+
+        try:
+            with transaction.atomic():
+                # Locked until the outcome commits with the ledger write, so
+                # a retry taking over a stale key waits and then finds it done
+                owned = (
+                    IdempotencyKey.objects.select_for_update()
+                    .filter(pk=record.pk, status="IN_PROGRESS", updated_at=record.updated_at)
+                    .first()
+                )
+                if owned is None:
+                    return Response(
+                        {"error": f"A request with this {HEADER} is still being processed"},
+                        status=status.HTTP_409_CONFLICT,
+                    )
+
+                response = view_method(view, request, *args, **kwargs)
+
+                if response.status_code >= 500:
+                    record.delete()
+                else:
+                    record.status = "COMPLETED"
+                    record.response_status = response.status_code
+                    record.response_body = json.loads(
+                        json.dumps(response.data, cls=DjangoJSONEncoder)
+                    )
+                    record.save(
+                        update_fields=["status", "response_status", "response_body", "updated_at"]
+                    )
+        except Exception:
+            _release(record, cache_key)
+            raise
+
+        if response.status_code >= 500:
+            cache.delete(cache_key)
+        else:
+            cache.set(cache_key, _entry(record), timeout=settings.IDEMPOTENCY_KEY_TTL_SECONDS)
+
+        return response
+
+    return wrapper
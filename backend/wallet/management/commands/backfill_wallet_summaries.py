@@ -0,0 +1,62 @@
+"""
+Daily wallet summary backfill
+
+    python manage.py backfill_wallet_summaries
+    python manage.py backfill_wallet_summaries --from 2024-01-01 --to 2024-03-31
+
+Rebuilds WalletDailySummary rows from the transaction ledger, a chunk of
+days per database transaction. Run it once after deploying the rollup (and
+again the next day, so the deploy day is rebuilt whole); after that
+WalletService keeps the rows current. Re-running a range is safe.
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Min
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from wallet.models import WalletTransaction
+from wallet.snapshots import last_complete_day
+from wallet.summaries import rebuild
+
+
+class Command(BaseCommand):
+    help = "Rebuild daily wallet summaries from the transaction ledger"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--from", dest="start", help="First day (YYYY-MM-DD, default: first transaction)")
+        parser.add_argument("--to", dest="end", help="Last day (YYYY-MM-DD, default: yesterday)")
+        parser.add_argument("--chunk-days", type=int, default=7, help="Days rebuilt per transaction")
+
+    def parse_day(self, value, option):
+        day = parse_date(value)
+        if day is None:
+            raise CommandError(f"{option} must be a date (YYYY-MM-DD)")
+        return day
+
+    def handle(self, *args, **options):
+        end = last_complete_day()
+        if options["end"]:
+            requested = self.parse_day(options["end"], "--to")
+            if requested > end:
+                raise CommandError(f"--to cannot be later than {end}; days still taking writes are not rebuilt")
+            end = requested
+
+        if options["start"]:
+            start = self.parse_day(options["start"], "--from")
+        else:
+            first = WalletTransaction.objects.aggregate(first=Min("completed_at"))["first"]
+            if first is None:
+                self.stdout.write("No transactions to summarise")
+                return
+            start = timezone.localdate(first)
+
+        if options["chunk_days"] < 1:
+            raise CommandError("--chunk-days must be at least 1")
+
+        def progress(first, last, count):
+            if options["verbosity"] > 1:
+                self.stdout.write(f"{first}..{last}: {count} rows")
+
+        written = rebuild(start, end, chunk_days=options["chunk_days"], on_chunk=progress)
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {start}..{end}: {written} summary rows"))
@@ -0,0 +1,100 @@
+"""
+Hot-wallet contention benchmark
+
+    python manage.py benchmark_wallet_credits --threads 16 --ops 200
+
+Runs concurrent credits against a single wallet with the atomic
+UPDATE ... RETURNING path and with the previous SELECT ... FOR UPDATE
+path, then reports throughput, queries per credit and whether the final
+balance matches the ledger (no lost updates). Needs a database with real
+row locking (PostgreSQL); the benchmark user is deleted afterwards.
+"""
+
+import threading
+import time
+import uuid
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections
+from django.test.utils import CaptureQueriesContext, override_settings
+
+from authentication.models import User
+from wallet.models import Wallet, WalletTransaction
+from wallet.services import WalletService
+
+AMOUNT = Decimal("1.00")
+
+
+class Command(BaseCommand):
+    help = "Compare concurrent wallet credit throughput for both balance update paths"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--threads", type=int, default=8)
+        parser.add_argument("--ops", type=int, default=100, help="Credits per thread")
+
+    def handle(self, *args, **options):
+        if connection.vendor == "sqlite":
+            raise CommandError("SQLite serialises writers; run this against PostgreSQL")
+
+        for atomic in (False, True):
+            label = "atomic UPDATE" if atomic else "SELECT FOR UPDATE"
+            with override_settings(WALLET_ATOMIC_BALANCE_UPDATES=atomic):
+                result = self._run(options["threads"], options["ops"])
+
+            status = self.style.SUCCESS("consistent") if result["consistent"] else (
+                self.style.ERROR("LOST UPDATES")
+            )
+            self.stdout.write(
+                f"{label:>18}: {result['ops_per_sec']:.0f} credits/sec, "
+                f"{result['queries_per_op']:.1f} queries/credit, "
+                f"{result['errors']} errors, {status}"
+            )
+
+    def _run(self, threads, ops):
+        suffix = uuid.uuid4().hex[:8]
+        user = User.objects.create_user(
+            email=f"bench-{suffix}@example.invalid", username=f"bench-{suffix}"
+        )
+        Wallet.objects.get_or_create(user=user)
+
+        errors = []
+        queries = []
+        start = threading.Barrier(threads + 1)
+
+        def worker():
+            try:
+                start.wait()
+                # Per-thread connection, so queries are counted without
+                # flipping the process-wide DEBUG setting
+                with CaptureQueriesContext(connection) as captured:
+                    for _ in range(ops):
+                        try:
+                            WalletService.credit_wallet(user, AMOUNT, source="ADMIN_ADJUSTMENT")
+                        except Exception as e:
+                            errors.append(e)
+                queries.append(len(captured))
+            finally:
+                connections.close_all()
+
+        pool = [threading.Thread(target=worker) for _ in range(threads)]
+        for thread in pool:
+            thread.start()
+        start.wait()
+        started = time.monotonic()
+        for thread in pool:
+            thread.join()
+        elapsed = time.monotonic() - started
+
+        try:
+            balance = Wallet.objects.get(pk=user.pk).balance
+            ledger = WalletTransaction.objects.filter(wallet_id=user.pk).count()
+            completed = threads * ops - len(errors)
+            return {
+                "ops_per_sec": completed / elapsed if elapsed else 0,
+                "queries_per_op": sum(queries) / completed if completed else 0,
+                "errors": len(errors),
+                "consistent": balance == AMOUNT * ledger and ledger == completed,
+            }
+        finally:
+            user.delete()
@@ -0,0 +1,102 @@
+"""
+Opposing-transfer contention benchmark
+
+    python manage.py benchmark_wallet_transfers --threads 16 --ops 200
+
+Half the threads transfer A→B and half B→A through
+WalletService.transfer, then the command reports throughput, deadlocks,
+other errors and whether both balances still match their ledgers (no
+lost updates) and the total is conserved. Needs a database with real row
+locking (PostgreSQL); the benchmark users are deleted afterwards.
+"""
+
+import threading
+import time
+import uuid
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections
+from django.db.models import Sum
+
+from authentication.models import User
+from wallet.models import Wallet, WalletTransaction
+from wallet.services import WalletService
+
+AMOUNT = Decimal("1.00")
+OPENING_BALANCE = Decimal("100000.00")
+
+
+class Command(BaseCommand):
+    help = "Run concurrent A→B / B→A wallet transfers and check for deadlocks and lost updates"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--threads", type=int, default=8)
+        parser.add_argument("--ops", type=int, default=100, help="Transfers per thread")
+
+    def handle(self, *args, **options):
+        if connection.vendor == "sqlite":
+            raise CommandError("SQLite serialises writers; run this against PostgreSQL")
+
+        threads, ops = options["threads"], options["ops"]
+        suffix = uuid.uuid4().hex[:8]
+        users = [
+            User.objects.create_user(
+                email=f"bench-{side}-{suffix}@example.invalid", username=f"bench-{side}-{suffix}"
+            )
+            for side in ("a", "b")
+        ]
+        for user in users:
+            Wallet.objects.update_or_create(user=user, defaults={"balance": OPENING_BALANCE})
+
+        deadlocks = []
+        errors = []
+        start = threading.Barrier(threads + 1)
+
+        def worker(sender, recipient):
+            try:
+                start.wait()
+                for _ in range(ops):
+                    try:
+                        WalletService.transfer(sender, recipient, AMOUNT)
+                    except Exception as e:
+                        (deadlocks if "deadlock" in str(e).lower() else errors).append(e)
+            finally:
+                connections.close_all()
+
+        pool = [
+            threading.Thread(target=worker, args=users if n % 2 == 0 else users[::-1])
+            for n in range(threads)
+        ]
+        for thread in pool:
+            thread.start()
+        start.wait()
+        started = time.monotonic()
+        for thread in pool:
+            thread.join()
+        elapsed = time.monotonic() - started
+
+        try:
+            consistent = True
+            for user in users:
+                balance = Wallet.objects.get(pk=user.pk).balance
+                ledger = WalletTransaction.objects.filter(wallet_id=user.pk).values(
+                    "transaction_type"
+                ).annotate(total=Sum("amount"))
+                totals = {row["transaction_type"]: row["total"] for row in ledger}
+                expected = OPENING_BALANCE + totals.get("CREDIT", 0) - totals.get("DEBIT", 0)
+                consistent = consistent and balance == expected
+            total = Wallet.objects.filter(pk__in=[u.pk for u in users]).aggregate(
+                total=Sum("balance")
+            )["total"]
+            consistent = consistent and total == OPENING_BALANCE * 2
+        finally:
+            for user in users:
+                user.delete()
+
+        completed = threads * ops - len(deadlocks) - len(errors)
+        status = self.style.SUCCESS("consistent") if consistent else self.style.ERROR("LOST UPDATES")
+        self.stdout.write(
+            f"{completed / elapsed if elapsed else 0:.0f} transfers/sec, "
+            f"{len(deadlocks)} deadlocks, {len(errors)} other errors, {status}"
+        )
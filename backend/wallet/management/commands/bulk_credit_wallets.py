@@ -0,0 +1,90 @@
+"""
+Bulk disbursement (cashback, referral payouts)
+
+    python manage.py bulk_credit_wallets payouts.csv --source ADMIN_ADJUSTMENT
+    python manage.py bulk_credit_wallets payouts.ndjson --report results.csv
+
+Reads a CSV (with a header row) or NDJSON file of entries with user_id or
+email, amount and optional reference and description, credits them
+through WalletService.bulk_credit and writes one outcome row per entry
+to the report. Give every entry a reference so the file can be re-run
+after an interruption without paying anyone twice.
+"""
+
+import csv
+import json
+import sys
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from wallet.models import WalletTransaction
+from wallet.services import WalletService
+
+REPORT_FIELDS = ["user_id", "email", "reference", "status", "balance_after", "error"]
+
+
+class Command(BaseCommand):
+    help = "Credit many wallets from a CSV or NDJSON payout file"
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="CSV or NDJSON file of credits")
+        parser.add_argument(
+            "--format",
+            choices=["csv", "ndjson"],
+            help="File format (default: inferred from the extension)",
+        )
+        parser.add_argument(
+            "--source",
+            default="ADMIN_ADJUSTMENT",
+            choices=[choice for choice, _ in WalletTransaction.TRANSACTION_SOURCES],
+        )
+        parser.add_argument("--chunk-size", type=int, default=1000)
+        parser.add_argument("--report", help="Write per-entry outcomes to this CSV file")
+
+    def handle(self, *args, **options):
+        path = options["path"]
+        file_format = options["format"] or (
+            "ndjson" if path.endswith((".ndjson", ".jsonl")) else "csv"
+        )
+        started = time.monotonic()
+
+        try:
+            with open(path, newline="", encoding="utf-8") as handle:
+                if file_format == "csv":
+                    entries = csv.DictReader(handle)
+                else:
+                    entries = (json.loads(line) for line in handle if line.strip())
+
+                results = WalletService.bulk_credit(
+                    entries, source=options["source"], chunk_size=options["chunk_size"]
+                )
+        except OSError as e:
+            raise CommandError(f"Could not read {path}: {e}")
+        except json.JSONDecodeError as e:
+            raise CommandError(f"Invalid NDJSON in {path}: {e}")
+
+        elapsed = time.monotonic() - started
+
+        if options["report"]:
+            with open(options["report"], "w", newline="", encoding="utf-8") as handle:
+                self._write_report(handle, results)
+        elif options["verbosity"] > 1:
+            self._write_report(sys.stdout, results)
+
+        totals = {}
+        for result in results:
+            totals[result["status"]] = totals.get(result["status"], 0) + 1
+        summary = ", ".join(f"{count} {status}" for status, count in sorted(totals.items()))
+        credited = totals.get("credited", 0)
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{len(results)} entries ({summary}) in {elapsed:.1f}s "
+                f"- {credited / elapsed * 60 if elapsed else 0:.0f} credits/min"
+            )
+        )
+
+    def _write_report(self, handle, results):
+        writer = csv.DictWriter(handle, fieldnames=REPORT_FIELDS, extrasaction="ignore")
+        writer.writeheader()
+        writer.writerows(results)
@@ -0,0 +1,90 @@
+"""
+Bulk reversal for incident remediation (e.g. a gateway double-post)
+
+    python manage.py bulk_reverse_transactions refs.txt --reason "Gateway double-post"
+    python manage.py bulk_reverse_transactions refs.txt --reason "..." --execute --report out.csv
+
+Reads transaction references (one per line, or a CSV with a `reference`
+column) and reverses them through WalletService.bulk_reverse. Without
+--execute it is a dry run: every chunk is processed and rolled back, and
+the report shows exactly what would happen. Review it, then re-run with
+--execute. References already reversed are reported and skipped, so an
+interrupted run can be repeated.
+"""
+
+import csv
+import sys
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from wallet.services import WalletService
+
+REPORT_FIELDS = [
+    "reference",
+    "wallet_id",
+    "amount",
+    "status",
+    "reversal_reference",
+    "balance_after",
+    "error",
+]
+
+
+class Command(BaseCommand):
+    help = "Reverse many wallet transactions (dry run unless --execute)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="File of references (.txt one per line, or .csv)")
+        parser.add_argument("--reason", required=True, help="Reason recorded on every reversal")
+        parser.add_argument("--execute", action="store_true", help="Apply the reversals")
+        parser.add_argument("--chunk-size", type=int, default=500)
+        parser.add_argument("--report", help="Write per-reference outcomes to this CSV file")
+
+    def handle(self, *args, **options):
+        path = options["path"]
+        dry_run = not options["execute"]
+        started = time.monotonic()
+
+        try:
+            with open(path, newline="", encoding="utf-8") as handle:
+                if path.endswith(".csv"):
+                    reader = csv.DictReader(handle)
+                    if "reference" not in (reader.fieldnames or []):
+                        raise CommandError(f"{path} has no 'reference' column")
+                    references = (row["reference"] for row in reader if row["reference"].strip())
+                else:
+                    references = (line for line in handle if line.strip())
+
+                results = WalletService.bulk_reverse(
+                    references,
+                    reason=options["reason"],
+                    dry_run=dry_run,
+                    chunk_size=options["chunk_size"],
+                )
+        except OSError as e:
+            raise CommandError(f"Could not read {path}: {e}")
+
+        elapsed = time.monotonic() - started
+
+        if options["report"]:
+            with open(options["report"], "w", newline="", encoding="utf-8") as handle:
+                self._write_report(handle, results)
+        elif dry_run or options["verbosity"] > 1:
+            self._write_report(sys.stdout, results)
+
+        totals = {}
+        for result in results:
+            totals[result["status"]] = totals.get(result["status"], 0) + 1
+        summary = ", ".join(f"{count} {status}" for status, count in sorted(totals.items()))
+        message = f"{len(results)} references ({summary}) in {elapsed:.1f}s"
+
+        if dry_run:
+            self.stdout.write(self.style.WARNING(f"DRY RUN - nothing was reversed. {message}"))
+        else:
+            self.stdout.write(self.style.SUCCESS(message))
+
+    def _write_report(self, handle, results):
+        writer = csv.DictWriter(handle, fieldnames=REPORT_FIELDS, extrasaction="ignore")
+        writer.writeheader()
+        writer.writerows(results)
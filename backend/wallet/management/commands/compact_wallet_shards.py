@@ -0,0 +1,29 @@
+"""
+Periodic compaction of sharded wallet balances
+
+    python manage.py compact_wallet_shards
+
+Folds every sharded wallet's slot balances into Wallet.balance, one short
+transaction per wallet. Debits fold on their own, so this only keeps
+Wallet.balance close to the total for wallets that mostly receive credits.
+Run it from cron every few minutes.
+"""
+
+from django.core.management.base import BaseCommand
+
+from wallet.models import Wallet
+from wallet.services import WalletService
+
+
+class Command(BaseCommand):
+    help = "Fold sharded wallet sub-balances into their wallets"
+
+    def handle(self, *args, **options):
+        compacted = 0
+        for wallet in Wallet.objects.filter(balance_shards__gt=0).select_related("user").iterator():
+            folded = WalletService.compact_balance_shards(wallet.user)
+            if folded:
+                compacted += 1
+                self.stdout.write(f"{wallet.user.email}: folded ₦{folded}")
+
+        self.stdout.write(self.style.SUCCESS(f"Compacted {compacted} wallets"))
@@ -0,0 +1,26 @@
+"""
+Idempotency key cleanup
+
+    python manage.py purge_idempotency_keys
+
+Deletes stored Idempotency-Key responses older than
+IDEMPOTENCY_KEY_TTL_SECONDS. Run it from cron; keys are only needed for
+as long as clients may retry.
+"""
+
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from wallet.models import IdempotencyKey
+
+
+class Command(BaseCommand):
+    help = "Delete expired Idempotency-Key records"
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(seconds=settings.IDEMPOTENCY_KEY_TTL_SECONDS)
+        deleted, _ = IdempotencyKey.objects.filter(created_at__lt=cutoff).delete()
+        self.stdout.write(self.style.SUCCESS(f"Deleted {deleted} expired idempotency keys"))
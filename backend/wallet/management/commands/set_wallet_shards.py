@@ -0,0 +1,39 @@
+"""
+Switch a wallet to or from sharded balances
+
+    python manage.py set_wallet_shards merchant@example.com 16
+    python manage.py set_wallet_shards merchant@example.com 0
+
+Sharded wallets spread credits over N sub-balance slots so high-volume
+collection wallets do not queue on one row lock. Slot balances are folded
+into the wallet before the slot count changes.
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+
+from authentication.models import User
+from wallet.services import WalletService
+
+
+class Command(BaseCommand):
+    help = "Set the number of balance shards (0 disables sharding) for a user's wallet"
+
+    def add_arguments(self, parser):
+        parser.add_argument("email")
+        parser.add_argument("shards", type=int)
+
+    def handle(self, *args, **options):
+        try:
+            user = User.objects.get(email__iexact=options["email"])
+        except User.DoesNotExist:
+            raise CommandError(f"No user with email {options['email']}")
+
+        if options["shards"] < 0:
+            raise CommandError("shards cannot be negative")
+
+        wallet = WalletService.set_balance_shards(user, options["shards"])
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{user.email}: {wallet.balance_shards} balance shards, balance ₦{wallet.balance}"
+            )
+        )
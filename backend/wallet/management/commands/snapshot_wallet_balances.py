@@ -0,0 +1,46 @@
+"""
+Daily wallet balance snapshots
+
+    python manage.py snapshot_wallet_balances
+    python manage.py snapshot_wallet_balances --through 2024-06-30
+    python manage.py snapshot_wallet_balances --rebuild
+
+Writes end-of-day balances for every day since the latest snapshot (or
+since the first transaction), which WalletService.get_balance_at and
+GET /api/wallet/balance/?at= start from. Run it from cron shortly after
+midnight; days that have not ended yet are never snapshotted.
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_date
+
+from wallet.snapshots import last_complete_day, take_snapshots
+
+
+class Command(BaseCommand):
+    help = "Write daily wallet balance snapshots"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--through", help="Last day to snapshot (YYYY-MM-DD, default: yesterday)")
+        parser.add_argument(
+            "--rebuild",
+            action="store_true",
+            help="Delete all snapshots and rebuild them from the first transaction",
+        )
+
+    def handle(self, *args, **options):
+        through = last_complete_day()
+        if options["through"]:
+            requested = parse_date(options["through"])
+            if requested is None:
+                raise CommandError("--through must be a date (YYYY-MM-DD)")
+            if requested > through:
+                raise CommandError(f"--through cannot be later than {through}")
+            through = requested
+
+        def progress(day, count):
+            if count and options["verbosity"] > 1:
+                self.stdout.write(f"{day}: {count} snapshots")
+
+        written = take_snapshots(through=through, rebuild=options["rebuild"], on_day=progress)
+        self.stdout.write(self.style.SUCCESS(f"Wrote {written} snapshots through {through}"))
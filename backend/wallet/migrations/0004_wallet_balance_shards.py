@@ -0,0 +1,64 @@
+# Generated by Django 5.2.18 on 2026-10-18 16:48
+
+import django.db.models.deletion
+from decimal import Decimal
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("wallet", "0003_idempotencykey"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="wallet",
+            name="balance_shards",
+            field=models.PositiveSmallIntegerField(
+                default=0,
+                help_text="Number of sub-balance slots credits are spread over (0 = unsharded)",
+            ),
+        ),
+        migrations.CreateModel(
+            name="WalletBalanceShard",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("slot", models.PositiveSmallIntegerField()),
+                (
+                    "balance",
+                    models.DecimalField(
+                        decimal_places=2, default=Decimal("0.00"), max_digits=12
+                    ),
+                ),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                (
+                    "wallet",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="shards",
+                        to="wallet.wallet",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Wallet Balance Shard",
+                "verbose_name_plural": "Wallet Balance Shards",
+                "db_table": "wallet_balance_shards",
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("wallet", "slot"),
+                        name="unique_wallet_balance_shard_slot",
+                    )
+                ],
+            },
+        ),
+    ]
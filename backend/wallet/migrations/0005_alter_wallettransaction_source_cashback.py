@@ -0,0 +1,30 @@
+# Generated by Django 5.2.18 on 2026-10-18 16:49
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("wallet", "0004_wallet_balance_shards"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="wallettransaction",
+            name="source",
+            field=models.CharField(
+                choices=[
+                    ("FUNDING", "Wallet Funding"),
+                    ("ORDER_PAYMENT", "Order Payment"),
+                    ("REFUND", "Refund"),
+                    ("REVERSAL", "Reversal"),
+                    ("ADMIN_ADJUSTMENT", "Admin Adjustment"),
+                    ("TRANSFER", "Wallet Transfer"),
+                    ("CASHBACK", "Cashback"),
+                    ("REFERRAL", "Referral Bonus"),
+                ],
+                max_length=50,
+            ),
+        ),
+    ]
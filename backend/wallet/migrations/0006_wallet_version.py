@@ -0,0 +1,22 @@
+# Generated by Django 5.2.18 on 2026-10-18 16:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("wallet", "0005_alter_wallettransaction_source_cashback"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="wallet",
+            name="version",
+            field=models.PositiveBigIntegerField(
+                default=0,
+                editable=False,
+                help_text="Incremented by every balance write; orders balance cache entries",
+            ),
+        ),
+    ]
@@ -0,0 +1,71 @@
+# Generated by Django 5.2.18 on 2026-10-18 16:54
+
+import django.db.models.deletion
+from decimal import Decimal
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("wallet", "0006_wallet_version"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="WalletReconciliationCheckpoint",
+            fields=[
+                (
+                    "wallet",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="reconciliation",
+                        serialize=False,
+                        to="wallet.wallet",
+                    ),
+                ),
+                (
+                    "last_transaction_id",
+                    models.BigIntegerField(
+                        default=0,
+                        help_text="Highest WalletTransaction id already scanned",
+                    ),
+                ),
+                (
+                    "pending_transaction_ids",
+                    models.JSONField(
+                        blank=True,
+                        default=list,
+                        help_text="Scanned PENDING transactions, re-checked until they complete or fail",
+                    ),
+                ),
+                (
+                    "ledger_balance",
+                    models.DecimalField(
+                        decimal_places=2,
+                        default=Decimal("0.00"),
+                        help_text="Net sum of applied (COMPLETED or REVERSED) transactions",
+                        max_digits=14,
+                    ),
+                ),
+                (
+                    "chain_balance",
+                    models.DecimalField(
+                        decimal_places=2,
+                        default=Decimal("0.00"),
+                        help_text="Expected balance_before of the next wallet-level transaction",
+                        max_digits=14,
+                    ),
+                ),
+                ("wallet_version", models.PositiveBigIntegerField(default=0)),
+                ("is_balanced", models.BooleanField(default=True)),
+                ("checked_at", models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                "verbose_name": "Wallet Reconciliation Checkpoint",
+                "verbose_name_plural": "Wallet Reconciliation Checkpoints",
+                "db_table": "wallet_reconciliation_checkpoints",
+            },
+        ),
+    ]
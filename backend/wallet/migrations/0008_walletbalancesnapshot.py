@@ -0,0 +1,72 @@
+# Generated by Django 5.2.18 on 2026-10-18 16:57
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("wallet", "0007_walletreconciliationcheckpoint"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="WalletBalanceSnapshot",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("snapshot_date", models.DateField()),
+                (
+                    "balance",
+                    models.DecimalField(
+                        decimal_places=2,
+                        help_text="Net sum of applied transactions created before the end of snapshot_date",
+                        max_digits=14,
+                    ),
+                ),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                "verbose_name": "Wallet Balance Snapshot",
+                "verbose_name_plural": "Wallet Balance Snapshots",
+                "db_table": "wallet_balance_snapshots",
+                "ordering": ["-snapshot_date"],
+            },
+        ),
+        migrations.AddIndex(
+            model_name="wallettransaction",
+            index=models.Index(
+                fields=["created_at"], name="wallet_tran_created_33245a_idx"
+            ),
+        ),
+        migrations.AddField(
+            model_name="walletbalancesnapshot",
+            name="wallet",
+            field=models.ForeignKey(
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="balance_snapshots",
+                to="wallet.wallet",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="walletbalancesnapshot",
+            index=models.Index(
+                fields=["snapshot_date"], name="wallet_bala_snapsho_43f495_idx"
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="walletbalancesnapshot",
+            constraint=models.UniqueConstraint(
+                fields=("wallet", "snapshot_date"),
+                name="unique_wallet_balance_snapshot_date",
+            ),
+        ),
+    ]
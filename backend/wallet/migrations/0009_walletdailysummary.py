@@ -0,0 +1,71 @@
+# Generated by Django 5.2.18 on 2026-10-18 17:00
+
+import django.db.models.deletion
+from decimal import Decimal
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("wallet", "0008_walletbalancesnapshot"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="WalletDailySummary",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("summary_date", models.DateField()),
+                ("source", models.CharField(max_length=50)),
+                (
+                    "inflow",
+                    models.DecimalField(
+                        decimal_places=2, default=Decimal("0.00"), max_digits=14
+                    ),
+                ),
+                (
+                    "outflow",
+                    models.DecimalField(
+                        decimal_places=2, default=Decimal("0.00"), max_digits=14
+                    ),
+                ),
+                ("credit_count", models.PositiveIntegerField(default=0)),
+                ("debit_count", models.PositiveIntegerField(default=0)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                (
+                    "wallet",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="daily_summaries",
+                        to="wallet.wallet",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Wallet Daily Summary",
+                "verbose_name_plural": "Wallet Daily Summaries",
+                "db_table": "wallet_daily_summaries",
+                "ordering": ["-summary_date"],
+                "indexes": [
+                    models.Index(
+                        fields=["summary_date"], name="wallet_dail_summary_5b6df0_idx"
+                    )
+                ],
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("wallet", "summary_date", "source"),
+                        name="unique_wallet_daily_summary_source",
+                    )
+                ],
+            },
+        ),
+    ]
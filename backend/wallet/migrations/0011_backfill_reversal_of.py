@@ -0,0 +1,68 @@
+# Links existing REVERSAL rows to the transaction they reversed, from the
+# original_transaction_id / original_reference keys in their metadata
+
+from django.db import migrations
+
+BATCH_SIZE = 1000
+
+
+def backfill_reversal_of(apps, schema_editor):
+    WalletTransaction = apps.get_model("wallet", "WalletTransaction")
+
+    reversals = (
+        WalletTransaction.objects.filter(source="REVERSAL", reversal_of__isnull=True)
+        .order_by("id")
+        .values_list("id", "metadata")
+    )
+
+    linked = set(
+        WalletTransaction.objects.filter(reversal_of__isnull=False).values_list(
+            "reversal_of_id", flat=True
+        )
+    )
+    batch = []
+
+    def flush():
+        by_reference = dict(
+            WalletTransaction.objects.filter(
+                reference__in=[ref for _, _, ref in batch if ref]
+            ).values_list("reference", "id")
+        )
+        existing = set(
+            WalletTransaction.objects.filter(
+                id__in=[original_id for _, original_id, _ in batch if original_id]
+            ).values_list("id", flat=True)
+        )
+        updates = []
+        for pk, original_id, reference in batch:
+            if original_id not in existing:
+                original_id = by_reference.get(reference)
+            # A second reversal of the same transaction keeps only its
+            # metadata; the first one owns the link
+            if original_id is None or original_id in linked or original_id == pk:
+                continue
+            linked.add(original_id)
+            updates.append(WalletTransaction(id=pk, reversal_of_id=original_id))
+        WalletTransaction.objects.bulk_update(updates, ["reversal_of"])
+        batch.clear()
+
+    for pk, metadata in reversals.iterator(chunk_size=BATCH_SIZE):
+        metadata = metadata or {}
+        original_id = metadata.get("original_transaction_id")
+        original_id = int(original_id) if str(original_id or "").isdigit() else None
+        batch.append((pk, original_id, metadata.get("original_reference")))
+        if len(batch) >= BATCH_SIZE:
+            flush()
+    if batch:
+        flush()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("wallet", "0010_wallettransaction_reversal_of"),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_reversal_of, migrations.RunPython.noop),
+    ]
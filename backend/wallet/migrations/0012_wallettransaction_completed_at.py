@@ -0,0 +1,46 @@
+# Generated by Django 5.2.18 on 2026-10-18 17:16
+
+from django.db import migrations, models
+from django.db.models import F
+
+
+def backfill_completed_at(apps, schema_editor):
+    # Existing snapshots were bucketed by created_at, so applied rows keep
+    # that as their completion time (`snapshot_wallet_balances --rebuild`
+    # re-buckets them once real completion times are recorded)
+    WalletTransaction = apps.get_model("wallet", "WalletTransaction")
+    WalletTransaction.objects.filter(
+        status__in=("COMPLETED", "REVERSED"), completed_at__isnull=True
+    ).update(completed_at=F("created_at"))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("wallet", "0011_backfill_reversal_of"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="wallettransaction",
+            name="completed_at",
+            field=models.DateTimeField(
+                blank=True,
+                help_text="When the transaction moved the balance (later than created_at for verified fundings)",
+                null=True,
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="wallettransaction",
+            index=models.Index(
+                fields=["completed_at"], name="wallet_tran_complet_d54a4a_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="wallettransaction",
+            index=models.Index(
+                fields=["wallet", "completed_at"], name="wallet_tran_wallet__82d397_idx"
+            ),
+        ),
+        migrations.RunPython(backfill_completed_at, migrations.RunPython.noop),
+    ]
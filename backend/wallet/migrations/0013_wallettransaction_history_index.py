@@ -0,0 +1,25 @@
+# Generated by Django 5.2.18 on 2026-10-18 17:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("wallet", "0012_wallettransaction_completed_at"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="wallettransaction",
+            index=models.Index(
+                fields=["wallet", "-created_at", "-id"],
+                name="wallet_tran_wallet__f03907_idx",
+            ),
+        ),
+        # Dropped after the new index exists, so history reads always have one
+        migrations.RemoveIndex(
+            model_name="wallettransaction",
+            name="wallet_tran_wallet__3d47ad_idx",
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 5.2.18 on 2026-10-18 17:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("wallet", "0013_wallettransaction_history_index"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="walletreconciliationcheckpoint",
+            name="recent_transaction_ids",
+            field=models.JSONField(
+                blank=True,
+                help_text="Scanned transactions inside the late-commit window, not counted twice on re-scan (null: not tracked yet)",
+                null=True,
+            ),
+        ),
+    ]
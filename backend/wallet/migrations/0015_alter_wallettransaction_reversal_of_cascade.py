@@ -0,0 +1,26 @@
+# Generated by Django 5.2.18 on 2026-10-18 17:37
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("wallet", "0014_walletreconciliationcheckpoint_recent_transaction_ids"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="wallettransaction",
+            name="reversal_of",
+            field=models.OneToOneField(
+                blank=True,
+                help_text="Transaction this REVERSAL row reverses (at most one reversal each)",
+                null=True,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="reversal",
+                to="wallet.wallettransaction",
+            ),
+        ),
+    ]
@@ -2,14 +2,20 @@
 Wallet Models
 - Wallet: Stores user wallet balance
 - WalletTransaction: Records all wallet debits and credits
+- IdempotencyKey: Stored responses for Idempotency-Key replays
+- WalletBalanceShard: Sub-balance slots for high-volume (sharded) wallets
+- WalletReconciliationCheckpoint: Incremental ledger reconciliation state
+- WalletBalanceSnapshot: End-of-day balances for point-in-time queries
+- WalletDailySummary: Per-day inflow/outflow rollup by source
 """
 from django.db import models
 from django.core.validators import MinValueValidator
+from django.utils import timezone
 from decimal import Decimal
-from authentication.models import User
+from authentication.models import User, DirtyFieldsMixin
 
 
-class Wallet(models.Model):
+class Wallet(DirtyFieldsMixin, models.Model):
     """
     User Wallet Model
     One wallet per user, stores current balance
@@ -26,6 +32,15 @@ class Wallet(models.Model):
         default=Decimal('0.00'),
         validators=[MinValueValidator(Decimal('0.00'))]
     )
+    balance_shards = models.PositiveSmallIntegerField(
+        default=0,
+        help_text="Number of sub-balance slots credits are spread over (0 = unsharded)"
+    )
+    version = models.PositiveBigIntegerField(
+        default=0,
+        editable=False,
+        help_text="Incremented by every balance write; orders balance cache entries"
+    )
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -37,6 +52,28 @@ class Wallet(models.Model):
     def __str__(self):
         return f"{self.user.email} - Balance: ₦{self.balance}"
 
+    def save(self, *args, **kwargs):
+        # Callers that change the balance hold the row lock (or are the
+        # only writer), so bumping the loaded version is safe; unlocked
+        # balance writes would publish a lost update under a valid version
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None or {'balance', 'balance_shards'} & set(update_fields):
+            self.version += 1
+            if update_fields is not None:
+                kwargs['update_fields'] = [*update_fields, 'version']
+        super().save(*args, **kwargs)
+
+    @property
+    def total_balance(self):
+        """
+        Spendable balance: `balance` plus credits still sitting in shard
+        slots (one extra query for sharded wallets)
+        """
+        if not self.balance_shards:
+            return self.balance
+        pending = self.shards.aggregate(total=models.Sum('balance'))['total']
+        return self.balance + (pending or Decimal('0.00'))
+
 
 class WalletTransaction(models.Model):
     """
@@ -55,6 +92,10 @@ class WalletTransaction(models.Model):
         ('REVERSED', 'Reversed'),
     )
 
+    # Statuses whose amount moved the balance (a reversed transaction did
+    # move money; its reversal is a separate COMPLETED row)
+    APPLIED_STATUSES = ('COMPLETED', 'REVERSED')
+
     TRANSACTION_SOURCES = (
         ("FUNDING", "Wallet Funding"),
         ("ORDER_PAYMENT", "Order Payment"),
@@ -62,6 +103,8 @@ class WalletTransaction(models.Model):
         ("REVERSAL", "Reversal"),
         ("ADMIN_ADJUSTMENT", "Admin Adjustment"),
         ("TRANSFER", "Wallet Transfer"),
+        ("CASHBACK", "Cashback"),
+        ("REFERRAL", "Referral Bonus"),
     )
 
     id = models.AutoField(primary_key=True)
@@ -108,6 +151,19 @@ class WalletTransaction(models.Model):
         blank=True,
         help_text="Additional transaction data (payment gateway reference, order ID, etc.)"
     )
+    reversal_of = models.OneToOneField(
+        'self',
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name='reversal',
+        help_text="Transaction this REVERSAL row reverses (at most one reversal each)"
+    )
+    completed_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        help_text="When the transaction moved the balance (later than created_at for verified fundings)"
+    )
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -117,10 +173,234 @@ class WalletTransaction(models.Model):
         verbose_name_plural = 'Wallet Transactions'
         ordering = ['-created_at']
         indexes = [
-            models.Index(fields=['wallet', '-created_at']),
+            # Matches the history ORDER BY (keyset pagination)
+            models.Index(fields=['wallet', '-created_at', '-id']),
+            models.Index(fields=['created_at']),
+            models.Index(fields=['completed_at']),
+            models.Index(fields=['wallet', 'completed_at']),
             models.Index(fields=['status']),
             models.Index(fields=['reference']),
         ]
 
     def __str__(self):
         return f"{self.transaction_type} - ₦{self.amount} - {self.wallet.user.email}"
+
+    def save(self, *args, **kwargs):
+        # Stamp the moment the row starts counting towards the balance
+        # (bulk_create callers set completed_at themselves)
+        if self.completed_at is None and self.status in self.APPLIED_STATUSES:
+            self.completed_at = timezone.now()
+            update_fields = kwargs.get('update_fields')
+            if update_fields is not None:
+                kwargs['update_fields'] = [*update_fields, 'completed_at']
+        super().save(*args, **kwargs)
+
+
+class IdempotencyKey(models.Model):
+    """
+    Idempotency Key Model
+    Remembers the outcome of a money-moving request so a client retry with
+    the same Idempotency-Key header replays it instead of running it again
+    """
+    STATUS_CHOICES = (
+        ('IN_PROGRESS', 'In Progress'),
+        ('COMPLETED', 'Completed'),
+    )
+
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='idempotency_keys'
+    )
+    key = models.CharField(max_length=255)
+    endpoint = models.CharField(max_length=255)
+    request_fingerprint = models.CharField(
+        max_length=64,
+        help_text="SHA-256 of method, path and request body"
+    )
+    status = models.CharField(
+        max_length=20,
+        choices=STATUS_CHOICES,
+        default='IN_PROGRESS'
+    )
+    response_status = models.PositiveSmallIntegerField(null=True, blank=True)
+    response_body = models.JSONField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'wallet_idempotency_keys'
+        verbose_name = 'Idempotency Key'
+        verbose_name_plural = 'Idempotency Keys'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'key'], name='unique_idempotency_key_per_user'
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['created_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.key} - {self.endpoint} - {self.status}"
+
+
+class WalletBalanceShard(models.Model):
+    """
+    Wallet Balance Shard Model
+    One sub-balance slot of a sharded wallet. Credits land on a random slot
+    so they do not queue on the wallet row lock; debits, reversals,
+    transfers and compaction fold the slots back into Wallet.balance.
+    """
+    wallet = models.ForeignKey(
+        Wallet,
+        on_delete=models.CASCADE,
+        related_name='shards'
+    )
+    slot = models.PositiveSmallIntegerField()
+    balance = models.DecimalField(
+        max_digits=12,
+        decimal_places=2,
+        default=Decimal('0.00')
+    )
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'wallet_balance_shards'
+        verbose_name = 'Wallet Balance Shard'
+        verbose_name_plural = 'Wallet Balance Shards'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['wallet', 'slot'], name='unique_wallet_balance_shard_slot'
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.wallet_id} slot {self.slot} - ₦{self.balance}"
+
+
+class WalletReconciliationCheckpoint(models.Model):
+    """
+    Wallet Reconciliation Checkpoint Model
+    Running ledger totals per wallet, so `manage.py reconcile_wallets` only
+    scans transactions added (or completed) since the previous run
+    """
+    wallet = models.OneToOneField(
+        Wallet,
+        on_delete=models.CASCADE,
+        related_name='reconciliation',
+        primary_key=True
+    )
+    last_transaction_id = models.BigIntegerField(
+        default=0,
+        help_text="Highest WalletTransaction id already scanned"
+    )
+    pending_transaction_ids = models.JSONField(
+        default=list,
+        blank=True,
+        help_text="Scanned PENDING transactions, re-checked until they complete or fail"
+    )
+    recent_transaction_ids = models.JSONField(
+        null=True,
+        blank=True,
+        help_text="Scanned transactions inside the late-commit window, not counted twice "
+                  "on re-scan (null: not tracked yet)"
+    )
+    ledger_balance = models.DecimalField(
+        max_digits=14,
+        decimal_places=2,
+        default=Decimal('0.00'),
+        help_text="Net sum of applied (COMPLETED or REVERSED) transactions"
+    )
+    chain_balance = models.DecimalField(
+        max_digits=14,
+        decimal_places=2,
+        default=Decimal('0.00'),
+        help_text="Expected balance_before of the next wallet-level transaction"
+    )
+    wallet_version = models.PositiveBigIntegerField(default=0)
+    is_balanced = models.BooleanField(default=True)
+    checked_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'wallet_reconciliation_checkpoints'
+        verbose_name = 'Wallet Reconciliation Checkpoint'
+        verbose_name_plural = 'Wallet Reconciliation Checkpoints'
+
+    def __str__(self):
+        return f"{self.wallet_id} - {'balanced' if self.is_balanced else 'DISCREPANCY'}"
+
+
+class WalletBalanceSnapshot(models.Model):
+    """
+    Wallet Balance Snapshot Model
+    Ledger balance at the end of a day, written by
+    `manage.py snapshot_wallet_balances` for days the wallet had activity
+    """
+    wallet = models.ForeignKey(
+        Wallet,
+        on_delete=models.CASCADE,
+        related_name='balance_snapshots'
+    )
+    snapshot_date = models.DateField()
+    balance = models.DecimalField(
+        max_digits=14,
+        decimal_places=2,
+        help_text="Net sum of applied transactions created before the end of snapshot_date"
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = 'wallet_balance_snapshots'
+        verbose_name = 'Wallet Balance Snapshot'
+        verbose_name_plural = 'Wallet Balance Snapshots'
+        ordering = ['-snapshot_date']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['wallet', 'snapshot_date'], name='unique_wallet_balance_snapshot_date'
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['snapshot_date']),
+        ]
+
+    def __str__(self):
+        return f"{self.wallet_id} {self.snapshot_date} - ₦{self.balance}"
+
+
+class WalletDailySummary(models.Model):
+    """
+    Wallet Daily Summary Model
+    Inflow, outflow and counts of a wallet's applied transactions per day
+    and source, kept up to date by WalletService (see wallet/summaries.py)
+    """
+    wallet = models.ForeignKey(
+        Wallet,
+        on_delete=models.CASCADE,
+        related_name='daily_summaries'
+    )
+    summary_date = models.DateField()
+    source = models.CharField(max_length=50)
+    inflow = models.DecimalField(max_digits=14, decimal_places=2, default=Decimal('0.00'))
+    outflow = models.DecimalField(max_digits=14, decimal_places=2, default=Decimal('0.00'))
+    credit_count = models.PositiveIntegerField(default=0)
+    debit_count = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'wallet_daily_summaries'
+        verbose_name = 'Wallet Daily Summary'
+        verbose_name_plural = 'Wallet Daily Summaries'
+        ordering = ['-summary_date']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['wallet', 'summary_date', 'source'],
+                name='unique_wallet_daily_summary_source'
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['summary_date']),
+        ]
+
+    def __str__(self):
+        return f"{self.wallet_id} {self.summary_date} {self.source} - +₦{self.inflow} -₦{self.outflow}"
@@ -0,0 +1,43 @@
+"""
+Keyset pagination for wallet transaction history
+
+Cursors are opaque to clients: a URL-safe base64 of the last row's
+(created_at, id). The next page is the rows strictly after that key in
+(-created_at, -id) order, which the (wallet, -created_at) index serves
+directly, so a page deep in a long history costs the same as the first.
+"""
+
+import base64
+import binascii
+import json
+
+from django.utils.dateparse import parse_datetime
+
+
+class InvalidCursor(ValueError):
+    """The cursor was not issued by encode_cursor"""
+
+
+def encode_cursor(transaction) -> str:
+    """Cursor pointing just after the given transaction"""
+    payload = json.dumps([transaction.created_at.isoformat(), transaction.pk])
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str):
+    """
+    Returns:
+        (created_at, id) of the last row of the previous page
+
+    Raises:
+        InvalidCursor: If the cursor is malformed
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, pk = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        created_at = parse_datetime(created_at)
+        if created_at is None or not isinstance(pk, int):
+            raise ValueError
+        return created_at, pk
+    except (binascii.Error, UnicodeDecodeError, ValueError, TypeError):
+        raise InvalidCursor("Invalid cursor")
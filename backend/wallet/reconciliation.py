@@ -0,0 +1,235 @@
+"""
+Incremental ledger reconciliation
+
+Proves, wallet by wallet, that the wallet's balance (plus any shard slot
+balances) equals the net sum of its applied transactions, and that each
+transaction's balance_before/balance_after chain onto the previous one
+in the order they were applied (completed_at, then id).
+
+Each wallet keeps a WalletReconciliationCheckpoint with the running totals,
+so a run only reads transactions with an id above the checkpoint plus the
+PENDING ones it saw before (they are counted once they complete). Ids are
+assigned at INSERT, not at commit, so a row can become visible after a run
+that already moved the checkpoint past its id (InitiateFundingView inserts
+without the wallet lock): rows created within LATE_COMMIT_SECONDS before
+the previous run are re-scanned, and the ones that run did not see are
+counted then. Wallets whose version has not moved since their checkpoint,
+that have no shard slots and no pending transactions are skipped without
+reading their ledger.
+
+Applied transactions are COMPLETED and REVERSED ones (a reversed
+transaction moved money; its reversal is a separate COMPLETED row).
+Sharded credits (metadata.balance_shard) record their slot's running
+balance, so they are checked for arithmetic only and added to the chain.
+"""
+
+from decimal import Decimal
+from typing import Dict, List
+
+import multiprocessing
+
+from datetime import timedelta
+
+from django.db import connections, transaction
+from django.db.models import F, Q
+from django.db.models.fields.json import KT
+from django.utils import timezone
+
+from .models import Wallet, WalletBalanceShard, WalletReconciliationCheckpoint, WalletTransaction
+
+# A transaction commits within this long of its created_at
+LATE_COMMIT_SECONDS = 300
+
+def _signed(transaction_type, amount):
+    return amount if transaction_type == 'CREDIT' else -amount
+
+
+def candidate_wallet_ids(full: bool = False) -> List[int]:
+    """Wallets that may have changed (or were out of balance) since their checkpoint"""
+    wallets = Wallet.objects.all()
+    if not full:
+        wallets = wallets.filter(
+            Q(reconciliation__isnull=True)
+            | ~Q(version=F('reconciliation__wallet_version'))
+            | Q(balance_shards__gt=0)
+            | ~Q(reconciliation__pending_transaction_ids=[])
+            | Q(reconciliation__is_balanced=False)
+        )
+    return list(wallets.order_by('pk').values_list('pk', flat=True))
+
+
+def reconcile_wallet(wallet_id: int) -> List[Dict]:
+    """
+    Bring one wallet's checkpoint up to date
+
+    The wallet row (and its shard slots) are locked while the new
+    transactions are read, so the balance and the ledger are compared at
+    the same point in time.
+
+    Returns:
+        List of discrepancy dicts (wallet_id, kind, detail, transaction_id)
+    """
+    discrepancies = []
+
+    def report(kind, detail, transaction_id=None):
+        discrepancies.append({
+            "wallet_id": wallet_id,
+            "kind": kind,
+            "detail": detail,
+            "transaction_id": transaction_id,
+        })
+
+    with transaction.atomic():
+        wallet = Wallet.objects.select_for_update().filter(pk=wallet_id).first()
+        if wallet is None:
+            return discrepancies
+
+        balance = wallet.balance
+        if wallet.balance_shards:
+            shards = list(
+                WalletBalanceShard.objects.select_for_update()
+                .filter(wallet_id=wallet_id)
+                .order_by('slot')
+                .values_list('balance', flat=True)
+            )
+            balance += sum(shards, Decimal('0.00'))
+
+        checkpoint, created = WalletReconciliationCheckpoint.objects.get_or_create(wallet_id=wallet_id)
+        pending_ids = set(checkpoint.pending_transaction_ids)
+        recent_ids = set(checkpoint.recent_transaction_ids or [])
+        last_id = checkpoint.last_transaction_id
+        window = timedelta(seconds=LATE_COMMIT_SECONDS)
+
+        scan = Q(id__gt=last_id) | Q(id__in=pending_ids)
+        # Checkpoints written before recent ids were tracked cannot tell a
+        # late row from one they counted, so they start tracking this run
+        if not created and checkpoint.recent_transaction_ids is not None:
+            late_after = checkpoint.checked_at - window
+            scan |= Q(id__lte=last_id, created_at__gte=late_after)
+
+        rows = (
+            WalletTransaction.objects.filter(wallet_id=wallet_id)
+            .filter(scan)
+            .annotate(shard=KT('metadata__balance_shard'))
+            # Commit order: a funding inserted PENDING chains after the
+            # postings that landed before it completed
+            .order_by(F('completed_at').asc(nulls_last=True), 'id')
+            .values_list(
+                'id', 'transaction_type', 'amount', 'balance_before', 'balance_after',
+                'status', 'shard', 'created_at',
+            )
+            .iterator()
+        )
+
+        still_pending = []
+        still_recent = []
+        recent_after = timezone.now() - window
+        for txn_id, txn_type, amount, before, after, status, shard, created_at in rows:
+            if created_at >= recent_after:
+                still_recent.append(txn_id)
+            late = txn_id <= last_id and txn_id not in pending_ids
+            if late and txn_id in recent_ids:
+                # Seen by the previous run
+                continue
+            checkpoint.last_transaction_id = max(checkpoint.last_transaction_id, txn_id)
+
+            if status not in WalletTransaction.APPLIED_STATUSES:
+                if status == 'PENDING':
+                    still_pending.append(txn_id)
+                continue
+
+            delta = _signed(txn_type, amount)
+            checkpoint.ledger_balance += delta
+
+            if before + delta != after:
+                report(
+                    'arithmetic',
+                    f"balance_before {before} {'+' if delta >= 0 else '-'} {amount} != "
+                    f"balance_after {after}",
+                    txn_id,
+                )
+
+            if txn_id in pending_ids or late or shard is not None:
+                # Completed or committed after later activity, or a slot
+                # balance: not part of the wallet-level chain
+                checkpoint.chain_balance += delta
+                continue
+
+            if before != checkpoint.chain_balance:
+                report(
+                    'chain_break',
+                    f"balance_before {before} != previous balance_after {checkpoint.chain_balance}",
+                    txn_id,
+                )
+            checkpoint.chain_balance = after
+
+        if balance != checkpoint.ledger_balance:
+            report(
+                'balance_mismatch',
+                f"wallet balance {balance} != ledger total {checkpoint.ledger_balance}",
+            )
+
+        checkpoint.pending_transaction_ids = sorted(still_pending)
+        checkpoint.recent_transaction_ids = sorted(still_recent)
+        checkpoint.wallet_version = wallet.version
+        checkpoint.is_balanced = balance == checkpoint.ledger_balance
+        checkpoint.save()
+
+    return discrepancies
+
+
+def reconcile_chunk(wallet_ids: List[int]):
+    """
+    Reconcile a batch of wallets (the unit of work for worker processes)
+
+    Returns:
+        (number of wallets, list of discrepancy dicts)
+    """
+    discrepancies = []
+    for wallet_id in wallet_ids:
+        discrepancies.extend(reconcile_wallet(wallet_id))
+    return len(wallet_ids), discrepancies
+
+
+def reconcile(workers: int = 1, full: bool = False, chunk_size: int = 500, on_chunk=None):
+    """
+    Reconcile every candidate wallet
+
+    Args:
+        workers: Worker processes (1 runs in this process)
+        full: Re-scan every wallet from its first transaction
+        chunk_size: Wallets per unit of work
+        on_chunk: Optional callback receiving the number of wallets done
+
+    Returns:
+        (wallets checked, list of discrepancy dicts)
+    """
+    if full:
+        WalletReconciliationCheckpoint.objects.all().delete()
+
+    wallet_ids = candidate_wallet_ids(full=full)
+    chunks = [wallet_ids[i:i + chunk_size] for i in range(0, len(wallet_ids), chunk_size)]
+    discrepancies = []
+    done = 0
+
+    if workers <= 1:
+        results = map(reconcile_chunk, chunks)
+        pool = None
+    else:
+        # Children must open their own connections, never reuse the parent's
+        connections.close_all()
+        pool = multiprocessing.get_context('fork').Pool(workers)
+        results = pool.imap_unordered(reconcile_chunk, chunks)
+
+    try:
+        for checked, found in results:
+            discrepancies.extend(found)
+            done += checked
+            if on_chunk:
+                on_chunk(done)
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
+
+    return len(wallet_ids), discrepancies
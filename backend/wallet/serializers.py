@@ -10,6 +10,9 @@ class WalletSerializer(serializers.ModelSerializer):
     """Serializer for Wallet model"""
     email = serializers.EmailField(source='user.email', read_only=True)
     username = serializers.CharField(source='user.username', read_only=True)
+    balance = serializers.DecimalField(
+        source='total_balance', max_digits=12, decimal_places=2, read_only=True
+    )
     
     class Meta:
         model = Wallet
@@ -25,8 +28,17 @@ class WalletSerializer(serializers.ModelSerializer):
 
 
 class WalletTransactionSerializer(serializers.ModelSerializer):
-    """Serializer for WalletTransaction model"""
-    user_email = serializers.EmailField(source='wallet.user.email', read_only=True)
+    """
+    Serializer for WalletTransaction model
+
+    user_email is read from a `user_email` annotation when the queryset
+    provides one (see WalletService.get_transaction_page), so listings do
+    not load each row's wallet and user.
+
+    balance_before/balance_after are null for credits to a sharded wallet:
+    those rows record one slot's running balance, not the wallet's.
+    """
+    user_email = serializers.SerializerMethodField()
     
     class Meta:
         model = WalletTransaction
@@ -55,6 +67,17 @@ class WalletTransactionSerializer(serializers.ModelSerializer):
             'updated_at'
         ]
 
+    def get_user_email(self, obj):
+        if hasattr(obj, 'user_email'):
+            return obj.user_email
+        return obj.wallet.user.email
+
+    def to_representation(self, instance):
+        data = super().to_representation(instance)
+        if 'balance_shard' in (instance.metadata or {}):
+            data['balance_before'] = data['balance_after'] = None
+        return data
+
 
 class WalletFundingRequestSerializer(serializers.Serializer):
     """Serializer for wallet funding requests"""
@@ -2,12 +2,27 @@
 Wallet Services
 Business logic for wallet operations (credit, debit, transactions)
 """
-from django.db import transaction, DatabaseError
+from django.conf import settings
+from django.db import connection, transaction, DatabaseError, IntegrityError
 from django.core.exceptions import ValidationError
+from django.db.models import Case, CharField, F, Q, Sum, Value, When
+from django.db.models.functions import TruncMonth
+from django.utils import timezone
 from decimal import Decimal
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Iterable, List, Tuple
+import random
 import uuid
-from .models import Wallet, WalletTransaction
+from authentication.models import User
+from . import balance_cache, summaries
+from .models import (
+    Wallet,
+    WalletBalanceShard,
+    WalletBalanceSnapshot,
+    WalletDailySummary,
+    WalletTransaction,
+)
+from .pagination import decode_cursor, encode_cursor
+from .snapshots import day_end, signed_amount
 
 
 class WalletService:
@@ -16,6 +31,16 @@ class WalletService:
     Handles all wallet credit and debit logic with proper transaction management
     """
 
+    @staticmethod
+    def to_amount(value) -> Decimal:
+        """
+        Convert a money amount to a Decimal with 2 decimal places
+
+        Rounds half-even, like DecimalField does when it saves the ledger
+        row, so the balance moves by exactly the recorded amount.
+        """
+        return Decimal(str(value)).quantize(Decimal('0.01'))
+
     @staticmethod
     def get_or_create_wallet(user) -> Wallet:
         """
@@ -43,6 +68,352 @@ class WalletService:
         """
         return f"{prefix}-{uuid.uuid4().hex[:12].upper()}"
 
+    @staticmethod
+    def _apply_balance_delta(user, transaction_type: str, amount: Decimal):
+        """
+        Move a wallet balance with one conditional UPDATE ... RETURNING
+
+        The statement takes the row lock itself, so no SELECT ... FOR UPDATE
+        is needed, and a debit only matches while balance >= amount.
+
+        Returns:
+            (balance_before, balance_after) or None if no row matched
+            (wallet missing or sharded, or insufficient balance for a debit)
+        """
+        qn = connection.ops.quote_name
+        opts = Wallet._meta
+        balance = qn(opts.get_field('balance').column)
+        version = qn(opts.get_field('version').column)
+        sql = (
+            f"UPDATE {qn(opts.db_table)} "
+            f"SET {balance} = {balance} + %s, {version} = {version} + 1, "
+            f"{qn(opts.get_field('updated_at').column)} = %s "
+            f"WHERE {qn(opts.pk.column)} = %s "
+            f"AND {qn(opts.get_field('balance_shards').column)} = 0"
+        )
+        delta = amount if transaction_type == 'CREDIT' else -amount
+        now = timezone.now()
+        params = [delta, connection.ops.adapt_datetimefield_value(now), user.pk]
+        if transaction_type == 'DEBIT':
+            sql += f" AND {balance} >= %s"
+            params.append(amount)
+        created = opts.get_field('created_at').get_col(opts.db_table)
+        sql += f" RETURNING {balance}, {version}, {qn(created.target.column)}"
+
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            row = cursor.fetchone()
+
+        if row is None:
+            return None
+        balance_after = Decimal(str(row[0])).quantize(Decimal('0.01'))
+        # Raw cursor values skip the backend converters (SQLite returns text)
+        created_at = row[2]
+        for converter in connection.ops.get_db_converters(created):
+            created_at = converter(created_at, created, connection)
+        # Includes created_at, so the entry is complete even when the cache
+        # had nothing for this wallet yet
+        balance_cache.publish(user.pk, row[1], balance_after, now, created_at)
+        return balance_after - delta, balance_after
+
+    @staticmethod
+    def _lock_wallets(*wallet_ids) -> Dict[int, Wallet]:
+        """
+        SELECT ... FOR UPDATE wallets in primary-key order
+
+        Sharded wallets also have their slots locked and folded into
+        Wallet.balance, so every returned balance is the full total.
+
+        Returns:
+            Dict of wallet pk → locked Wallet (missing wallets are absent)
+        """
+        wallets = {
+            wallet.pk: wallet
+            for wallet in Wallet.objects.select_for_update()
+            .filter(pk__in=wallet_ids)
+            .order_by('pk')
+        }
+
+        sharded = [pk for pk, wallet in wallets.items() if wallet.balance_shards]
+        if sharded:
+            for pk, folded in WalletService._fold_balance_shards(sharded).items():
+                wallets[pk].balance += folded
+                wallets[pk].version += 1
+
+        return wallets
+
+    @staticmethod
+    def _fold_balance_shards(wallet_ids) -> Dict[int, Decimal]:
+        """
+        Move shard slot balances into Wallet.balance (callers hold the
+        wallet row locks)
+
+        Returns:
+            Dict of wallet pk → amount folded (non-zero only)
+        """
+        folded = {}
+        shards = (
+            WalletBalanceShard.objects.select_for_update()
+            .filter(wallet_id__in=wallet_ids)
+            .order_by('wallet_id', 'slot')
+            .values_list('wallet_id', 'balance')
+        )
+        for wallet_id, balance in shards:
+            if balance:
+                folded[wallet_id] = folded.get(wallet_id, Decimal('0.00')) + balance
+
+        if folded:
+            now = timezone.now()
+            WalletBalanceShard.objects.filter(wallet_id__in=list(folded)).exclude(
+                balance=0
+            ).update(balance=Decimal('0.00'), updated_at=now)
+            Wallet.objects.filter(pk__in=list(folded)).update(
+                balance=Case(
+                    *[When(pk=pk, then=F('balance') + amount) for pk, amount in folded.items()]
+                ),
+                version=F('version') + 1,
+                updated_at=now,
+            )
+            for pk in folded:
+                balance_cache.invalidate(pk)
+
+        return folded
+
+    @staticmethod
+    def _publish_balances(wallets: Dict[int, Wallet], balances: Dict[int, Decimal], now):
+        """
+        Write new balances of locked wallets through to the balance cache on
+        commit (after an UPDATE that bumped each wallet's version by one)
+        """
+        for pk, balance in balances.items():
+            wallet = wallets[pk]
+            if wallet.balance_shards:
+                balance_cache.invalidate(pk)
+            else:
+                balance_cache.publish(pk, wallet.version + 1, balance, now, wallet.created_at)
+
+    @staticmethod
+    def _apply_sharded_delta(wallet: Wallet, transaction_type: str, amount: Decimal):
+        """
+        Move the balance of a sharded wallet
+
+        A credit adds to one random slot and only locks that slot; its
+        balance_before/balance_after are the slot's running balance (the
+        slot is recorded in the ledger metadata as `balance_shard`). A
+        debit locks the wallet and every slot, folds them and records the
+        wallet's full balance.
+
+        Returns:
+            ((balance_before, balance_after), slot or None)
+        """
+        if transaction_type == 'DEBIT':
+            locked = WalletService._lock_wallets(wallet.pk)[wallet.pk]
+            if locked.balance < amount:
+                raise ValidationError(
+                    f"Insufficient balance. Available: ₦{locked.balance}, Required: ₦{amount}"
+                )
+            Wallet.objects.filter(pk=wallet.pk).update(
+                balance=F('balance') - amount,
+                version=F('version') + 1,
+                updated_at=timezone.now(),
+            )
+            balance_cache.invalidate(wallet.pk)
+            return (locked.balance, locked.balance - amount), None
+
+        qn = connection.ops.quote_name
+        opts = WalletBalanceShard._meta
+        balance = qn(opts.get_field('balance').column)
+        sql = (
+            f"UPDATE {qn(opts.db_table)} "
+            f"SET {balance} = {balance} + %s, {qn(opts.get_field('updated_at').column)} = %s "
+            f"WHERE {qn(opts.get_field('wallet').column)} = %s "
+            f"AND {qn(opts.get_field('slot').column)} = %s "
+            f"RETURNING {balance}"
+        )
+
+        for _ in range(3):
+            slot = random.randrange(wallet.balance_shards)
+            with connection.cursor() as cursor:
+                cursor.execute(sql, [
+                    amount,
+                    connection.ops.adapt_datetimefield_value(timezone.now()),
+                    wallet.pk,
+                    slot,
+                ])
+                row = cursor.fetchone()
+
+            if row is not None:
+                balance_after = Decimal(str(row[0])).quantize(Decimal('0.01'))
+                return (balance_after - amount, balance_after), slot
+
+            # The slot is missing: just enabled, or removed by a resize
+            wallet.refresh_from_db(fields=['balance_shards'])
+            if not wallet.balance_shards:
+                break
+            if slot < wallet.balance_shards:
+                WalletBalanceShard.objects.get_or_create(wallet=wallet, slot=slot)
+
+        balances = WalletService._apply_balance_delta(wallet.user, transaction_type, amount)
+        if balances is None:
+            raise ValidationError("Wallet balance slots are being resized, please retry")
+        return balances, None
+
+    @staticmethod
+    @transaction.atomic
+    def set_balance_shards(user, shards: int) -> Wallet:
+        """
+        Switch a wallet to sharded balances (shards > 0) or back (0)
+
+        Pending slot balances are folded into the wallet first, so the
+        total never changes.
+
+        Args:
+            user: User object
+            shards: Number of sub-balance slots
+
+        Returns:
+            Updated Wallet object
+        """
+        if shards < 0:
+            raise ValidationError("Number of balance shards cannot be negative")
+
+        Wallet.objects.get_or_create(user=user)
+        wallet = WalletService._lock_wallets(user.pk)[user.pk]
+
+        # Deleting slots makes in-flight credits on them retry elsewhere
+        WalletBalanceShard.objects.filter(wallet=wallet, slot__gte=shards).delete()
+        WalletBalanceShard.objects.bulk_create(
+            [WalletBalanceShard(wallet=wallet, slot=slot) for slot in range(shards)],
+            ignore_conflicts=True,
+        )
+
+        wallet.balance_shards = shards
+        wallet.save(update_fields=['balance_shards', 'updated_at'])
+        return wallet
+
+    @staticmethod
+    @transaction.atomic
+    def compact_balance_shards(user) -> Decimal:
+        """
+        Fold a sharded wallet's slot balances into Wallet.balance
+
+        Returns:
+            Amount moved out of the slots
+        """
+        wallet = Wallet.objects.select_for_update().filter(pk=user.pk).first()
+        if wallet is None or not wallet.balance_shards:
+            return Decimal('0.00')
+        return WalletService._fold_balance_shards([wallet.pk]).get(wallet.pk, Decimal('0.00'))
+
+    @staticmethod
+    def _post_transaction(
+        user,
+        transaction_type: str,
+        amount: Decimal,
+        source: str,
+        description: str,
+        reference: str,
+        metadata: Optional[Dict[str, Any]],
+    ) -> WalletTransaction:
+        """
+        Apply a balance change and write its ledger row (2 statements)
+
+        Duplicate references are caught by the unique constraint on
+        WalletTransaction.reference instead of a pre-check; the caller's
+        atomic block rolls the balance change back.
+        """
+        if not settings.WALLET_ATOMIC_BALANCE_UPDATES:
+            return WalletService._post_transaction_locked(
+                user, transaction_type, amount, source, description, reference, metadata
+            )
+
+        balances = WalletService._apply_balance_delta(user, transaction_type, amount)
+
+        if balances is None:
+            # Wallet missing or sharded, or a debit larger than the balance
+            wallet, _ = Wallet.objects.get_or_create(user=user)
+            if wallet.balance_shards:
+                balances, slot = WalletService._apply_sharded_delta(
+                    wallet, transaction_type, amount
+                )
+                if slot is not None:
+                    metadata = {**(metadata or {}), "balance_shard": slot}
+            else:
+                if transaction_type == 'DEBIT' and wallet.balance < amount:
+                    raise ValidationError(
+                        f"Insufficient balance. Available: ₦{wallet.balance}, Required: ₦{amount}"
+                    )
+                balances = WalletService._apply_balance_delta(user, transaction_type, amount)
+                if balances is None:
+                    raise ValidationError(f"Insufficient balance. Required: ₦{amount}")
+
+        balance_before, balance_after = balances
+
+        try:
+            return WalletTransaction.objects.create(
+                wallet_id=user.pk,
+                transaction_type=transaction_type,
+                amount=amount,
+                balance_before=balance_before,
+                balance_after=balance_after,
+                status='COMPLETED',
+                source=source,
+                reference=reference,
+                description=description,
+                metadata=metadata or {}
+            )
+        except IntegrityError:
+            raise ValidationError(f"Transaction reference {reference} already exists")
+
+    @staticmethod
+    def _post_transaction_locked(
+        user,
+        transaction_type: str,
+        amount: Decimal,
+        source: str,
+        description: str,
+        reference: str,
+        metadata: Optional[Dict[str, Any]],
+    ) -> WalletTransaction:
+        """
+        Previous implementation (lock, pre-check, INSERT, UPDATE), kept behind
+        WALLET_ATOMIC_BALANCE_UPDATES=False for rollback and benchmarking
+        """
+        wallet, _ = Wallet.objects.get_or_create(user=user)
+        wallet = WalletService._lock_wallets(wallet.pk)[wallet.pk]
+
+        if transaction_type == 'DEBIT' and wallet.balance < amount:
+            raise ValidationError(
+                f"Insufficient balance. Available: ₦{wallet.balance}, Required: ₦{amount}"
+            )
+
+        if WalletTransaction.objects.filter(reference=reference).exists():
+            raise ValidationError(f"Transaction reference {reference} already exists")
+
+        balance_before = wallet.balance
+        if transaction_type == 'CREDIT':
+            balance_after = balance_before + amount
+        else:
+            balance_after = balance_before - amount
+
+        wallet_transaction = WalletTransaction.objects.create(
+            wallet=wallet,
+            transaction_type=transaction_type,
+            amount=amount,
+            balance_before=balance_before,
+            balance_after=balance_after,
+            status='COMPLETED',
+            source=source,
+            reference=reference,
+            description=description,
+            metadata=metadata or {}
+        )
+
+        wallet.balance = balance_after
+        wallet.save(update_fields=['balance', 'updated_at'])
+
+        return wallet_transaction
+
     @staticmethod
     @transaction.atomic
     def credit_wallet(
@@ -72,46 +443,25 @@ class WalletService:
             DatabaseError: If database operation fails
         """
         try:
-            amount = Decimal(str(amount))
+            amount = WalletService.to_amount(amount)
 
             if amount <= 0:
                 raise ValidationError("Credit amount must be positive")
 
-            # Get or create wallet with row-level lock
-            # FIX: Use get_or_create first, then lock
-            wallet, _ = Wallet.objects.get_or_create(user=user)
-            wallet = Wallet.objects.select_for_update().get(pk=wallet.pk)
-
             # Generate reference if not provided
             if not reference:
                 reference = WalletService.generate_transaction_reference('CREDIT')
 
-            # Check if reference already exists
-            if WalletTransaction.objects.filter(reference=reference).exists():
-                raise ValidationError(f"Transaction reference {reference} already exists")
-
-            # Record balance before transaction
-            balance_before = wallet.balance
-            balance_after = balance_before + amount
-
-            # Create transaction record
-            wallet_transaction = WalletTransaction.objects.create(
-                wallet=wallet,
-                transaction_type='CREDIT',
-                amount=amount,
-                balance_before=balance_before,
-                balance_after=balance_after,
-                status='COMPLETED',
+            wallet_transaction = WalletService._post_transaction(
+                user,
+                'CREDIT',
+                amount,
                 source=source,
-                reference=reference,
                 description=description or f"Wallet credited with ₦{amount}",
-                metadata=metadata or {}
+                reference=reference,
+                metadata=metadata,
             )
-
-            # Update wallet balance
-            wallet.balance = balance_after
-            wallet.save(update_fields=['balance', 'updated_at'])
-
+            summaries.record([wallet_transaction])
             return wallet_transaction
 
         except DatabaseError as e:
@@ -148,52 +498,25 @@ class WalletService:
             DatabaseError: If database operation fails
         """
         try:
-            amount = Decimal(str(amount))
+            amount = WalletService.to_amount(amount)
 
             if amount <= 0:
                 raise ValidationError("Debit amount must be positive")
 
-            # Get or create wallet with row-level lock
-            # FIX: Use get_or_create first, then lock
-            wallet, _ = Wallet.objects.get_or_create(user=user)
-            wallet = Wallet.objects.select_for_update().get(pk=wallet.pk)
-
-            # Check sufficient balance
-            if wallet.balance < amount:
-                raise ValidationError(
-                    f"Insufficient balance. Available: ₦{wallet.balance}, Required: ₦{amount}"
-                )
-
             # Generate reference if not provided
             if not reference:
                 reference = WalletService.generate_transaction_reference('DEBIT')
 
-            # Check if reference already exists
-            if WalletTransaction.objects.filter(reference=reference).exists():
-                raise ValidationError(f"Transaction reference {reference} already exists")
-
-            # Record balance before transaction
-            balance_before = wallet.balance
-            balance_after = balance_before - amount
-
-            # Create transaction record
-            wallet_transaction = WalletTransaction.objects.create(
-                wallet=wallet,
-                transaction_type='DEBIT',
-                amount=amount,
-                balance_before=balance_before,
-                balance_after=balance_after,
-                status='COMPLETED',
+            wallet_transaction = WalletService._post_transaction(
+                user,
+                'DEBIT',
+                amount,
                 source=source,
-                reference=reference,
                 description=description or f"Wallet debited with ₦{amount}",
-                metadata=metadata or {}
+                reference=reference,
+                metadata=metadata,
             )
-
-            # Update wallet balance
-            wallet.balance = balance_after
-            wallet.save(update_fields=['balance', 'updated_at'])
-
+            summaries.record([wallet_transaction])
             return wallet_transaction
 
         except DatabaseError as e:
@@ -201,6 +524,360 @@ class WalletService:
         except Exception as e:
             raise ValidationError(f"Error during debit operation: {str(e)}")
 
+    @staticmethod
+    @transaction.atomic
+    def complete_funding(
+        pending_txn: WalletTransaction, metadata: Optional[Dict[str, Any]] = None
+    ) -> WalletTransaction:
+        """
+        Credit a gateway-verified funding and mark its ledger row COMPLETED
+
+        The ledger row and the wallet are both locked, so a funding verified
+        by two requests at once is credited exactly once.
+
+        Args:
+            pending_txn: PENDING funding WalletTransaction
+            metadata: Verification details merged into the row's metadata
+
+        Returns:
+            The WalletTransaction, unchanged if it was no longer PENDING
+        """
+        txn = WalletTransaction.objects.select_for_update().get(pk=pending_txn.pk)
+        if txn.status != 'PENDING':
+            return txn
+
+        wallets = WalletService._lock_wallets(txn.wallet_id)
+        wallet = wallets[txn.wallet_id]
+        now = timezone.now()
+        Wallet.objects.filter(pk=wallet.pk).update(
+            balance=F('balance') + txn.amount,
+            version=F('version') + 1,
+            updated_at=now,
+        )
+
+        txn.balance_before = wallet.balance
+        txn.balance_after = wallet.balance + txn.amount
+        txn.status = 'COMPLETED'
+        txn.metadata = {**(txn.metadata or {}), **(metadata or {})}
+        txn.save(update_fields=['status', 'balance_before', 'balance_after', 'metadata', 'updated_at'])
+
+        WalletService._publish_balances(wallets, {wallet.pk: txn.balance_after}, now)
+        summaries.record([txn])
+        return txn
+
+    @staticmethod
+    @transaction.atomic
+    def fail_funding(
+        pending_txn: WalletTransaction, metadata: Optional[Dict[str, Any]] = None
+    ) -> WalletTransaction:
+        """
+        Mark a funding the gateway rejected as FAILED (if still PENDING)
+
+        Returns:
+            The WalletTransaction, unchanged if it was no longer PENDING
+        """
+        txn = WalletTransaction.objects.select_for_update().get(pk=pending_txn.pk)
+        if txn.status != 'PENDING':
+            return txn
+
+        txn.status = 'FAILED'
+        txn.metadata = {**(txn.metadata or {}), **(metadata or {})}
+        txn.save(update_fields=['status', 'metadata', 'updated_at'])
+        return txn
+
+    @staticmethod
+    @transaction.atomic
+    def transfer(
+        sender,
+        recipient,
+        amount: Decimal,
+        note: str = "",
+        metadata: Optional[Dict[str, Any]] = None,
+    ) -> Tuple[WalletTransaction, WalletTransaction]:
+        """
+        Move funds between two users' wallets
+
+        Both wallets are locked by a single SELECT ... FOR UPDATE ordered by
+        primary key, so opposite transfers (A→B, B→A) always take the locks
+        in the same order and cannot deadlock (sharded wallets are folded
+        first). Both ledger rows go in with one bulk INSERT and both
+        balances with one UPDATE.
+
+        Args:
+            sender: User sending funds
+            recipient: User receiving funds
+            amount: Decimal amount to transfer
+            note: Optional description shown on both ledger rows
+            metadata: Additional data stored on both ledger rows
+
+        Returns:
+            (sender DEBIT transaction, recipient CREDIT transaction)
+
+        Raises:
+            ValidationError: If validation fails or insufficient balance
+            Wallet.DoesNotExist: If either user has no wallet
+            DatabaseError: If database operation fails
+        """
+        amount = WalletService.to_amount(amount)
+
+        if amount <= 0:
+            raise ValidationError("Transfer amount must be positive")
+
+        if sender.pk == recipient.pk:
+            raise ValidationError("Cannot transfer to yourself")
+
+        try:
+            wallets = WalletService._lock_wallets(sender.pk, recipient.pk)
+
+            if sender.pk not in wallets:
+                raise Wallet.DoesNotExist("Wallet not found")
+            if recipient.pk not in wallets:
+                raise Wallet.DoesNotExist("User does not have an active wallet")
+
+            sender_balance = wallets[sender.pk].balance
+            recipient_balance = wallets[recipient.pk].balance
+
+            if sender_balance < amount:
+                raise ValidationError(
+                    f"Insufficient balance. Available: ₦{sender_balance}, Required: ₦{amount}"
+                )
+
+            sender_reference = WalletService.generate_transaction_reference('TXF-SENT')
+            recipient_reference = WalletService.generate_transaction_reference('TXF-RECV')
+
+            now = timezone.now()
+            debit, credit = WalletTransaction.objects.bulk_create([
+                WalletTransaction(
+                    wallet_id=sender.pk,
+                    transaction_type='DEBIT',
+                    amount=amount,
+                    balance_before=sender_balance,
+                    balance_after=sender_balance - amount,
+                    status='COMPLETED',
+                    completed_at=now,
+                    source='WALLET_TRANSFER',
+                    reference=sender_reference,
+                    description=note or f"Transfer to @{recipient.username}",
+                    metadata={
+                        **(metadata or {}),
+                        "recipient_username": recipient.username,
+                        "recipient_email": recipient.email,
+                        "transfer_type": "SENT",
+                        "paired_reference": recipient_reference,
+                    },
+                ),
+                WalletTransaction(
+                    wallet_id=recipient.pk,
+                    transaction_type='CREDIT',
+                    amount=amount,
+                    balance_before=recipient_balance,
+                    balance_after=recipient_balance + amount,
+                    status='COMPLETED',
+                    completed_at=now,
+                    source='WALLET_TRANSFER',
+                    reference=recipient_reference,
+                    description=note or f"Transfer from @{sender.username}",
+                    metadata={
+                        **(metadata or {}),
+                        "sender_username": sender.username,
+                        "sender_email": sender.email,
+                        "transfer_type": "RECEIVED",
+                        "paired_reference": sender_reference,
+                    },
+                ),
+            ])
+
+            Wallet.objects.filter(pk__in=[sender.pk, recipient.pk]).update(
+                balance=Case(
+                    When(pk=sender.pk, then=F('balance') - amount),
+                    When(pk=recipient.pk, then=F('balance') + amount),
+                ),
+                version=F('version') + 1,
+                updated_at=now,
+            )
+            WalletService._publish_balances(
+                wallets,
+                {sender.pk: debit.balance_after, recipient.pk: credit.balance_after},
+                now,
+            )
+            summaries.record([debit, credit])
+
+            return debit, credit
+
+        except DatabaseError as e:
+            raise DatabaseError(f"Database error during transfer: {str(e)}")
+
+    @staticmethod
+    def bulk_credit(
+        entries: Iterable[Dict[str, Any]],
+        source: str = "ADMIN_ADJUSTMENT",
+        chunk_size: int = 1000,
+    ) -> List[Dict[str, Any]]:
+        """
+        Credit many wallets at once (cashback, referral payouts, ...)
+
+        Each chunk is one transaction: the affected wallets are locked in
+        primary-key order, all ledger rows go in with one bulk INSERT and
+        the balances move with one CASE UPDATE. Entries whose reference
+        already exists are skipped, so a payout file with references can be
+        re-run safely after an interruption.
+
+        Args:
+            entries: Iterable of dicts with user_id or email, amount and
+                optional reference, description, metadata
+            source: Transaction source for every row
+            chunk_size: Entries per transaction
+
+        Returns:
+            One result dict per entry, in input order: the entry's user_id
+            or email, reference, status (credited, duplicate, invalid,
+            not_found or failed), balance_after or error
+        """
+        results = []
+        chunk = []
+
+        for entry in entries:
+            chunk.append(entry)
+            if len(chunk) >= chunk_size:
+                results.extend(WalletService._bulk_credit_chunk(chunk, source))
+                chunk = []
+
+        if chunk:
+            results.extend(WalletService._bulk_credit_chunk(chunk, source))
+
+        return results
+
+    @staticmethod
+    def _bulk_credit_chunk(entries: List[Dict[str, Any]], source: str) -> List[Dict[str, Any]]:
+        results = []
+        valid = []
+        references = set()
+
+        for entry in entries:
+            if not isinstance(entry, dict):
+                results.append({
+                    "user_id": None,
+                    "email": None,
+                    "reference": None,
+                    "status": "invalid",
+                    "error": "Entry must be an object",
+                })
+                continue
+            result = {
+                "user_id": entry.get("user_id"),
+                "email": entry.get("email"),
+                "reference": entry.get("reference")
+                or WalletService.generate_transaction_reference("BULK"),
+            }
+            results.append(result)
+            # NDJSON values can be any JSON type
+            if not isinstance(result["email"], (str, type(None))):
+                result.update(status="invalid", error="email must be a string")
+                continue
+            user_id = result["user_id"]
+            if isinstance(user_id, str) and user_id.strip().isdecimal():
+                result["user_id"] = int(user_id)
+            elif user_id is not None and (isinstance(user_id, bool) or not isinstance(user_id, int)):
+                result.update(status="invalid", error="user_id must be an integer")
+                continue
+            if not isinstance(result["reference"], str):
+                result.update(status="invalid", error="reference must be a string")
+                continue
+            try:
+                amount = WalletService.to_amount(entry.get("amount"))
+                if not amount.is_finite() or amount <= 0:
+                    raise ValueError
+            except (ArithmeticError, ValueError):
+                result.update(status="invalid", error="Amount must be a positive number")
+                continue
+            if not result["user_id"] and not result["email"]:
+                result.update(status="invalid", error="user_id or email is required")
+                continue
+            if result["reference"] in references:
+                result.update(status="duplicate", error="Reference repeated in this batch")
+                continue
+            references.add(result["reference"])
+            valid.append((result, entry, amount))
+
+        if not valid:
+            return results
+
+        emails = {result["email"].strip() for result, _, _ in valid if not result["user_id"]}
+        user_ids = {}
+        if emails:
+            user_ids = dict(
+                User.objects.filter(email__in=emails).values_list("email", "id")
+            )
+
+        try:
+            with transaction.atomic():
+                existing = set(
+                    WalletTransaction.objects.filter(reference__in=references).values_list(
+                        "reference", flat=True
+                    )
+                )
+                wallet_ids = set()
+                for result, _, _ in valid:
+                    if not result["user_id"]:
+                        result["user_id"] = user_ids.get(result["email"].strip())
+                    if result["user_id"] is not None:
+                        wallet_ids.add(result["user_id"])
+
+                wallets = WalletService._lock_wallets(*wallet_ids)
+                balances = {pk: wallet.balance for pk, wallet in wallets.items()}
+                deltas = {}
+                rows = []
+
+                for result, entry, amount in valid:
+                    if result["reference"] in existing:
+                        result.update(status="duplicate", error="Reference already exists")
+                        continue
+                    if result["user_id"] not in balances:
+                        result.update(status="not_found", error="User or wallet not found")
+                        continue
+
+                    wallet_id = result["user_id"]
+                    balance_before = balances[wallet_id]
+                    balances[wallet_id] = balance_before + amount
+                    deltas[wallet_id] = deltas.get(wallet_id, Decimal("0.00")) + amount
+                    rows.append(WalletTransaction(
+                        wallet_id=wallet_id,
+                        transaction_type='CREDIT',
+                        amount=amount,
+                        balance_before=balance_before,
+                        balance_after=balances[wallet_id],
+                        status='COMPLETED',
+                        completed_at=timezone.now(),
+                        source=source,
+                        reference=result["reference"],
+                        description=entry.get("description") or f"Wallet credited with ₦{amount}",
+                        metadata=entry.get("metadata") or {},
+                    ))
+                    result.update(status="credited", balance_after=balances[wallet_id])
+
+                if rows:
+                    now = timezone.now()
+                    WalletTransaction.objects.bulk_create(rows)
+                    Wallet.objects.filter(pk__in=list(deltas)).update(
+                        balance=Case(
+                            *[When(pk=pk, then=F('balance') + delta) for pk, delta in deltas.items()]
+                        ),
+                        version=F('version') + 1,
+                        updated_at=now,
+                    )
+                    WalletService._publish_balances(
+                        wallets, {pk: balances[pk] for pk in deltas}, now
+                    )
+                    summaries.record(rows)
+
+        except DatabaseError as e:
+            for result, _, _ in valid:
+                if result.get("status") in (None, "credited"):
+                    result.pop("balance_after", None)
+                    result.update(status="failed", error=f"Database error: {str(e)}")
+
+        return results
+
     @staticmethod
     def get_wallet_balance(user) -> Decimal:
         """
@@ -212,13 +889,110 @@ class WalletService:
         Returns:
             Decimal balance amount
         """
-        try:
-            wallet = Wallet.objects.get(user=user)
-            return wallet.balance
-        except Wallet.DoesNotExist:
-            # Auto-create wallet if it doesn't exist
-            wallet = WalletService.get_or_create_wallet(user)
-            return wallet.balance
+        return WalletService.get_cached_wallet(user).total_balance
+
+    @staticmethod
+    def get_cached_wallet(user) -> Wallet:
+        """
+        Get a user's wallet for display, from the balance cache when possible
+
+        A cache hit returns an unsaved Wallet built from the cached entry
+        (balance, created_at, updated_at); never save or lock it. A miss
+        loads (or creates) the wallet and caches it.
+
+        Args:
+            user: User object
+
+        Returns:
+            Wallet object
+        """
+        entry = balance_cache.get(user.pk)
+        if entry is not None and entry["created_at"] is not None:
+            return Wallet(
+                user=user,
+                balance=entry["balance"],
+                created_at=entry["created_at"],
+                updated_at=entry["updated_at"],
+            )
+
+        wallet = WalletService.get_or_create_wallet(user)
+        balance_cache.populate(wallet)
+        return wallet
+
+    @staticmethod
+    def get_balance_at(user, at) -> Decimal:
+        """
+        Get a user's wallet balance as it was at a point in time
+
+        Starts from the latest daily WalletBalanceSnapshot before the day of
+        `at` and adds the applied transactions completed after it, so only
+        the transactions since that snapshot are read.
+
+        Args:
+            user: User object
+            at: Aware datetime; transactions completed at or before it count
+
+        Returns:
+            Decimal balance amount (0 before the wallet's first transaction)
+        """
+        snapshot = (
+            WalletBalanceSnapshot.objects.filter(
+                wallet_id=user.pk, snapshot_date__lt=timezone.localdate(at)
+            )
+            .order_by('-snapshot_date')
+            .values_list('snapshot_date', 'balance')
+            .first()
+        )
+
+        transactions = WalletTransaction.objects.filter(
+            wallet_id=user.pk,
+            status__in=WalletTransaction.APPLIED_STATUSES,
+            completed_at__lte=at,
+        )
+        opening = Decimal('0.00')
+        if snapshot is not None:
+            snapshot_date, opening = snapshot
+            transactions = transactions.filter(completed_at__gte=day_end(snapshot_date))
+
+        net = transactions.aggregate(net=Sum(signed_amount()))['net']
+        return opening + (net or Decimal('0.00'))
+
+    @staticmethod
+    def get_transaction_summary(user, granularity: str = 'month', start=None, end=None) -> List[Dict[str, Any]]:
+        """
+        Get a user's inflow/outflow per source per day or month
+
+        Read entirely from WalletDailySummary (a few rows per active day),
+        never from the transaction table.
+
+        Args:
+            user: User object
+            granularity: 'day' or 'month'
+            start: Optional first date (inclusive)
+            end: Optional last date (inclusive)
+
+        Returns:
+            List of dicts (period, source, inflow, outflow, credit_count,
+            debit_count), oldest period first
+        """
+        rows = WalletDailySummary.objects.filter(wallet_id=user.pk)
+        if start is not None:
+            rows = rows.filter(summary_date__gte=start)
+        if end is not None:
+            rows = rows.filter(summary_date__lte=end)
+
+        period = TruncMonth('summary_date') if granularity == 'month' else F('summary_date')
+        return list(
+            rows.annotate(period=period)
+            .values('period', 'source')
+            .annotate(
+                inflow=Sum('inflow'),
+                outflow=Sum('outflow'),
+                credit_count=Sum('credit_count'),
+                debit_count=Sum('debit_count'),
+            )
+            .order_by('period', 'source')
+        )
 
     @staticmethod
     def get_transaction_history(user, limit: Optional[int] = None):
@@ -244,6 +1018,65 @@ class WalletService:
             # Return empty queryset if wallet doesn't exist
             return WalletTransaction.objects.none()
 
+    @staticmethod
+    def get_transaction_page(
+        user,
+        cursor: Optional[str] = None,
+        page_size: int = 50,
+    ) -> Tuple[List[WalletTransaction], Optional[str]]:
+        """
+        Get one page of transaction history, newest first
+
+        Args:
+            user: User object
+            cursor: Cursor returned with the previous page (None for the first)
+            page_size: Number of transactions per page
+
+        Returns:
+            (transactions, next_cursor); next_cursor is None on the last page
+
+        Raises:
+            InvalidCursor: If the cursor is malformed
+        """
+        # Own-wallet listing: the email is known, so no join to users
+        transactions = WalletTransaction.objects.filter(wallet_id=user.pk).annotate(
+            user_email=Value(user.email, output_field=CharField())
+        )
+
+        if cursor:
+            created_at, pk = decode_cursor(cursor)
+            # The redundant created_at <= bound lets the (wallet, -created_at,
+            # -id) index range start at the cursor instead of the newest row
+            transactions = transactions.filter(
+                Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=pk),
+                created_at__lte=created_at,
+            )
+
+        page = list(transactions.order_by('-created_at', '-id')[:page_size + 1])
+
+        if len(page) > page_size:
+            page = page[:page_size]
+            return page, encode_cursor(page[-1])
+        return page, None
+
+    @staticmethod
+    def count_transactions(user, cap: Optional[int] = None) -> Tuple[int, bool]:
+        """
+        Count a user's transactions, optionally stopping at `cap`
+
+        Returns:
+            (count, exact); exact is False when the count reached the cap
+        """
+        transactions = WalletTransaction.objects.filter(wallet_id=user.pk)
+
+        if cap is None:
+            return transactions.count(), True
+
+        count = transactions[:cap + 1].count()
+        if count > cap:
+            return cap, False
+        return count, True
+
     @staticmethod
     def get_transaction_by_reference(reference: str) -> Optional[WalletTransaction]:
         """
@@ -256,7 +1089,9 @@ class WalletService:
             WalletTransaction object or None
         """
         try:
-            return WalletTransaction.objects.get(reference=reference)
+            return WalletTransaction.objects.select_related('wallet__user').get(
+                reference=reference
+            )
         except WalletTransaction.DoesNotExist:
             return None
 
@@ -293,17 +1128,17 @@ class WalletService:
                 raise ValidationError("Transaction already reversed")
 
             # Check if a reversal already exists for this transaction
-            if WalletTransaction.objects.filter(
-                source="REVERSAL", metadata__original_reference=transaction_reference
-            ).exists():
+            # (unique index on reversal_of)
+            if WalletTransaction.objects.filter(reversal_of=original_txn).exists():
                 raise ValidationError("A reversal already exists for this transaction")
 
-            wallet = Wallet.objects.select_for_update().get(pk=original_txn.wallet_id)
+            wallet = WalletService._lock_wallets(original_txn.wallet_id).get(original_txn.wallet_id)
+            if wallet is None:
+                raise Wallet.DoesNotExist
 
             # Determine reversal operation (opposite of original)
             if original_txn.transaction_type == 'CREDIT':
                 # Original was credit, so reverse is debit
-                reversal_type = 'DEBIT'
                 new_balance = wallet.balance - original_txn.amount
 
                 if new_balance < 0:
@@ -314,42 +1149,20 @@ class WalletService:
 
             else:
                 # Original was debit, so reverse is credit
-                reversal_type = 'CREDIT'
                 new_balance = wallet.balance + original_txn.amount
 
-            balance_before = wallet.balance
-
             # Create reversal transaction
-            reversal_txn = WalletTransaction.objects.create(
-                wallet=wallet,
-                transaction_type=reversal_type,
-                amount=original_txn.amount,
-                balance_before=balance_before,
-                balance_after=new_balance,
-                status="COMPLETED",
-                source="REVERSAL",
-                reference=WalletService.generate_transaction_reference("REV"),
-                description=f"Reversal of {transaction_reference}. Reason: {reason or 'No reason provided'}",
-                metadata={
-                    "original_reference": transaction_reference,
-                    "original_transaction_id": str(original_txn.id),
-                    "reversal_reason": reason,
-                    "original_amount": str(original_txn.amount),
-                    "original_type": original_txn.transaction_type,
-                },
-            )
+            reversal_txn = WalletService._reversal_row(original_txn, wallet.balance, reason)
+            reversal_txn.save(force_insert=True)
 
-            # Update original transaction status and add reversal reference
+            # Update original transaction status (reversal_txn links back to it)
             original_txn.status = 'REVERSED'
-            if not original_txn.metadata:
-                original_txn.metadata = {}
-            original_txn.metadata["reversed_by"] = reversal_txn.reference
-            original_txn.metadata["reversed_at"] = str(reversal_txn.created_at)
-            original_txn.save(update_fields=["status", "metadata", "updated_at"])
+            original_txn.save(update_fields=["status", "updated_at"])
 
             # Update wallet balance
             wallet.balance = new_balance
             wallet.save(update_fields=['balance', 'updated_at'])
+            summaries.record([reversal_txn])
 
             return reversal_txn
 
@@ -359,3 +1172,184 @@ class WalletService:
             raise ValidationError("Wallet not found")
         except DatabaseError as e:
             raise DatabaseError(f"Database error during reversal: {str(e)}")
+
+    @staticmethod
+    def _reversal_row(original_txn: WalletTransaction, balance_before: Decimal, reason: str) -> WalletTransaction:
+        """Unsaved REVERSAL row undoing original_txn, posted on top of balance_before"""
+        reversal_type = 'DEBIT' if original_txn.transaction_type == 'CREDIT' else 'CREDIT'
+        if reversal_type == 'DEBIT':
+            balance_after = balance_before - original_txn.amount
+        else:
+            balance_after = balance_before + original_txn.amount
+
+        return WalletTransaction(
+            wallet_id=original_txn.wallet_id,
+            reversal_of=original_txn,
+            transaction_type=reversal_type,
+            amount=original_txn.amount,
+            balance_before=balance_before,
+            balance_after=balance_after,
+            status="COMPLETED",
+            completed_at=timezone.now(),
+            source="REVERSAL",
+            reference=WalletService.generate_transaction_reference("REV"),
+            description=f"Reversal of {original_txn.reference}. Reason: {reason or 'No reason provided'}",
+            metadata={
+                "original_reference": original_txn.reference,
+                "original_transaction_id": str(original_txn.id),
+                "reversal_reason": reason,
+                "original_amount": str(original_txn.amount),
+                "original_type": original_txn.transaction_type,
+            },
+        )
+
+    @staticmethod
+    def bulk_reverse(
+        references: Iterable[str],
+        reason: str = "",
+        dry_run: bool = False,
+        chunk_size: int = 500,
+    ) -> List[Dict[str, Any]]:
+        """
+        Reverse many transactions at once (e.g. a gateway double-post)
+
+        Each chunk is one transaction: the originals and their wallets are
+        locked once each (in primary-key order, originals first like
+        reverse_transaction), all reversal rows go in with one bulk INSERT,
+        the originals flip to REVERSED with one UPDATE and the balances
+        move with one CASE UPDATE.
+
+        A dry run does exactly the same work and then rolls each chunk
+        back, so its report (including insufficient-balance outcomes) is
+        what a real run would do at that moment.
+
+        Args:
+            references: Transaction references to reverse
+            reason: Reversal reason recorded on every reversal
+            dry_run: Report only; nothing is written
+            chunk_size: References per transaction
+
+        Returns:
+            One result dict per reference, in input order: reference,
+            wallet_id, amount, status (reversed, duplicate, not_found,
+            not_reversible, already_reversed, insufficient_balance or
+            failed), reversal_reference, balance_after or error
+        """
+        results = []
+        chunk = []
+
+        for reference in references:
+            chunk.append(reference.strip())
+            if len(chunk) >= chunk_size:
+                results.extend(WalletService._bulk_reverse_chunk(chunk, reason, dry_run))
+                chunk = []
+
+        if chunk:
+            results.extend(WalletService._bulk_reverse_chunk(chunk, reason, dry_run))
+
+        return results
+
+    @staticmethod
+    def _bulk_reverse_chunk(references: List[str], reason: str, dry_run: bool) -> List[Dict[str, Any]]:
+        results = []
+        pending = []
+        seen = set()
+
+        for reference in references:
+            result = {"reference": reference}
+            results.append(result)
+            if reference in seen:
+                result.update(status="duplicate", error="Reference repeated in this batch")
+                continue
+            seen.add(reference)
+            pending.append(result)
+
+        try:
+            with transaction.atomic():
+                originals = {
+                    txn.reference: txn
+                    for txn in WalletTransaction.objects.select_for_update()
+                    .filter(reference__in=seen)
+                    .order_by('pk')
+                }
+                already = set(
+                    WalletTransaction.objects.filter(
+                        reversal_of__in=[txn.pk for txn in originals.values()]
+                    ).values_list('reversal_of_id', flat=True)
+                )
+                wallets = WalletService._lock_wallets(
+                    *{txn.wallet_id for txn in originals.values()}
+                )
+                balances = {pk: wallet.balance for pk, wallet in wallets.items()}
+                rows = []
+
+                for result in pending:
+                    original = originals.get(result["reference"])
+                    if original is None:
+                        result.update(status="not_found", error="Transaction not found")
+                        continue
+                    result.update(wallet_id=original.wallet_id, amount=original.amount)
+                    if original.status == 'REVERSED' or original.pk in already:
+                        result.update(status="already_reversed", error="Transaction already reversed")
+                        continue
+                    if original.status != 'COMPLETED':
+                        result.update(
+                            status="not_reversible",
+                            error="Only completed transactions can be reversed",
+                        )
+                        continue
+                    if original.wallet_id not in balances:
+                        result.update(status="not_found", error="Wallet not found")
+                        continue
+
+                    reversal = WalletService._reversal_row(
+                        original, balances[original.wallet_id], reason
+                    )
+                    if reversal.balance_after < 0:
+                        result.update(
+                            status="insufficient_balance",
+                            error=f"Current balance: ₦{balances[original.wallet_id]}, "
+                                  f"Required: ₦{original.amount}",
+                        )
+                        continue
+
+                    balances[original.wallet_id] = reversal.balance_after
+                    rows.append(reversal)
+                    result.update(
+                        status="reversed",
+                        reversal_reference=reversal.reference,
+                        balance_after=reversal.balance_after,
+                    )
+
+                if rows:
+                    now = timezone.now()
+                    WalletTransaction.objects.bulk_create(rows)
+                    WalletTransaction.objects.filter(
+                        pk__in=[row.reversal_of_id for row in rows]
+                    ).update(status='REVERSED', updated_at=now)
+
+                    changed = {row.wallet_id for row in rows}
+                    deltas = {pk: balances[pk] - wallets[pk].balance for pk in changed}
+                    Wallet.objects.filter(pk__in=changed).update(
+                        balance=Case(
+                            *[When(pk=pk, then=F('balance') + delta) for pk, delta in deltas.items()]
+                        ),
+                        version=F('version') + 1,
+                        updated_at=now,
+                    )
+                    WalletService._publish_balances(
+                        wallets, {pk: balances[pk] for pk in changed}, now
+                    )
+                    summaries.record(rows)
+
+                if dry_run:
+                    transaction.set_rollback(True)
+
+        except DatabaseError as e:
+            for result in pending:
+                if result.get("status") in (None, "reversed"):
+                    result.pop("balance_after", None)
+                    result.pop("reversal_reference", None)
+                    result.update(status="failed", error=f"Database error: {str(e)}")
+
+        return results
@@ -1,10 +1,12 @@
 """
 Wallet Signals
-Automatically create wallet when a new user is created
+Automatically create wallet when a new user is created, and keep the
+balance cache in step with Wallet.save()
 """
 from django.db.models.signals import post_save
 from django.dispatch import receiver
 from authentication.models import User
+from . import balance_cache
 from .models import Wallet
 
 
@@ -18,9 +20,40 @@ def create_user_wallet(sender, instance, created, **kwargs):
 
 
 @receiver(post_save, sender=User)
-def save_user_wallet(sender, instance, **kwargs):
+def save_user_wallet(sender, instance, update_fields=None, **kwargs):
     """
     Signal to save wallet when user is saved
+
+    Only a wallet already loaded on the instance is considered, and only its
+    changed fields are written, so an unrelated user save never rewrites
+    (or bumps updated_at on) a row that money movements are locking.
+    """
+    if update_fields is not None or not User.wallet.is_cached(instance):
+        return
+
+    wallet = getattr(instance, 'wallet', None)
+    if wallet is not None:
+        wallet.save_if_dirty()
+
+
+@receiver(post_save, sender=Wallet)
+def publish_wallet_balance(sender, instance, update_fields=None, **kwargs):
+    """
+    Write saved balances through to the balance cache
+
+    Covers every save() of a wallet (service legacy path, reversals, admin,
+    funding verification); set-based UPDATEs publish from WalletService.
     """
-    if hasattr(instance, 'wallet'):
-        instance.wallet.save()
\ No newline at end of file
+    if update_fields is not None and not {'balance', 'balance_shards'} & set(update_fields):
+        return
+
+    if instance.balance_shards:
+        balance_cache.invalidate(instance.pk)
+    else:
+        balance_cache.publish(
+            instance.pk,
+            instance.version,
+            instance.balance,
+            instance.updated_at,
+            instance.created_at,
+        )
@@ -0,0 +1,137 @@
+"""
+Daily wallet balance snapshots
+
+A WalletBalanceSnapshot holds a wallet's ledger balance (net sum of its
+applied transactions) at the end of a day, and is only written for days on
+which the wallet had activity. A point-in-time balance is then the latest
+snapshot before that day plus the transactions between the snapshot and
+the requested time (see WalletService.get_balance_at).
+
+Days are bucketed by completed_at, not created_at: a gateway funding is
+created PENDING and may only complete days later, after the day it was
+created on has been snapshotted.
+
+take_snapshots() is incremental: it resumes from the day after the latest
+snapshot and writes each day in its own transaction, so an interrupted
+run never leaves a day half-written.
+"""
+
+from datetime import datetime, time, timedelta
+
+from django.db import transaction
+from django.db.models import Case, DecimalField, F, Max, Min, OuterRef, Subquery, Sum, When
+from django.utils import timezone
+
+from .models import Wallet, WalletBalanceSnapshot, WalletTransaction
+
+# Transactions commit shortly after their completed_at; a day is only
+# snapshotted once it ended at least this long ago
+SETTLE_SECONDS = 300
+
+
+def day_start(day):
+    """Aware datetime at which `day` starts in the current time zone"""
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def day_end(day):
+    """Aware datetime at which `day` ends (the next day starts)"""
+    return day_start(day + timedelta(days=1))
+
+
+def signed_amount():
+    """Expression: +amount for credits, -amount for debits"""
+    return Case(
+        When(transaction_type='CREDIT', then=F('amount')),
+        default=-F('amount'),
+        output_field=DecimalField(max_digits=14, decimal_places=2),
+    )
+
+
+def last_complete_day():
+    """The most recent day that can be snapshotted now"""
+    return timezone.localdate(timezone.now() - timedelta(seconds=SETTLE_SECONDS)) - timedelta(days=1)
+
+
+def snapshot_day(day) -> int:
+    """
+    Write snapshots for every wallet with applied transactions on `day`
+
+    Returns:
+        Number of snapshots written
+    """
+    daily = (
+        WalletTransaction.objects.filter(
+            status__in=WalletTransaction.APPLIED_STATUSES,
+            completed_at__gte=day_start(day),
+            completed_at__lt=day_end(day),
+        )
+        .values('wallet_id')
+        .annotate(net=Sum(signed_amount()))
+        .order_by()
+    )
+    net_by_wallet = {row['wallet_id']: row['net'] for row in daily}
+    if not net_by_wallet:
+        return 0
+
+    opening = dict(
+        Wallet.objects.filter(pk__in=net_by_wallet)
+        .annotate(
+            opening=Subquery(
+                WalletBalanceSnapshot.objects.filter(wallet=OuterRef('pk'), snapshot_date__lt=day)
+                .order_by('-snapshot_date')
+                .values('balance')[:1]
+            )
+        )
+        .values_list('pk', 'opening')
+    )
+
+    snapshots = [
+        WalletBalanceSnapshot(
+            wallet_id=wallet_id,
+            snapshot_date=day,
+            balance=(opening.get(wallet_id) or 0) + net,
+        )
+        for wallet_id, net in net_by_wallet.items()
+    ]
+    with transaction.atomic():
+        WalletBalanceSnapshot.objects.bulk_create(snapshots, batch_size=1000)
+    return len(snapshots)
+
+
+def take_snapshots(through=None, rebuild=False, on_day=None):
+    """
+    Snapshot every day after the latest snapshot, up to `through`
+
+    Args:
+        through: Last day to snapshot (default: the last complete day)
+        rebuild: Delete all snapshots and start from the first transaction
+        on_day: Optional callback receiving (day, snapshots written)
+
+    Returns:
+        Number of snapshots written
+    """
+    through = through or last_complete_day()
+
+    if rebuild:
+        WalletBalanceSnapshot.objects.all().delete()
+
+    latest = WalletBalanceSnapshot.objects.aggregate(latest=Max('snapshot_date'))['latest']
+    if latest is not None:
+        day = latest + timedelta(days=1)
+    else:
+        first = WalletTransaction.objects.filter(
+            status__in=WalletTransaction.APPLIED_STATUSES
+        ).aggregate(first=Min('completed_at'))['first']
+        if first is None:
+            return 0
+        day = timezone.localdate(first)
+
+    written = 0
+    while day <= through:
+        count = snapshot_day(day)
+        written += count
+        if on_day:
+            on_day(day, count)
+        day += timedelta(days=1)
+    return written
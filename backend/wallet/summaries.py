@@ -0,0 +1,121 @@
+"""
+Daily wallet summaries
+
+WalletDailySummary holds per wallet, day and source the inflow, outflow
+and transaction counts, so dashboards read a handful of rollup rows
+instead of grouping wallet_transactions. Like the balance snapshots, rows
+count on the day they completed, not the day they were created.
+
+WalletService calls record() for every ledger row it writes. The deltas
+are added with one INSERT ... ON CONFLICT DO UPDATE once the transaction
+commits (like the balance cache), so a busy wallet's summary row is never
+locked for the length of a balance transaction. rebuild() recomputes whole
+days from the ledger, for the initial backfill and to repair drift (see
+`manage.py backfill_wallet_summaries`).
+"""
+
+from collections import defaultdict
+from datetime import timedelta
+
+from django.db import connection, transaction
+from django.db.models import Count, DecimalField, Q, Sum, Value
+from django.db.models.functions import Coalesce, TruncDate
+from django.utils import timezone
+
+from .models import WalletDailySummary, WalletTransaction
+from .snapshots import day_end, day_start
+
+ZERO = Value(0, output_field=DecimalField(max_digits=14, decimal_places=2))
+
+
+def record(transactions):
+    """
+    Add applied ledger rows to their daily summaries when the current
+    transaction commits
+    """
+    deltas = defaultdict(lambda: [0, 0, 0, 0])
+    for txn in transactions:
+        if txn.status not in WalletTransaction.APPLIED_STATUSES:
+            continue
+        key = (txn.wallet_id, timezone.localdate(txn.completed_at), txn.source)
+        if txn.transaction_type == 'CREDIT':
+            deltas[key][0] += txn.amount
+            deltas[key][2] += 1
+        else:
+            deltas[key][1] += txn.amount
+            deltas[key][3] += 1
+
+    if deltas:
+        # robust: the ledger write has already committed, so a failed
+        # rollup update is logged (and repaired by a rebuild), never raised
+        # to a caller that would retry the money movement
+        transaction.on_commit(lambda: _apply(deltas), robust=True)
+
+
+def _apply(deltas):
+    table = connection.ops.quote_name(WalletDailySummary._meta.db_table)
+    now = timezone.now()
+    params = []
+    # Sorted, so concurrent upserts touching several rows lock them in the
+    # same order
+    for (wallet_id, day, source), (inflow, outflow, credits, debits) in sorted(deltas.items()):
+        params.extend([wallet_id, day, source, inflow, outflow, credits, debits, now])
+
+    placeholders = ", ".join(["(%s, %s, %s, %s, %s, %s, %s, %s)"] * len(deltas))
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"INSERT INTO {table} "
+            "(wallet_id, summary_date, source, inflow, outflow, credit_count, debit_count, updated_at) "
+            f"VALUES {placeholders} "
+            "ON CONFLICT (wallet_id, summary_date, source) DO UPDATE SET "
+            f"inflow = {table}.inflow + EXCLUDED.inflow, "
+            f"outflow = {table}.outflow + EXCLUDED.outflow, "
+            f"credit_count = {table}.credit_count + EXCLUDED.credit_count, "
+            f"debit_count = {table}.debit_count + EXCLUDED.debit_count, "
+            "updated_at = EXCLUDED.updated_at",
+            params,
+        )
+
+
+def rebuild(start, end, chunk_days=7, on_chunk=None):
+    """
+    Recompute the summaries of days start..end (inclusive) from the ledger
+
+    Each chunk of days is replaced in its own transaction. Only rebuild
+    days that have ended: live writes to a day being rebuilt could be
+    counted twice.
+
+    Returns:
+        Number of summary rows written
+    """
+    written = 0
+    day = start
+    while day <= end:
+        last = min(day + timedelta(days=chunk_days - 1), end)
+        rows = (
+            WalletTransaction.objects.filter(
+                status__in=WalletTransaction.APPLIED_STATUSES,
+                completed_at__gte=day_start(day),
+                completed_at__lt=day_end(last),
+            )
+            .annotate(summary_date=TruncDate('completed_at'))
+            .values('wallet_id', 'summary_date', 'source')
+            .annotate(
+                inflow=Coalesce(Sum('amount', filter=Q(transaction_type='CREDIT')), ZERO),
+                outflow=Coalesce(Sum('amount', filter=Q(transaction_type='DEBIT')), ZERO),
+                credit_count=Count('id', filter=Q(transaction_type='CREDIT')),
+                debit_count=Count('id', filter=Q(transaction_type='DEBIT')),
+            )
+            .order_by()
+        )
+        summaries = [WalletDailySummary(**row) for row in rows]
+
+        with transaction.atomic():
+            WalletDailySummary.objects.filter(summary_date__gte=day, summary_date__lte=last).delete()
+            WalletDailySummary.objects.bulk_create(summaries, batch_size=1000)
+
+        written += len(summaries)
+        if on_chunk:
+            on_chunk(day, last, len(summaries))
+        day = last + timedelta(days=1)
+    return written
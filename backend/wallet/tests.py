@@ -2,13 +2,44 @@
 Wallet Service Tests
 """
 
-from django.test import TestCase
+import csv
+import io
+import json
+import random
+import threading
+from importlib import import_module
+from unittest import skipUnless
+import time
+from datetime import date, timedelta
+from unittest import mock
+
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.contrib.auth import get_user_model
 from decimal import Decimal
+from django.core.cache import cache
+from django.utils import timezone
+from django.db import DatabaseError, connection
+from django.db.models import F
 from django.core.exceptions import ValidationError
+from rest_framework.test import APIClient
 
+from . import balance_cache
 from .services import WalletService
-from .models import Wallet, WalletTransaction
+from .models import (
+    Wallet,
+    WalletTransaction,
+    IdempotencyKey,
+    WalletBalanceShard,
+    WalletBalanceSnapshot,
+    WalletDailySummary,
+    WalletReconciliationCheckpoint,
+)
+from .reconciliation import reconcile
+from .serializers import WalletTransactionSerializer
+from .snapshots import day_start, take_snapshots
+from .statements import statement_rows
+from .summaries import rebuild as rebuild_summaries
 
 User = get_user_model()
 
@@ -44,6 +75,20 @@ class WalletServiceTestCase(TestCase):
         wallet = Wallet.objects.get(user=self.user)
         self.assertEqual(wallet.balance, Decimal("1000.00"))
 
+    def test_sub_cent_amounts_move_balance_by_the_recorded_amount(self):
+        """The balance and the ledger round the amount the same way"""
+        WalletService.credit_wallet(self.user, Decimal("10.005"))
+        WalletService.credit_wallet(self.user, Decimal("10.015"))
+        WalletService.debit_wallet(self.user, Decimal("0.125"))
+
+        wallet = Wallet.objects.get(user=self.user)
+        ledger = [txn.amount for txn in WalletTransaction.objects.order_by("id")]
+        self.assertEqual(ledger, [Decimal("10.00"), Decimal("10.02"), Decimal("0.12")])
+        self.assertEqual(wallet.balance, Decimal("19.90"))
+
+        with self.assertRaises(ValidationError):
+            WalletService.credit_wallet(self.user, Decimal("0.004"))
+
     def test_debit_wallet_success(self):
         """Test debiting wallet with sufficient balance"""
         # First credit
@@ -90,6 +135,46 @@ class WalletServiceTestCase(TestCase):
         # Check original is marked as reversed
         original_txn.refresh_from_db()
         self.assertEqual(original_txn.status, "REVERSED")
+        self.assertEqual(reversal.reversal_of_id, original_txn.pk)
+        self.assertEqual(original_txn.reversal, reversal)
+
+    def test_reverse_twice_rejected(self):
+        """A transaction can only be reversed once"""
+        original_txn = WalletService.credit_wallet(self.user, Decimal("100.00"))
+        WalletService.reverse_transaction(original_txn.reference)
+
+        with self.assertRaises(ValidationError):
+            WalletService.reverse_transaction(original_txn.reference)
+        self.assertEqual(WalletTransaction.objects.filter(source="REVERSAL").count(), 1)
+
+    def test_reversal_link_backfill(self):
+        """Reversals written before reversal_of existed are linked from metadata"""
+        from django.apps import apps
+        backfill = import_module("wallet.migrations.0011_backfill_reversal_of").backfill_reversal_of
+
+        by_id = WalletService.credit_wallet(self.user, Decimal("100.00"))
+        by_reference = WalletService.credit_wallet(self.user, Decimal("50.00"))
+        wallet = Wallet.objects.get(user=self.user)
+        legacy = [
+            WalletTransaction.objects.create(
+                wallet=wallet, transaction_type="DEBIT", amount=original.amount,
+                balance_before=Decimal("0.00"), balance_after=Decimal("0.00"),
+                status="COMPLETED", source="REVERSAL", reference=f"REV-LEGACY-{n}",
+                metadata=metadata,
+            )
+            for n, (original, metadata) in enumerate([
+                (by_id, {"original_transaction_id": str(by_id.pk)}),
+                (by_reference, {"original_reference": by_reference.reference}),
+                (by_id, {"original_transaction_id": str(by_id.pk)}),
+            ])
+        ]
+
+        backfill(apps, None)
+
+        links = [
+            WalletTransaction.objects.get(pk=txn.pk).reversal_of_id for txn in legacy
+        ]
+        self.assertEqual(links, [by_id.pk, by_reference.pk, None])
 
     def test_generate_unique_reference(self):
         """Test reference generation is unique"""
@@ -98,3 +183,1177 @@ class WalletServiceTestCase(TestCase):
 
         self.assertNotEqual(ref1, ref2)
         self.assertTrue(ref1.startswith("TEST-"))
+
+    def test_user_save_does_not_rewrite_clean_wallet(self):
+        """Saving a user with its wallet loaded must not bump wallet.updated_at"""
+        user = User.objects.select_related("wallet").get(pk=self.user.pk)
+        updated_at = user.wallet.updated_at
+
+        with self.assertNumQueries(1):
+            user.save()
+
+        self.assertEqual(Wallet.objects.get(pk=self.user.pk).updated_at, updated_at)
+
+    def test_credit_is_single_update_and_insert(self):
+        """A credit is one UPDATE ... RETURNING plus the ledger INSERT"""
+        WalletService.get_or_create_wallet(self.user)
+
+        with self.assertNumQueries(4):  # SAVEPOINT, UPDATE, INSERT, RELEASE
+            txn = WalletService.credit_wallet(self.user, Decimal("250.00"))
+
+        self.assertEqual(txn.balance_before, Decimal("0.00"))
+        self.assertEqual(txn.balance_after, Decimal("250.00"))
+        self.assertEqual(Wallet.objects.get(pk=self.user.pk).balance, Decimal("250.00"))
+
+    def test_duplicate_reference_rolls_back_balance(self):
+        """A reused reference is rejected by the unique constraint, not applied"""
+        WalletService.credit_wallet(self.user, Decimal("100.00"), reference="REF-DUP")
+
+        with self.assertRaises(ValidationError) as context:
+            WalletService.credit_wallet(self.user, Decimal("100.00"), reference="REF-DUP")
+
+        self.assertIn("already exists", str(context.exception))
+        self.assertEqual(Wallet.objects.get(pk=self.user.pk).balance, Decimal("100.00"))
+
+    def test_debit_insufficient_balance_leaves_wallet_untouched(self):
+        """The conditional UPDATE must not let a debit overdraw the wallet"""
+        WalletService.credit_wallet(self.user, Decimal("100.00"))
+
+        with self.assertRaises(ValidationError):
+            WalletService.debit_wallet(self.user, Decimal("100.01"))
+
+        self.assertEqual(Wallet.objects.get(pk=self.user.pk).balance, Decimal("100.00"))
+        self.assertEqual(WalletTransaction.objects.filter(transaction_type="DEBIT").count(), 0)
+
+
+class IdempotencyKeyTestCase(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            email="idem@example.com", username="idemuser"
+        )
+        WalletService.credit_wallet(self.user, Decimal("1000.00"))
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def debit(self, key, amount="100.00"):
+        return self.client.post(
+            "/api/wallet/debit/",
+            {"amount": amount},
+            format="json",
+            HTTP_IDEMPOTENCY_KEY=key,
+        )
+
+    def test_retry_replays_response_without_new_ledger_write(self):
+        """A retried debit returns the first response and debits once"""
+        first = self.debit("order-42")
+        self.assertEqual(first.status_code, 200)
+
+        with self.assertNumQueries(0):
+            retry = self.debit("order-42")
+
+        self.assertEqual(retry.status_code, 200)
+        self.assertEqual(retry["Idempotent-Replayed"], "true")
+        self.assertEqual(retry.json(), first.json())
+        self.assertEqual(Wallet.objects.get(pk=self.user.pk).balance, Decimal("900.00"))
+        self.assertEqual(WalletTransaction.objects.filter(transaction_type="DEBIT").count(), 1)
+
+    def test_replay_survives_cache_eviction(self):
+        """The table answers the retry when the cached response is gone"""
+        first = self.debit("order-43")
+        cache.clear()
+
+        retry = self.debit("order-43")
+
+        self.assertEqual(retry.json(), first.json())
+        self.assertEqual(Wallet.objects.get(pk=self.user.pk).balance, Decimal("900.00"))
+
+    def test_key_reused_for_different_request_is_rejected(self):
+        self.debit("order-44")
+
+        response = self.debit("order-44", amount="250.00")
+
+        self.assertEqual(response.status_code, 422)
+        self.assertEqual(Wallet.objects.get(pk=self.user.pk).balance, Decimal("900.00"))
+
+    def test_concurrent_duplicate_is_blocked_while_in_flight(self):
+        """A second request arriving before the first finishes gets 409"""
+        IdempotencyKey.objects.create(
+            user=self.user,
+            key="order-45",
+            endpoint="/api/wallet/debit/",
+            request_fingerprint="in-flight",
+        )
+
+        response = self.debit("order-45")
+
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(Wallet.objects.get(pk=self.user.pk).balance, Decimal("1000.00"))
+
+    def test_retry_takes_over_key_of_dead_worker(self):
+        """A key left IN_PROGRESS past the in-flight timeout is not stuck"""
+        self.debit("probe")
+        record = IdempotencyKey.objects.create(
+            user=self.user,
+            key="order-46",
+            endpoint="/api/wallet/debit/",
+            request_fingerprint=IdempotencyKey.objects.get(key="probe").request_fingerprint,
+        )
+        IdempotencyKey.objects.filter(pk=record.pk).update(
+            updated_at=timezone.now() - timedelta(seconds=301),
+        )
+
+        response = self.debit("order-46")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn("Idempotent-Replayed", response)
+        self.assertEqual(IdempotencyKey.objects.get(pk=record.pk).status, "COMPLETED")
+        self.assertEqual(Wallet.objects.get(pk=self.user.pk).balance, Decimal("800.00"))
+
+    def test_ledger_write_rolls_back_if_key_outcome_is_not_saved(self):
+        """A worker dying before the key is completed leaves no debit behind"""
+        save = IdempotencyKey.save
+
+        def die_on_completion(record, *args, **kwargs):
+            if record.status == "COMPLETED":
+                raise RuntimeError("worker died")
+            return save(record, *args, **kwargs)
+
+        with mock.patch.object(IdempotencyKey, "save", die_on_completion):
+            with self.assertRaises(RuntimeError):
+                self.debit("order-47")
+
+        self.assertEqual(Wallet.objects.get(pk=self.user.pk).balance, Decimal("1000.00"))
+        self.assertFalse(WalletTransaction.objects.filter(transaction_type="DEBIT").exists())
+
+        self.assertEqual(self.debit("order-47").status_code, 200)
+        self.assertEqual(Wallet.objects.get(pk=self.user.pk).balance, Decimal("900.00"))
+
+    def test_requests_without_key_are_not_recorded(self):
+        self.client.post("/api/wallet/debit/", {"amount": "100.00"}, format="json")
+
+        self.assertFalse(IdempotencyKey.objects.exists())
+
+
+class WalletTransferTestCase(TestCase):
+
+    def setUp(self):
+        self.sender = User.objects.create_user(email="sender@example.com", username="sender")
+        self.recipient = User.objects.create_user(
+            email="recipient@example.com", username="recipient"
+        )
+        WalletService.credit_wallet(self.sender, Decimal("500.00"))
+
+    def test_transfer_is_one_lock_one_insert_one_update(self):
+        """Lock both wallets, one bulk INSERT, one UPDATE (plus the savepoint pair)"""
+        with self.assertNumQueries(5):
+            debit, credit = WalletService.transfer(
+                self.sender, self.recipient, Decimal("120.00")
+            )
+
+        self.assertEqual(debit.balance_after, Decimal("380.00"))
+        self.assertEqual(credit.balance_after, Decimal("120.00"))
+        self.assertEqual(debit.metadata["paired_reference"], credit.reference)
+        self.assertEqual(Wallet.objects.get(pk=self.sender.pk).balance, Decimal("380.00"))
+        self.assertEqual(Wallet.objects.get(pk=self.recipient.pk).balance, Decimal("120.00"))
+
+    def test_transfer_insufficient_balance_changes_nothing(self):
+        with self.assertRaises(ValidationError):
+            WalletService.transfer(self.sender, self.recipient, Decimal("500.01"))
+
+        self.assertEqual(Wallet.objects.get(pk=self.sender.pk).balance, Decimal("500.00"))
+        self.assertFalse(WalletTransaction.objects.filter(source="WALLET_TRANSFER").exists())
+
+    def test_transfer_view(self):
+        client = APIClient()
+        client.force_authenticate(user=self.sender)
+
+        response = client.post(
+            "/api/wallet/transfer/",
+            {"recipient_username": "RECIPIENT", "amount": "50.00"},
+            format="json",
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["new_balance"], "450.00")
+        self.assertEqual(Wallet.objects.get(pk=self.recipient.pk).balance, Decimal("50.00"))
+
+
+class TransactionHistoryPaginationTestCase(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(email="history@example.com", username="history")
+        cache.clear()
+        balance_cache.clear()
+        wallet = WalletService.get_or_create_wallet(self.user)
+        WalletTransaction.objects.bulk_create([
+            WalletTransaction(
+                wallet=wallet,
+                transaction_type="CREDIT",
+                amount=Decimal("1.00"),
+                balance_before=Decimal("0.00"),
+                balance_after=Decimal("1.00"),
+                status="COMPLETED",
+                source="FUNDING",
+                reference=f"HIST-{n:03d}",
+            )
+            for n in range(25)
+        ])
+        # Force created_at ties so the id tie-breaker is exercised
+        first_ids = WalletTransaction.objects.order_by("id").values_list("id", flat=True)[:10]
+        WalletTransaction.objects.filter(id__in=list(first_ids)).update(
+            created_at=WalletTransaction.objects.order_by("id").first().created_at
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def test_cursor_walks_every_row_once(self):
+        seen = []
+        cursor = None
+        while True:
+            params = {"limit": 7, "count": "none"}
+            if cursor:
+                params["cursor"] = cursor
+            response = self.client.get("/api/wallet/transactions/", params)
+            self.assertEqual(response.status_code, 200)
+            seen += [txn["reference"] for txn in response.data["transactions"]]
+            cursor = response.data["next_cursor"]
+            if not cursor:
+                break
+
+        self.assertEqual(len(seen), 25)
+        self.assertEqual(len(set(seen)), 25)
+
+    def test_deep_page_costs_the_same_as_first_page(self):
+        first = self.client.get("/api/wallet/transactions/", {"limit": 5, "count": "none"})
+
+        with self.assertNumQueries(1):
+            self.client.get(
+                "/api/wallet/transactions/",
+                {"limit": 5, "count": "none", "cursor": first.data["next_cursor"]},
+            )
+
+    @skipUnless(connection.vendor == "sqlite", "EXPLAIN QUERY PLAN output is SQLite's")
+    def test_deep_page_is_an_index_range_scan(self):
+        first = self.client.get("/api/wallet/transactions/", {"limit": 5, "count": "none"})
+        _, cursor = WalletService.get_transaction_page(self.user, first.data["next_cursor"], 5)
+
+        with CaptureQueriesContext(connection) as queries:
+            WalletService.get_transaction_page(self.user, cursor, 5)
+        sql = queries[0]["sql"]
+        with connection.cursor() as db:
+            db.execute("EXPLAIN QUERY PLAN " + sql)
+            plan = " ".join(str(row[-1]) for row in db.fetchall())
+
+        # PostgreSQL does not derive this bound from the OR by itself
+        self.assertIn('"created_at" <=', sql)
+        self.assertIn("wallet_id=? AND created_at<?", plan)
+        self.assertNotIn("TEMP B-TREE", plan)
+
+    @override_settings(WALLET_TRANSACTION_COUNT_CAP=10)
+    def test_count_is_capped_unless_exact(self):
+        estimated = self.client.get("/api/wallet/transactions/")
+        exact = self.client.get("/api/wallet/transactions/", {"count": "exact"})
+
+        self.assertEqual((estimated.data["count"], estimated.data["count_exact"]), (10, False))
+        self.assertEqual((exact.data["count"], exact.data["count_exact"]), (25, True))
+
+    def test_invalid_cursor(self):
+        response = self.client.get("/api/wallet/transactions/", {"cursor": "not-a-cursor"})
+
+        self.assertEqual(response.status_code, 400)
+
+
+class TransactionSerializerQueryCountTestCase(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(email="rows@example.com", username="rows")
+        self.wallet = WalletService.get_or_create_wallet(self.user)
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def create_transactions(self, total):
+        existing = WalletTransaction.objects.filter(wallet=self.wallet).count()
+        WalletTransaction.objects.bulk_create([
+            WalletTransaction(
+                wallet=self.wallet,
+                transaction_type="CREDIT",
+                amount=Decimal("1.00"),
+                balance_before=Decimal("0.00"),
+                balance_after=Decimal("1.00"),
+                status="COMPLETED",
+                source="FUNDING",
+                reference=f"ROWS-{n:05d}",
+            )
+            for n in range(existing, total)
+        ])
+
+    @override_settings(WALLET_TRANSACTION_MAX_PAGE_SIZE=1000)
+    def test_history_query_count_is_flat(self):
+        """One page query plus one count query, whatever the page size"""
+        for total in (1, 100, 1000):
+            with self.subTest(rows=total):
+                self.create_transactions(total)
+
+                with self.assertNumQueries(2):
+                    response = self.client.get("/api/wallet/transactions/", {"limit": total})
+
+                self.assertEqual(len(response.data["transactions"]), total)
+                self.assertEqual(response.data["transactions"][0]["user_email"], "rows@example.com")
+
+    def test_detail_is_one_query(self):
+        self.create_transactions(1)
+
+        with self.assertNumQueries(1):
+            response = self.client.get("/api/wallet/transactions/ROWS-00000/")
+
+        self.assertEqual(response.data["user_email"], "rows@example.com")
+
+
+class ShardedBalanceTestCase(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(email="merchant@example.com", username="merchant")
+        WalletService.credit_wallet(self.user, Decimal("100.00"))
+        WalletService.set_balance_shards(self.user, 4)
+
+    def test_credits_land_on_slots_and_reads_aggregate(self):
+        txns = [WalletService.credit_wallet(self.user, Decimal("10.00")) for _ in range(8)]
+
+        wallet = Wallet.objects.get(pk=self.user.pk)
+        self.assertEqual(wallet.balance, Decimal("100.00"))
+        self.assertEqual(wallet.total_balance, Decimal("180.00"))
+        self.assertEqual(WalletService.get_wallet_balance(self.user), Decimal("180.00"))
+        for txn in txns:
+            self.assertIn(txn.metadata["balance_shard"], range(4))
+            self.assertEqual(txn.balance_after - txn.balance_before, Decimal("10.00"))
+
+    def test_debit_folds_slots_and_records_full_balance(self):
+        WalletService.credit_wallet(self.user, Decimal("50.00"))
+
+        debit = WalletService.debit_wallet(self.user, Decimal("120.00"))
+
+        self.assertEqual(debit.balance_before, Decimal("150.00"))
+        self.assertEqual(debit.balance_after, Decimal("30.00"))
+        self.assertEqual(Wallet.objects.get(pk=self.user.pk).balance, Decimal("30.00"))
+        self.assertFalse(WalletBalanceShard.objects.exclude(balance=0).exists())
+
+        with self.assertRaises(ValidationError):
+            WalletService.debit_wallet(self.user, Decimal("30.01"))
+
+    def test_slot_balances_are_not_shown_as_wallet_balances(self):
+        credit = WalletService.credit_wallet(self.user, Decimal("10.00"))
+        debit = WalletService.debit_wallet(self.user, Decimal("5.00"))
+
+        data = WalletTransactionSerializer(credit).data
+        self.assertIsNone(data["balance_before"])
+        self.assertIsNone(data["balance_after"])
+        self.assertEqual(WalletTransactionSerializer(debit).data["balance_after"], "105.00")
+
+        rows = {row[1]: row for row in statement_rows(self.user)}
+        self.assertEqual(rows[credit.reference][4:6], (None, None))
+        self.assertEqual(rows[debit.reference][5], Decimal("105.00"))
+
+    def test_compaction_and_unsharding_keep_the_total(self):
+        WalletService.credit_wallet(self.user, Decimal("25.00"))
+
+        self.assertEqual(WalletService.compact_balance_shards(self.user), Decimal("25.00"))
+        WalletService.credit_wallet(self.user, Decimal("5.00"))
+        wallet = WalletService.set_balance_shards(self.user, 0)
+
+        self.assertEqual(wallet.balance, Decimal("130.00"))
+        self.assertFalse(WalletBalanceShard.objects.filter(wallet=wallet).exists())
+        txn = WalletService.credit_wallet(self.user, Decimal("1.00"))
+        self.assertNotIn("balance_shard", txn.metadata)
+        self.assertEqual(txn.balance_after, Decimal("131.00"))
+
+
+class BulkCreditTestCase(TestCase):
+
+    def setUp(self):
+        self.users = [
+            User.objects.create_user(email=f"payee{n}@example.com", username=f"payee{n}")
+            for n in range(3)
+        ]
+
+    def test_bulk_credit_outcomes(self):
+        WalletService.credit_wallet(self.users[0], Decimal("5.00"), reference="CB-EXISTING")
+
+        results = WalletService.bulk_credit(
+            [
+                {"user_id": self.users[0].pk, "amount": "10.00", "reference": "CB-1"},
+                {"email": "payee1@example.com", "amount": "20.00", "reference": "CB-2"},
+                {"user_id": self.users[0].pk, "amount": "1.50", "reference": "CB-3"},
+                {"user_id": self.users[2].pk, "amount": "-1", "reference": "CB-4"},
+                {"user_id": self.users[2].pk, "amount": "1.00", "reference": "CB-EXISTING"},
+                {"email": "nobody@example.com", "amount": "1.00", "reference": "CB-5"},
+            ],
+            source="CASHBACK",
+        )
+
+        self.assertEqual(
+            [result["status"] for result in results],
+            ["credited", "credited", "credited", "invalid", "duplicate", "not_found"],
+        )
+        self.assertEqual(results[2]["balance_after"], Decimal("16.50"))
+        self.assertEqual(Wallet.objects.get(pk=self.users[0].pk).balance, Decimal("16.50"))
+        self.assertEqual(Wallet.objects.get(pk=self.users[1].pk).balance, Decimal("20.00"))
+        third = WalletTransaction.objects.get(reference="CB-3")
+        self.assertEqual(third.balance_before, Decimal("15.00"))
+        self.assertEqual(third.balance_after, Decimal("16.50"))
+
+    def test_malformed_entries_are_invalid(self):
+        results = WalletService.bulk_credit(
+            [
+                {"email": 123, "amount": "1.00", "reference": "CB-EMAIL"},
+                {"user_id": self.users[0].pk, "amount": "1.00", "reference": ["CB-LIST"]},
+                ["not", "an", "object"],
+                {"user_id": 1.9, "amount": "1.00", "reference": "CB-FLOAT"},
+                {"user_id": True, "amount": "1.00", "reference": "CB-BOOL"},
+                {"user_id": "1e1", "amount": "1.00", "reference": "CB-STR"},
+                {"user_id": str(self.users[2].pk), "amount": "2.00", "reference": "CB-DIGITS"},
+                {"email": " payee1@example.com ", "amount": "3.00", "reference": "CB-OK"},
+            ]
+        )
+
+        self.assertEqual(
+            [result["status"] for result in results],
+            ["invalid", "invalid", "invalid", "invalid", "invalid", "invalid", "credited", "credited"],
+        )
+        self.assertEqual(results[0]["error"], "email must be a string")
+        self.assertEqual(results[3]["error"], "user_id must be an integer")
+        self.assertEqual(results[4]["error"], "user_id must be an integer")
+        self.assertEqual(Wallet.objects.get(pk=self.users[2].pk).balance, Decimal("2.00"))
+        self.assertEqual(Wallet.objects.get(pk=self.users[1].pk).balance, Decimal("3.00"))
+        self.assertEqual(Wallet.objects.get(pk=self.users[0].pk).balance, Decimal("0.00"))
+
+    def test_chunk_is_set_based(self):
+        """Refs check, lock, bulk INSERT and one UPDATE per chunk (+ savepoint pair)"""
+        entries = [
+            {"user_id": user.pk, "amount": "2.00", "reference": f"REF-{user.pk}"}
+            for user in self.users
+        ]
+
+        with self.assertNumQueries(6):
+            WalletService.bulk_credit(entries)
+
+        rerun = WalletService.bulk_credit(entries)
+        self.assertEqual({result["status"] for result in rerun}, {"duplicate"})
+        self.assertEqual(Wallet.objects.get(pk=self.users[2].pk).balance, Decimal("2.00"))
+
+
+class BalanceCacheTestCase(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        balance_cache.clear()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user = User.objects.create_user(email="poller@example.com", username="poller")
+
+    def test_reads_are_served_from_cache_after_commit(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            WalletService.credit_wallet(self.user, Decimal("75.00"))
+
+        with self.assertNumQueries(0):
+            self.assertEqual(WalletService.get_wallet_balance(self.user), Decimal("75.00"))
+            self.assertEqual(WalletService.get_cached_wallet(self.user).balance, Decimal("75.00"))
+
+    def test_credit_before_first_read_fills_a_cold_cache(self):
+        cache.clear()
+        balance_cache.clear()
+        with self.captureOnCommitCallbacks(execute=True):
+            WalletService.credit_wallet(self.user, Decimal("75.00"))
+
+        self.assertEqual(balance_cache.get(self.user.pk)["created_at"], Wallet.objects.get(user=self.user).created_at)
+        with self.assertNumQueries(0):
+            self.assertEqual(WalletService.get_wallet_balance(self.user), Decimal("75.00"))
+
+    def test_uncommitted_writes_are_not_published(self):
+        with self.captureOnCommitCallbacks(execute=False):
+            WalletService.credit_wallet(self.user, Decimal("75.00"))
+
+        self.assertEqual(balance_cache.get(self.user.pk)["balance"], Decimal("0.00"))
+
+    def test_out_of_order_commits_keep_the_newest_balance(self):
+        with self.captureOnCommitCallbacks(execute=False) as first:
+            WalletService.credit_wallet(self.user, Decimal("10.00"))
+        with self.captureOnCommitCallbacks(execute=False) as second:
+            WalletService.credit_wallet(self.user, Decimal("20.00"))
+
+        for callback in second + first:
+            callback()
+
+        self.assertEqual(WalletService.get_wallet_balance(self.user), Decimal("30.00"))
+
+    def test_entry_older_than_own_last_write_is_ignored(self):
+        stale = balance_cache.get(self.user.pk)
+        with self.captureOnCommitCallbacks(execute=True):
+            WalletService.credit_wallet(self.user, Decimal("10.00"))
+
+        # Another process overwrites the entry with an older version
+        cache.set(balance_cache._key(self.user.pk), stale)
+
+        self.assertEqual(WalletService.get_wallet_balance(self.user), Decimal("10.00"))
+
+
+    def test_concurrent_stores_keep_the_newest_version(self):
+        versions = list(range(1, 41))
+        random.shuffle(versions)
+        now = timezone.now()
+        threads = [
+            threading.Thread(
+                target=balance_cache._store,
+                args=(self.user.pk, version, Decimal(version), now, now),
+            )
+            for version in versions
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(balance_cache.get(self.user.pk)["version"], 40)
+        self.assertEqual(balance_cache.get(self.user.pk)["balance"], Decimal(40))
+
+
+class BalanceCacheConcurrencyTestCase(TransactionTestCase):
+
+    def setUp(self):
+        cache.clear()
+        balance_cache.clear()
+        self.user = User.objects.create_user(email="hot@example.com", username="hot")
+
+    def test_no_stale_reads_under_concurrent_credits(self):
+        """After each committed credit, this process never reads an older balance"""
+        stale_reads = []
+        errors = []
+
+        def retry_if_locked(operation):
+            # SQLite's shared in-memory test database rejects concurrent
+            # writers with "table is locked" instead of waiting
+            while True:
+                try:
+                    return operation()
+                except DatabaseError as e:
+                    if "locked" not in str(e):
+                        raise
+                    time.sleep(0.001)
+
+        def worker():
+            try:
+                for _ in range(10):
+                    txn = retry_if_locked(
+                        lambda: WalletService.credit_wallet(self.user, Decimal("1.00"))
+                    )
+                    seen = retry_if_locked(lambda: WalletService.get_wallet_balance(self.user))
+                    if seen < txn.balance_after:
+                        stale_reads.append((seen, txn.balance_after))
+            except Exception as e:
+                errors.append(e)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=worker) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        self.assertEqual(stale_reads, [])
+        self.assertEqual(WalletService.get_wallet_balance(self.user), Decimal("40.00"))
+
+
+class ReconciliationTestCase(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(email="ledger@example.com", username="ledger")
+        WalletService.credit_wallet(self.user, Decimal('100.00'), 'MANUAL_FUNDING')
+        WalletService.debit_wallet(self.user, Decimal('30.00'), 'Purchase')
+
+    def kinds(self, discrepancies):
+        return [d['kind'] for d in discrepancies]
+
+    def test_balanced_wallet_reports_nothing(self):
+        checked, discrepancies = reconcile()
+        self.assertEqual(checked, 1)
+        self.assertEqual(discrepancies, [])
+
+        checkpoint = Wallet.objects.get(user=self.user).reconciliation
+        self.assertTrue(checkpoint.is_balanced)
+        self.assertEqual(checkpoint.ledger_balance, Decimal('70.00'))
+
+    def test_unchanged_wallet_is_skipped(self):
+        reconcile()
+        self.assertEqual(reconcile(), (0, []))
+
+    def test_second_run_only_scans_new_transactions(self):
+        reconcile()
+        last_id = Wallet.objects.get(user=self.user).reconciliation.last_transaction_id
+
+        credit = WalletService.credit_wallet(self.user, Decimal('5.00'), 'MANUAL_FUNDING')
+        self.assertEqual(reconcile(), (1, []))
+
+        checkpoint = Wallet.objects.get(user=self.user).reconciliation
+        self.assertGreater(credit.id, last_id)
+        self.assertEqual(checkpoint.last_transaction_id, credit.id)
+        self.assertEqual(checkpoint.ledger_balance, Decimal('75.00'))
+
+    def test_funding_completed_after_later_postings_keeps_the_chain(self):
+        WalletService.credit_wallet(self.user, Decimal('10.00'), 'MANUAL_FUNDING')
+        reconcile()
+
+        wallet = Wallet.objects.get(user=self.user)
+        funding = WalletTransaction.objects.create(
+            wallet=wallet,
+            transaction_type='CREDIT',
+            source='FUNDING',
+            amount=Decimal('20.00'),
+            balance_before=wallet.balance,
+            balance_after=wallet.balance,
+            reference='FUND-LATE',
+            status='PENDING',
+        )
+        WalletService.credit_wallet(self.user, Decimal('5.00'), 'MANUAL_FUNDING')
+        WalletService.complete_funding(funding)
+
+        self.assertEqual(reconcile(), (1, []))
+        checkpoint = Wallet.objects.get(user=self.user).reconciliation
+        self.assertEqual(checkpoint.chain_balance, Decimal('105.00'))
+
+    def test_balance_mismatch(self):
+        Wallet.objects.filter(user=self.user).update(balance=Decimal('80.00'))
+        _, discrepancies = reconcile()
+        self.assertEqual(self.kinds(discrepancies), ['balance_mismatch'])
+
+        # Out-of-balance wallets are re-checked on every run
+        _, discrepancies = reconcile()
+        self.assertEqual(self.kinds(discrepancies), ['balance_mismatch'])
+
+    def test_chain_break(self):
+        debit = WalletTransaction.objects.get(wallet__user=self.user, transaction_type='DEBIT')
+        WalletTransaction.objects.filter(pk=debit.pk).update(
+            balance_before=Decimal('90.00'), balance_after=Decimal('60.00')
+        )
+        _, discrepancies = reconcile()
+        self.assertIn('chain_break', self.kinds(discrepancies))
+        self.assertEqual(discrepancies[0]['transaction_id'], debit.pk)
+
+    def test_pending_transaction_counted_once_completed(self):
+        wallet = Wallet.objects.get(user=self.user)
+        pending = WalletTransaction.objects.create(
+            wallet=wallet,
+            transaction_type='CREDIT',
+            amount=Decimal('20.00'),
+            balance_before=wallet.balance,
+            balance_after=wallet.balance + Decimal('20.00'),
+            source='FUNDING',
+            reference='PENDING-REF-1',
+            status='PENDING',
+        )
+        self.assertEqual(reconcile(), (1, []))
+        wallet.refresh_from_db()
+        self.assertEqual(wallet.reconciliation.pending_transaction_ids, [pending.pk])
+
+        WalletTransaction.objects.filter(pk=pending.pk).update(status='COMPLETED')
+        Wallet.objects.filter(pk=wallet.pk).update(balance=Decimal('90.00'))
+        self.assertEqual(reconcile(), (1, []))
+
+        checkpoint = Wallet.objects.get(pk=wallet.pk).reconciliation
+        self.assertEqual(checkpoint.pending_transaction_ids, [])
+        self.assertEqual(checkpoint.ledger_balance, Decimal('90.00'))
+
+    def test_row_committed_after_checkpoint_passed_its_id(self):
+        reconcile()
+        # The previous run already saw a higher id than the row below gets
+        WalletReconciliationCheckpoint.objects.filter(wallet_id=self.user.pk).update(
+            last_transaction_id=F('last_transaction_id') + 10
+        )
+        late = WalletTransaction.objects.create(
+            wallet_id=self.user.pk,
+            transaction_type='CREDIT',
+            amount=Decimal('20.00'),
+            balance_before=Decimal('70.00'),
+            balance_after=Decimal('90.00'),
+            source='FUNDING',
+            reference='LATE-COMMIT-1',
+            status='COMPLETED',
+        )
+        Wallet.objects.filter(pk=self.user.pk).update(
+            balance=Decimal('90.00'), version=F('version') + 1
+        )
+
+        self.assertEqual(reconcile(), (1, []))
+        checkpoint = Wallet.objects.get(pk=self.user.pk).reconciliation
+        self.assertLess(late.id, checkpoint.last_transaction_id)
+        self.assertEqual(checkpoint.ledger_balance, Decimal('90.00'))
+
+        # Re-scanned again, but not counted twice
+        WalletService.credit_wallet(self.user, Decimal('5.00'), 'MANUAL_FUNDING')
+        self.assertEqual(reconcile(), (1, []))
+        self.assertEqual(
+            Wallet.objects.get(pk=self.user.pk).reconciliation.ledger_balance, Decimal('95.00')
+        )
+
+    def test_sharded_credits_reconcile(self):
+        WalletService.set_balance_shards(self.user, 4)
+        for _ in range(3):
+            WalletService.credit_wallet(self.user, Decimal('10.00'), 'MANUAL_FUNDING')
+        self.assertEqual(reconcile(), (1, []))
+
+
+class BalanceSnapshotTestCase(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(email="history@example.com", username="history")
+        cache.clear()
+        balance_cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+        # 100 on day 1, -30 on day 2, +50 on day 4
+        self.day1 = date(2024, 3, 1)
+        for day, amount, kind in [
+            (self.day1, '100.00', 'credit'),
+            (self.day1 + timedelta(days=1), '30.00', 'debit'),
+            (self.day1 + timedelta(days=3), '50.00', 'credit'),
+        ]:
+            if kind == 'credit':
+                txn = WalletService.credit_wallet(self.user, Decimal(amount), 'MANUAL_FUNDING')
+            else:
+                txn = WalletService.debit_wallet(self.user, Decimal(amount), 'Purchase')
+            stamp = day_start(day) + timedelta(hours=12)
+            WalletTransaction.objects.filter(pk=txn.pk).update(created_at=stamp, completed_at=stamp)
+
+    def at(self, day, hour):
+        return day_start(day) + timedelta(hours=hour)
+
+    def assert_history(self):
+        day2 = self.day1 + timedelta(days=1)
+        day4 = self.day1 + timedelta(days=3)
+        expected = [
+            (self.at(self.day1, 6), Decimal('0.00')),
+            (self.at(self.day1, 13), Decimal('100.00')),
+            (self.at(day2, 13), Decimal('70.00')),
+            (self.at(day2 + timedelta(days=1), 8), Decimal('70.00')),
+            (self.at(day4, 13), Decimal('120.00')),
+            (self.at(day4 + timedelta(days=30), 0), Decimal('120.00')),
+        ]
+        for at, balance in expected:
+            self.assertEqual(WalletService.get_balance_at(self.user, at), balance, at)
+
+    def test_balance_at_without_snapshots(self):
+        self.assert_history()
+
+    def test_snapshots_written_for_active_days(self):
+        written = take_snapshots(through=self.day1 + timedelta(days=3))
+        self.assertEqual(written, 3)
+
+        snapshots = dict(
+            WalletBalanceSnapshot.objects.values_list('snapshot_date', 'balance')
+        )
+        self.assertEqual(snapshots, {
+            self.day1: Decimal('100.00'),
+            self.day1 + timedelta(days=1): Decimal('70.00'),
+            self.day1 + timedelta(days=3): Decimal('120.00'),
+        })
+        self.assert_history()
+
+    def test_snapshots_are_incremental(self):
+        take_snapshots(through=self.day1)
+        self.assertEqual(WalletBalanceSnapshot.objects.count(), 1)
+        self.assert_history()
+
+        self.assertEqual(take_snapshots(through=self.day1 + timedelta(days=5)), 2)
+        self.assertEqual(take_snapshots(through=self.day1 + timedelta(days=5)), 0)
+        self.assert_history()
+
+    def test_balance_at_reads_from_snapshot(self):
+        take_snapshots(through=self.day1 + timedelta(days=3))
+        # Older rows are covered by the snapshot, so changing them has no effect
+        WalletTransaction.objects.filter(transaction_type='DEBIT').update(amount=Decimal('1.00'))
+        at = self.at(self.day1 + timedelta(days=4), 0)
+        self.assertEqual(WalletService.get_balance_at(self.user, at), Decimal('120.00'))
+
+    def test_funding_completed_after_its_day_was_snapshotted(self):
+        day2 = self.day1 + timedelta(days=1)
+        pending = WalletTransaction.objects.create(
+            wallet_id=self.user.pk,
+            transaction_type='CREDIT',
+            amount=Decimal('40.00'),
+            balance_before=Decimal('0.00'),
+            balance_after=Decimal('0.00'),
+            status='PENDING',
+            source='FUNDING',
+            reference='LATE-FUNDING',
+        )
+        WalletTransaction.objects.filter(pk=pending.pk).update(created_at=self.at(day2, 9))
+        take_snapshots(through=day2)
+
+        # Verified on day 3, after day 2's snapshot was taken
+        pending.refresh_from_db()
+        pending.status = 'COMPLETED'
+        pending.save()
+        WalletTransaction.objects.filter(pk=pending.pk).update(
+            completed_at=self.at(day2 + timedelta(days=1), 10)
+        )
+
+        self.assertEqual(WalletService.get_balance_at(self.user, self.at(day2, 13)), Decimal('70.00'))
+        self.assertEqual(
+            WalletService.get_balance_at(self.user, self.at(day2 + timedelta(days=1), 11)),
+            Decimal('110.00'),
+        )
+        take_snapshots(through=self.day1 + timedelta(days=3))
+        self.assertEqual(
+            WalletService.get_balance_at(self.user, self.at(self.day1 + timedelta(days=10), 0)),
+            Decimal('160.00'),
+        )
+
+    def test_balance_endpoint_at(self):
+        response = self.client.get('/api/wallet/balance/', {'at': '2024-03-02'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['balance'], '70.00')
+
+        response = self.client.get('/api/wallet/balance/', {'at': '2024-03-01T08:00:00Z'})
+        self.assertEqual(response.data['balance'], '0.00')
+
+        response = self.client.get('/api/wallet/balance/')
+        self.assertEqual(response.data['balance'], '120.00')
+        self.assertNotIn('at', response.data)
+
+    def test_balance_endpoint_rejects_bad_at(self):
+        response = self.client.get('/api/wallet/balance/', {'at': 'yesterday'})
+        self.assertEqual(response.status_code, 400)
+
+        response = self.client.get('/api/wallet/balance/', {'at': '2999-01-01'})
+        self.assertEqual(response.status_code, 400)
+
+
+class StatementExportTestCase(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(email="statement@example.com", username="statement")
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+        for day, amount in [(1, '100.00'), (2, '25.50'), (3, '10.00')]:
+            txn = WalletService.credit_wallet(self.user, Decimal(amount), 'MANUAL_FUNDING')
+            WalletTransaction.objects.filter(pk=txn.pk).update(
+                created_at=day_start(date(2024, 5, day)) + timedelta(hours=9)
+            )
+
+        other = User.objects.create_user(email="someone@example.com", username="someone")
+        WalletService.credit_wallet(other, Decimal('999.00'), 'MANUAL_FUNDING')
+
+    def download(self, **params):
+        response = self.client.get('/api/wallet/statement/', params)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        return response, b"".join(response.streaming_content).decode()
+
+    def test_csv_statement(self):
+        response, body = self.download()
+        self.assertEqual(response['Content-Type'], 'text/csv')
+        self.assertIn('attachment;', response['Content-Disposition'])
+
+        rows = list(csv.DictReader(io.StringIO(body)))
+        self.assertEqual([row['amount'] for row in rows], ['100.00', '25.50', '10.00'])
+        self.assertEqual(rows[1]['balance_after'], '125.50')
+        self.assertTrue(rows[0]['created_at'].startswith('2024-05-01T09:00:00'))
+
+    def test_csv_statement_neutralises_formulas(self):
+        notes = ['=HYPERLINK("http://evil.example","x")', '+cmd|" /C calc"!A0', '-2+3', '@SUM(A1)', '\tTAB', 'plain note']
+        for note in notes:
+            WalletService.credit_wallet(self.user, Decimal('1.00'), 'MANUAL_FUNDING', description=note)
+
+        _, body = self.download()
+
+        descriptions = [row['description'] for row in csv.DictReader(io.StringIO(body))][3:]
+        self.assertEqual(descriptions, ["'" + note for note in notes[:-1]] + ['plain note'])
+
+    def test_ndjson_statement_with_date_range(self):
+        response, body = self.download(output='ndjson', **{'from': '2024-05-02', 'to': '2024-05-02'})
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+
+        rows = [json.loads(line) for line in body.splitlines()]
+        self.assertEqual(len(rows), 1)
+        self.assertEqual(rows[0]['amount'], '25.50')
+        self.assertEqual(rows[0]['transaction_type'], 'CREDIT')
+
+    def test_invalid_parameters(self):
+        for params in [{'output': 'xml'}, {'from': 'last week'}, {'from': '2024-05-03', 'to': '2024-05-01'}]:
+            response = self.client.get('/api/wallet/statement/', params)
+            self.assertEqual(response.status_code, 400, params)
+
+
+class DailySummaryTestCase(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(email="rollup@example.com", username="rollup")
+        self.other = User.objects.create_user(email="peer@example.com", username="peer")
+        cache.clear()
+        balance_cache.clear()
+        WalletService.get_or_create_wallet(self.other)
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def post(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            WalletService.credit_wallet(self.user, Decimal('100.00'), 'FUNDING')
+        with self.captureOnCommitCallbacks(execute=True):
+            WalletService.credit_wallet(self.user, Decimal('50.00'), 'FUNDING')
+        with self.captureOnCommitCallbacks(execute=True):
+            WalletService.debit_wallet(self.user, Decimal('30.00'), 'ORDER_PAYMENT')
+        with self.captureOnCommitCallbacks(execute=True):
+            WalletService.transfer(self.user, self.other, Decimal('20.00'))
+
+    def rollup(self):
+        return {
+            (row.wallet_id, row.source): (row.inflow, row.outflow, row.credit_count, row.debit_count)
+            for row in WalletDailySummary.objects.all()
+        }
+
+    def test_writes_update_the_rollup(self):
+        self.post()
+        self.assertEqual(self.rollup(), {
+            (self.user.pk, 'FUNDING'): (Decimal('150.00'), Decimal('0.00'), 2, 0),
+            (self.user.pk, 'ORDER_PAYMENT'): (Decimal('0.00'), Decimal('30.00'), 0, 1),
+            (self.user.pk, 'WALLET_TRANSFER'): (Decimal('0.00'), Decimal('20.00'), 0, 1),
+            (self.other.pk, 'WALLET_TRANSFER'): (Decimal('20.00'), Decimal('0.00'), 1, 0),
+        })
+
+    def test_rolled_back_writes_are_not_counted(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            with self.assertRaises(ValidationError):
+                WalletService.debit_wallet(self.user, Decimal('30.00'), 'ORDER_PAYMENT')
+        self.assertEqual(WalletDailySummary.objects.count(), 0)
+
+    def test_rebuild_matches_live_rollup(self):
+        self.post()
+        live = self.rollup()
+        WalletDailySummary.objects.update(inflow=Decimal('0.00'))
+
+        today = timezone.localdate()
+        self.assertEqual(rebuild_summaries(today, today), 4)
+        self.assertEqual(self.rollup(), live)
+
+    def test_funding_counts_on_the_day_it_completes(self):
+        wallet = WalletService.get_or_create_wallet(self.user)
+        funding = WalletTransaction.objects.create(
+            wallet=wallet,
+            transaction_type='CREDIT',
+            source='FUNDING',
+            amount=Decimal('40.00'),
+            balance_before=wallet.balance,
+            balance_after=wallet.balance,
+            reference='FUND-SLOW',
+            status='PENDING',
+        )
+        today = timezone.localdate()
+        initiated = timezone.now() - timedelta(days=3)
+        WalletTransaction.objects.filter(pk=funding.pk).update(created_at=initiated)
+        funding.refresh_from_db()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            WalletService.complete_funding(funding)
+
+        live = set(WalletDailySummary.objects.values_list('summary_date', 'source', 'inflow'))
+        self.assertEqual(live, {(today, 'FUNDING', Decimal('40.00'))})
+
+        rebuild_summaries(timezone.localdate(initiated), today)
+        rebuilt = set(WalletDailySummary.objects.values_list('summary_date', 'source', 'inflow'))
+        self.assertEqual(rebuilt, live)
+
+    def test_summary_endpoint(self):
+        self.post()
+        for n, day in enumerate([date(2024, 1, 5), date(2024, 1, 20), date(2024, 2, 3)]):
+            WalletDailySummary.objects.create(
+                wallet_id=self.user.pk, summary_date=day, source='FUNDING',
+                inflow=Decimal('10.00') * (n + 1), credit_count=1,
+            )
+
+        response = self.client.get('/api/wallet/summary/', {'to': '2024-12-31'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['granularity'], 'month')
+        self.assertEqual(
+            [(row['period'], row['inflow'], row['credit_count']) for row in response.data['summary']],
+            [('2024-01-01', '30.00', 2), ('2024-02-01', '30.00', 1)],
+        )
+
+        response = self.client.get(
+            '/api/wallet/summary/', {'granularity': 'day', 'from': '2024-01-06', 'to': '2024-12-31'}
+        )
+        self.assertEqual([row['period'] for row in response.data['summary']], ['2024-01-20', '2024-02-03'])
+
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/wallet/summary/')
+        sources = {row['source'] for row in response.data['summary']}
+        self.assertEqual(sources, {'FUNDING', 'ORDER_PAYMENT', 'WALLET_TRANSFER'})
+
+    def test_summary_endpoint_rejects_bad_params(self):
+        for params in [{'granularity': 'week'}, {'from': '01/02/2024'}]:
+            response = self.client.get('/api/wallet/summary/', params)
+            self.assertEqual(response.status_code, 400, params)
+
+    def test_verified_gateway_funding_reaches_the_rollup(self):
+        wallet = WalletService.get_or_create_wallet(self.user)
+        WalletTransaction.objects.create(
+            wallet=wallet,
+            transaction_type='CREDIT',
+            amount=Decimal('75.00'),
+            balance_before=wallet.balance,
+            balance_after=wallet.balance,
+            status='PENDING',
+            source='FUNDING',
+            reference='FUND-VERIFY',
+            metadata={'payment_method': 'paystack'},
+        )
+
+        with mock.patch('payments.gateways.paystack.PaystackGateway') as gateway:
+            gateway.return_value.verify_transaction.return_value = {
+                'success': True, 'amount': '75.00', 'gateway_reference': 'PSK-1',
+            }
+            with self.captureOnCommitCallbacks(execute=True):
+                response = self.client.get('/api/wallet/verify/FUND-VERIFY/')
+            # A repeat verification does not credit again
+            with self.captureOnCommitCallbacks(execute=True):
+                self.client.get('/api/wallet/verify/FUND-VERIFY/')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['new_balance'], '75.00')
+        self.assertEqual(WalletService.get_wallet_balance(self.user), Decimal('75.00'))
+        self.assertEqual(self.rollup(), {
+            (self.user.pk, 'FUNDING'): (Decimal('75.00'), Decimal('0.00'), 1, 0),
+        })
+
+
+class BulkReverseTestCase(TestCase):
+
+    def setUp(self):
+        self.alice = User.objects.create_user(email="alice@example.com", username="alice")
+        self.bob = User.objects.create_user(email="bob@example.com", username="bob")
+
+    def double_posts(self, user, count, amount="10.00"):
+        return [
+            WalletService.credit_wallet(user, Decimal(amount), 'FUNDING').reference
+            for _ in range(count)
+        ]
+
+    def test_user_with_reversed_transaction_can_be_deleted(self):
+        reference = self.double_posts(self.alice, 1)[0]
+        WalletService.reverse_transaction(reference)
+
+        self.alice.delete()
+
+        self.assertFalse(Wallet.objects.filter(user_id=self.alice.pk).exists())
+        self.assertFalse(WalletTransaction.objects.filter(reference=reference).exists())
+
+    def test_bulk_reverse_outcomes(self):
+        alice_refs = self.double_posts(self.alice, 3)
+        bob_refs = self.double_posts(self.bob, 2)
+        WalletService.debit_wallet(self.bob, Decimal('5.00'))
+        WalletService.reverse_transaction(alice_refs[2])
+
+        results = WalletService.bulk_reverse(
+            [*alice_refs, alice_refs[0], *bob_refs, "NOPE-1"], reason="Double post"
+        )
+        self.assertEqual(
+            [result["status"] for result in results],
+            ["reversed", "reversed", "already_reversed", "duplicate",
+             "reversed", "insufficient_balance", "not_found"],
+        )
+
+        self.assertEqual(Wallet.objects.get(user=self.alice).balance, Decimal('0.00'))
+        self.assertEqual(Wallet.objects.get(user=self.bob).balance, Decimal('5.00'))
+
+        for reference in [*alice_refs[:2], bob_refs[0]]:
+            original = WalletTransaction.objects.get(reference=reference)
+            self.assertEqual(original.status, 'REVERSED')
+            self.assertEqual(original.reversal.transaction_type, 'DEBIT')
+            self.assertEqual(original.reversal.metadata["reversal_reason"], "Double post")
+
+        self.assertEqual(results[1]["balance_after"], Decimal('0.00'))
+
+    def test_dry_run_writes_nothing(self):
+        refs = self.double_posts(self.alice, 3)
+        count = WalletTransaction.objects.count()
+
+        results = WalletService.bulk_reverse(refs, reason="Check", dry_run=True)
+
+        self.assertEqual([result["status"] for result in results], ["reversed"] * 3)
+        self.assertEqual(WalletTransaction.objects.count(), count)
+        self.assertEqual(Wallet.objects.get(user=self.alice).balance, Decimal('30.00'))
+        self.assertFalse(WalletTransaction.objects.filter(status='REVERSED').exists())
+
+    def test_query_count_does_not_grow_with_batch_size(self):
+        small = self.double_posts(self.alice, 2) + self.double_posts(self.bob, 2)
+        large = self.double_posts(self.alice, 20) + self.double_posts(self.bob, 20)
+
+        with CaptureQueriesContext(connection) as small_queries:
+            WalletService.bulk_reverse(small)
+        with CaptureQueriesContext(connection) as large_queries:
+            WalletService.bulk_reverse(large)
+
+        self.assertEqual(len(small_queries), len(large_queries))
+
+
+class WalletUserLookupViewTestCase(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(email="me@example.com", username="me")
+        self.other = User.objects.create_user(email="Other@example.com", username="Other")
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def test_lookup_is_case_insensitive(self):
+        response = self.client.get('/api/wallet/lookup-user/', {'username': 'OTHER@EXAMPLE.COM'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['username'], 'Other')
+
+        with self.assertNumQueries(0):
+            response = self.client.get('/api/wallet/lookup-user/', {'username': 'OTHER@EXAMPLE.COM'})
+        self.assertEqual(response.data['id'], self.other.pk)
+
+    def test_self_lookup_and_unknown_user_are_not_found(self):
+        for query in ['ME', 'missing']:
+            response = self.client.get('/api/wallet/lookup-user/', {'username': query})
+            self.assertEqual(response.status_code, 404, query)
+
+    def test_prefix_autocomplete(self):
+        for username in ["otto", "Ottoman", "otter", "oscar"]:
+            User.objects.create_user(email=f"{username}@example.com", username=username)
+        User.objects.create_user(email="ottoline@example.com", username="ottoline", is_active=False)
+
+        response = self.client.get('/api/wallet/lookup-user/', {'prefix': 'OT'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [row['username'] for row in response.data['results']],
+            ['Other', 'otter', 'otto', 'Ottoman'],
+        )
+        self.assertNotIn('email', response.data['results'][0])
+
+        response = self.client.get('/api/wallet/lookup-user/', {'prefix': 'ott', 'limit': 1})
+        self.assertEqual([row['username'] for row in response.data['results']], ['otter'])
+
+    def test_prefix_autocomplete_excludes_self(self):
+        User.objects.create_user(email="meg@example.com", username="meg")
+        response = self.client.get('/api/wallet/lookup-user/', {'prefix': 'me'})
+        self.assertEqual([row['username'] for row in response.data['results']], ['meg'])
+
+    def test_prefix_autocomplete_rejects_short_prefix(self):
+        response = self.client.get('/api/wallet/lookup-user/', {'prefix': 'o'})
+        self.assertEqual(response.status_code, 400)
+
+    @override_settings(USER_LOOKUP_THROTTLE_CAPACITY=3)
+    def test_lookups_are_rate_limited_per_user(self):
+        statuses = [
+            self.client.get('/api/wallet/lookup-user/', {'prefix': 'ot'}).status_code
+            for _ in range(4)
+        ]
+        self.assertEqual(statuses, [200, 200, 200, 429])
+
+        client = APIClient()
+        client.force_authenticate(user=self.other)
+        self.assertEqual(client.get('/api/wallet/lookup-user/', {'prefix': 'me'}).status_code, 200)
@@ -9,6 +9,8 @@ from .views import (
     WalletBalanceView,
     WalletTransactionListView,
     WalletTransactionDetailView,
+    WalletStatementView,
+    WalletSummaryView,
     InitiateFundingView,
     DebitWalletView,
     VerifyWalletFundingView,
@@ -22,6 +24,8 @@ urlpatterns = [
     path(
         "transactions/", WalletTransactionListView.as_view(), name="wallet-transactions"
     ),
+    path("statement/", WalletStatementView.as_view(), name="wallet-statement"),
+    path("summary/", WalletSummaryView.as_view(), name="wallet-summary"),
     path(
         "transactions/<str:reference>/",
         WalletTransactionDetailView.as_view(),
@@ -9,9 +9,15 @@ from rest_framework.permissions import IsAuthenticated
 from django.core.exceptions import ValidationError
 from django.db import DatabaseError
 from django.conf import settings
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+from datetime import timedelta
+from django.utils.dateparse import parse_date, parse_datetime
 import logging
 
+from authentication import directory
 from authentication.authentication import SupabaseJWTAuthentication
+from authentication.throttling import UserLookupThrottle
 from .models import Wallet, WalletTransaction
 from .serializers import (
     WalletSerializer,
@@ -19,15 +25,39 @@ from .serializers import (
     WalletFundingRequestSerializer
 )
 from .services import WalletService
+from .idempotency import idempotent
+from .pagination import InvalidCursor
+from .snapshots import day_end, day_start
+from . import statements
 from payments.gateways.paystack import PaystackGateway
 from payments.gateways.flutterwave import FlutterwaveGateway
 
-from django.contrib.auth import get_user_model
-from django.db.models import Q
+logger = logging.getLogger(__name__)
 
-User = get_user_model()
 
-logger = logging.getLogger(__name__)
+def parse_point_in_time(value, end_of_day=True):
+    """
+    Parse an ISO 8601 datetime, or a date meaning the end of that day
+    (or its start, with end_of_day=False)
+
+    Naive datetimes are taken in the current time zone.
+
+    Raises:
+        ValueError: If the value is neither
+    """
+    day = parse_date(value)
+    if day is not None:
+        if not end_of_day:
+            return day_start(day)
+        return day_end(day) - timedelta(microseconds=1)
+
+    moment = parse_datetime(value)
+    if moment is None:
+        raise ValueError(value)
+    if timezone.is_naive(moment):
+        moment = timezone.make_aware(moment)
+    return moment
+
 
 class WalletDetailView(APIView):
     """
@@ -39,7 +69,7 @@ class WalletDetailView(APIView):
     def get(self, request):
         """Get authenticated user's wallet"""
         try:
-            wallet = WalletService.get_or_create_wallet(request.user)
+            wallet = WalletService.get_cached_wallet(request.user)
             serializer = WalletSerializer(wallet)
             return Response(serializer.data, status=status.HTTP_200_OK)
         except Exception as e:
@@ -51,32 +81,67 @@ class WalletDetailView(APIView):
 
 class WalletTransactionListView(APIView):
     """
-    GET: Retrieve user's transaction history
+    GET: Retrieve user's transaction history, newest first
+
+    Query params:
+        limit   (int)  – page size (default WALLET_TRANSACTION_PAGE_SIZE)
+        cursor  (str)  – next_cursor from the previous page
+        count   (str)  – 'estimated' (default, capped at
+                         WALLET_TRANSACTION_COUNT_CAP), 'exact' or 'none'
+
+    Response:
+        count          (int)   – omitted when count=none
+        count_exact    (bool)  – False when count hit the cap
+        next_cursor    (str)   – null on the last page
+        transactions   (list)
     """
     authentication_classes = [SupabaseJWTAuthentication]
     permission_classes = [IsAuthenticated]
 
+    COUNT_MODES = ('estimated', 'exact', 'none')
+
     def get(self, request):
         """Get authenticated user's transaction history"""
         try:
-            limit = request.query_params.get('limit', None)
-            if limit:
-                limit = int(limit)
+            limit = int(request.query_params.get('limit') or settings.WALLET_TRANSACTION_PAGE_SIZE)
+            if limit <= 0:
+                raise ValueError
+            limit = min(limit, settings.WALLET_TRANSACTION_MAX_PAGE_SIZE)
+        except ValueError:
+            return Response(
+                {"error": "Invalid limit parameter"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
 
-            transactions = WalletService.get_transaction_history(
+        count_mode = request.query_params.get('count', 'estimated')
+        if count_mode not in self.COUNT_MODES:
+            return Response(
+                {"error": f"count must be one of: {', '.join(self.COUNT_MODES)}"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        try:
+            transactions, next_cursor = WalletService.get_transaction_page(
                 request.user,
-                limit=limit
+                cursor=request.query_params.get('cursor'),
+                page_size=limit
             )
             serializer = WalletTransactionSerializer(transactions, many=True)
 
-            return Response({
-                "count": transactions.count(),
-                "transactions": serializer.data
-            }, status=status.HTTP_200_OK)
+            data = {}
+            if count_mode != 'none':
+                cap = None if count_mode == 'exact' else settings.WALLET_TRANSACTION_COUNT_CAP
+                data["count"], data["count_exact"] = WalletService.count_transactions(
+                    request.user, cap=cap
+                )
+            data["next_cursor"] = next_cursor
+            data["transactions"] = serializer.data
 
-        except ValueError:
+            return Response(data, status=status.HTTP_200_OK)
+
+        except InvalidCursor:
             return Response(
-                {"error": "Invalid limit parameter"},
+                {"error": "Invalid cursor parameter"},
                 status=status.HTTP_400_BAD_REQUEST
             )
         except Exception as e:
@@ -89,12 +154,21 @@ class WalletTransactionListView(APIView):
 class WalletUserLookupView(APIView):
     """
     GET: Lookup a user by username or email
+
+    Query params:
+        username: Exact username or email (case-insensitive)
+        prefix: Username prefix for autocomplete (returns a list instead)
+        limit: Autocomplete results (max USER_LOOKUP_PREFIX_MAX_RESULTS)
     """
 
     authentication_classes = [SupabaseJWTAuthentication]
     permission_classes = [IsAuthenticated]
+    throttle_classes = [UserLookupThrottle]
 
     def get(self, request):
+        if "prefix" in request.query_params:
+            return self.autocomplete(request)
+
         query = request.query_params.get("username")
 
         if not query:
@@ -103,14 +177,10 @@ class WalletUserLookupView(APIView):
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
-        user = (
-            User.objects.filter(Q(username__iexact=query) | Q(email__iexact=query))
-            .exclude(id=request.user.id)  # optional: prevent self lookup
-            .values("id", "username", "email")
-            .first()
-        )
+        user = directory.lookup(query)
 
-        if not user:
+        # optional: prevent self lookup
+        if not user or user["id"] == request.user.id:
             return Response(
                 {"error": "User not found"},
                 status=status.HTTP_404_NOT_FOUND,
@@ -125,6 +195,130 @@ class WalletUserLookupView(APIView):
             status=status.HTTP_200_OK,
         )
 
+    def autocomplete(self, request):
+        """Usernames starting with ?prefix=, excluding the requesting user"""
+        prefix = request.query_params.get("prefix", "").strip()
+        if len(prefix) < settings.USER_LOOKUP_PREFIX_MIN_LENGTH:
+            return Response(
+                {"error": f"prefix must be at least {settings.USER_LOOKUP_PREFIX_MIN_LENGTH} characters"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        max_results = settings.USER_LOOKUP_PREFIX_MAX_RESULTS
+        try:
+            limit = int(request.query_params.get("limit") or max_results)
+        except ValueError:
+            return Response(
+                {"error": "limit must be an integer"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        limit = max(1, min(limit, max_results))
+
+        # One spare row in case the requesting user is among the matches;
+        # cached per prefix, so shared by every user typing it
+        matches = directory.search_prefix(prefix, max_results + 1)
+        results = [match for match in matches if match["id"] != request.user.id][:limit]
+
+        return Response({"results": results}, status=status.HTTP_200_OK)
+
+
+class WalletStatementView(APIView):
+    """
+    GET: Download the user's transaction statement, streamed
+
+    Query params:
+        output: csv (default) or ndjson
+        from: ISO 8601 date or datetime (inclusive)
+        to: ISO 8601 date or datetime (inclusive; a date includes the whole day)
+    """
+    authentication_classes = [SupabaseJWTAuthentication]
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        """Stream the statement as an attachment"""
+        output = request.query_params.get('output', 'csv')
+        if output not in statements.CONTENT_TYPES:
+            return Response(
+                {"error": "output must be csv or ndjson"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        try:
+            start = request.query_params.get('from')
+            end = request.query_params.get('to')
+            start = parse_point_in_time(start, end_of_day=False) if start else None
+            end = parse_point_in_time(end) if end else None
+        except ValueError:
+            return Response(
+                {"error": "from and to must be ISO 8601 dates or datetimes"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if start and end and start > end:
+            return Response(
+                {"error": "from must not be later than to"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        rows = statements.statement_rows(request.user, start, end)
+        response = StreamingHttpResponse(
+            statements.encode(rows, output),
+            content_type=statements.CONTENT_TYPES[output]
+        )
+        filename = f"statement-{timezone.localdate().isoformat()}.{output}"
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+        return response
+
+
+class WalletSummaryView(APIView):
+    """
+    GET: Inflow/outflow per source, per day or month
+
+    Query params:
+        granularity: day or month (default)
+        from: First day (YYYY-MM-DD, inclusive)
+        to: Last day (YYYY-MM-DD, inclusive)
+    """
+    authentication_classes = [SupabaseJWTAuthentication]
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        """Get the user's transaction summary from the daily rollup"""
+        granularity = request.query_params.get('granularity', 'month')
+        if granularity not in ('day', 'month'):
+            return Response(
+                {"error": "granularity must be day or month"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        start = request.query_params.get('from')
+        end = request.query_params.get('to')
+        start = parse_date(start) if start else None
+        end = parse_date(end) if end else None
+        if (request.query_params.get('from') and start is None) or (
+            request.query_params.get('to') and end is None
+        ):
+            return Response(
+                {"error": "from and to must be dates (YYYY-MM-DD)"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        summary = WalletService.get_transaction_summary(request.user, granularity, start, end)
+        return Response({
+            "granularity": granularity,
+            "currency": "NGN",
+            "summary": [
+                {
+                    "period": row["period"].isoformat(),
+                    "source": row["source"],
+                    "inflow": f"{row['inflow']:.2f}",
+                    "outflow": f"{row['outflow']:.2f}",
+                    "credit_count": row["credit_count"],
+                    "debit_count": row["debit_count"],
+                }
+                for row in summary
+            ]
+        }, status=status.HTTP_200_OK)
+
 
 class WalletTransactionDetailView(APIView):
     """
@@ -144,7 +338,7 @@ class WalletTransactionDetailView(APIView):
                     status=status.HTTP_404_NOT_FOUND
                 )
 
-            if transaction.wallet.user != request.user:
+            if transaction.wallet_id != request.user.pk:
                 return Response(
                     {"error": "You don't have permission to view this transaction"},
                     status=status.HTTP_403_FORBIDDEN
@@ -185,6 +379,7 @@ class InitiateFundingView(APIView):
         "flutterwave": FlutterwaveGateway,
     }
 
+    @idempotent
     def post(self, request):
         """Initiate wallet funding"""
         serializer = WalletFundingRequestSerializer(data=request.data)
@@ -284,13 +479,40 @@ class InitiateFundingView(APIView):
 class WalletBalanceView(APIView):
     """
     GET: Get current wallet balance (quick endpoint)
+
+    Query params:
+        at: ISO 8601 datetime (or date, meaning the end of that day) to get
+            the balance as it was at that point in time
     """
     authentication_classes = [SupabaseJWTAuthentication]
     permission_classes = [IsAuthenticated]
 
     def get(self, request):
         """Get user's current wallet balance"""
+        at = request.query_params.get('at')
+        if at:
+            try:
+                at = parse_point_in_time(at)
+            except ValueError:
+                return Response(
+                    {"error": "at must be an ISO 8601 date or datetime"},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            if at > timezone.now():
+                return Response(
+                    {"error": "at cannot be in the future"},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+
         try:
+            if at:
+                balance = WalletService.get_balance_at(request.user, at)
+                return Response({
+                    "balance": str(balance),
+                    "currency": "NGN",
+                    "at": at.isoformat()
+                }, status=status.HTTP_200_OK)
+
             balance = WalletService.get_wallet_balance(request.user)
             return Response({
                 "balance": str(balance),
@@ -311,6 +533,7 @@ class WalletTransferView(APIView):
     authentication_classes = [SupabaseJWTAuthentication]
     permission_classes = [IsAuthenticated]
 
+    @idempotent
     def post(self, request):
         """Transfer funds to another user's wallet"""
         logger.info("=" * 80)
@@ -349,43 +572,17 @@ class WalletTransferView(APIView):
                 {"error": "Invalid amount"}, status=status.HTTP_400_BAD_REQUEST
             )
 
-        # ── Get sender wallet ───────────────────────────────────────────────
-        try:
-            sender_wallet = Wallet.objects.get(user=request.user)
-            logger.info(f"✅ Sender wallet found for user: {request.user.email}")
-            logger.info(f"   Balance: ₦{sender_wallet.balance}")
-        except Wallet.DoesNotExist:
-            logger.error(f"❌ Sender wallet not found for user: {request.user.email}")
-            return Response(
-                {"error": "Wallet not found"}, status=status.HTTP_404_NOT_FOUND
-            )
-
-        # ── Check balance ───────────────────────────────────────────────────
-        from decimal import Decimal
-
-        if Decimal(sender_wallet.balance) < amount:
-            logger.error(f"❌ Insufficient balance: {sender_wallet.balance} < {amount}")
-            return Response(
-                {"error": "Insufficient balance"}, status=status.HTTP_400_BAD_REQUEST
-            )
-
         # ── Get recipient (CASE-INSENSITIVE) ────────────────────────────────
-        try:
-            recipient = User.objects.filter(
-                Q(username__iexact=recipient_username)
-                | Q(email__iexact=recipient_username)
-            ).first()
+        recipient = directory.find_user(recipient_username)
 
-            if not recipient:
-                raise User.DoesNotExist
-
-            logger.info(f"✅ Recipient found: {recipient.username} ({recipient.email})")
-        except User.DoesNotExist:
+        if not recipient:
             logger.error(f"❌ Recipient not found: '{recipient_username}'")
             return Response(
                 {"error": "User not found"}, status=status.HTTP_404_NOT_FOUND
             )
 
+        logger.info(f"✅ Recipient found: {recipient.username} ({recipient.email})")
+
         # ── Prevent self-transfer ───────────────────────────────────────────
         if recipient.id == request.user.id:
             logger.error("❌ Self-transfer attempt")
@@ -394,101 +591,19 @@ class WalletTransferView(APIView):
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
-        # ── Get recipient wallet ────────────────────────────────────────────
+        # ── Atomic transfer (wallets locked in primary-key order) ───────────
         try:
-            recipient_wallet = Wallet.objects.get(user=recipient)
-            logger.info(f"✅ Recipient wallet found for user: {recipient.email}")
-            logger.info(f"   Balance: ₦{recipient_wallet.balance}")
-        except Wallet.DoesNotExist:
-            logger.error(f"❌ Recipient wallet not found for {recipient.username}")
+            sender_txn, recipient_txn = WalletService.transfer(
+                request.user, recipient, amount, note=note
+            )
+        except Wallet.DoesNotExist as e:
+            logger.error(f"❌ {e}")
+            return Response({"error": str(e)}, status=status.HTTP_404_NOT_FOUND)
+        except ValidationError as e:
+            logger.error(f"❌ {' '.join(e.messages)}")
             return Response(
-                {"error": "User does not have an active wallet"},
-                status=status.HTTP_404_NOT_FOUND,
+                {"error": " ".join(e.messages)}, status=status.HTTP_400_BAD_REQUEST
             )
-
-        # ── Atomic transaction ──────────────────────────────────────────────
-        try:
-            from django.db import transaction as db_transaction
-            import uuid
-
-            with db_transaction.atomic():
-                # Generate two unique references — one per transaction record
-                sender_reference = f"TXF-SENT-{uuid.uuid4().hex[:12].upper()}"
-                recipient_reference = f"TXF-RECV-{uuid.uuid4().hex[:12].upper()}"
-                logger.info(f"📝 Sender reference: {sender_reference}")
-                logger.info(f"📝 Recipient reference: {recipient_reference}")
-
-                # Debit sender
-                old_sender_balance = Decimal(sender_wallet.balance)
-                sender_wallet.balance = old_sender_balance - amount
-                sender_wallet.save()
-                logger.info(
-                    f"💰 Sender debited: ₦{old_sender_balance} → ₦{sender_wallet.balance}"
-                )
-
-                # Create sender transaction (debit)
-                sender_txn = WalletTransaction.objects.create(
-                    wallet=sender_wallet,
-                    transaction_type="DEBIT",
-                    amount=amount,
-                    balance_before=old_sender_balance,
-                    balance_after=sender_wallet.balance,
-                    status="COMPLETED",
-                    source="WALLET_TRANSFER",
-                    reference=sender_reference,
-                    description=note or f"Transfer to @{recipient.username}",
-                    metadata={
-                        "recipient_username": recipient.username,
-                        "recipient_email": recipient.email,
-                        "transfer_type": "SENT",
-                        "paired_reference": recipient_reference,
-                    },
-                )
-                logger.info(f"📝 Sender transaction created: ID {sender_txn.id}")
-
-                # Credit recipient
-                old_recipient_balance = Decimal(recipient_wallet.balance)
-                recipient_wallet.balance = old_recipient_balance + amount
-                recipient_wallet.save()
-                logger.info(
-                    f"💰 Recipient credited: ₦{old_recipient_balance} → ₦{recipient_wallet.balance}"
-                )
-
-                # Create recipient transaction (credit)
-                recipient_txn = WalletTransaction.objects.create(
-                    wallet=recipient_wallet,
-                    transaction_type="CREDIT",
-                    amount=amount,
-                    balance_before=old_recipient_balance,
-                    balance_after=recipient_wallet.balance,
-                    status="COMPLETED",
-                    source="WALLET_TRANSFER",
-                    reference=recipient_reference,
-                    description=note or f"Transfer from @{request.user.username}",
-                    metadata={
-                        "sender_username": request.user.username,
-                        "sender_email": request.user.email,
-                        "transfer_type": "RECEIVED",
-                        "paired_reference": sender_reference,
-                    },
-                )
-                logger.info(f"📝 Recipient transaction created: ID {recipient_txn.id}")
-
-                logger.info("✅ Transfer completed successfully!")
-                logger.info("=" * 80)
-
-                return Response(
-                    {
-                        "success": True,
-                        "reference": sender_reference,
-                        "recipient_name": recipient.email,
-                        "amount": float(amount),
-                        "new_balance": str(sender_wallet.balance),
-                        "message": f"Successfully transferred ₦{amount} to @{recipient.username}",
-                    },
-                    status=status.HTTP_200_OK,
-                )
-
         except Exception as e:
             logger.exception("💥 EXCEPTION during transfer:")
             logger.error(f"   Error: {str(e)}")
@@ -498,6 +613,23 @@ class WalletTransferView(APIView):
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR,
             )
 
+        logger.info(
+            f"✅ Transfer completed: {sender_txn.reference} / {recipient_txn.reference}"
+        )
+        logger.info("=" * 80)
+
+        return Response(
+            {
+                "success": True,
+                "reference": sender_txn.reference,
+                "recipient_name": recipient.email,
+                "amount": float(amount),
+                "new_balance": str(sender_txn.balance_after),
+                "message": f"Successfully transferred ₦{amount} to @{recipient.username}",
+            },
+            status=status.HTTP_200_OK,
+        )
+
 
 class DebitWalletView(APIView):
     """
@@ -506,6 +638,7 @@ class DebitWalletView(APIView):
     authentication_classes = [SupabaseJWTAuthentication]
     permission_classes = [IsAuthenticated]
 
+    @idempotent
     def post(self, request):
         """Debit user's wallet"""
         try:
@@ -630,32 +763,30 @@ class VerifyWalletFundingView(APIView):
             if verification_result.get("success"):
                 logger.info("✅ Payment SUCCESSFUL! Updating database...")
 
-                # Update transaction status
-                old_status = transaction.status
-                transaction.status = "COMPLETED"
-                logger.info(f"   Transaction status: {old_status} → COMPLETED")
-
-                # Update wallet balance
-                wallet = transaction.wallet
-                old_balance = wallet.balance
-                wallet.balance += transaction.amount
-                transaction.balance_after = wallet.balance
-                logger.info(f"   Wallet balance: ₦{old_balance} → ₦{wallet.balance}")
-
-                # Update metadata with gateway info
-                transaction.metadata.update(
+                # Credit the wallet and complete the transaction (locked,
+                # so concurrent verifications credit it once)
+                transaction = WalletService.complete_funding(
+                    transaction,
                     {
                         "gateway_reference": verification_result.get(
                             "gateway_reference"
                         ),
                         "paid_at": verification_result.get("paid_at"),
                         "verified_amount": str(verification_result.get("amount")),
-                    }
+                    },
+                )
+                if transaction.status != "COMPLETED":
+                    logger.error(f"❌ Transaction is {transaction.status}, not crediting")
+                    return Response(
+                        {
+                            "error": f"Transaction is {transaction.status.lower()}",
+                            "status": transaction.status,
+                        },
+                        status=status.HTTP_409_CONFLICT,
+                    )
+                logger.info(
+                    f"   Wallet balance: ₦{transaction.balance_before} → ₦{transaction.balance_after}"
                 )
-
-                # Save both
-                wallet.save()
-                transaction.save()
                 logger.info("💾 Saved wallet and transaction to database")
 
                 serializer = WalletTransactionSerializer(transaction)
@@ -667,7 +798,7 @@ class VerifyWalletFundingView(APIView):
                         "message": "Payment verified and wallet funded successfully",
                         "transaction": serializer.data,
                         "status": "COMPLETED",
-                        "new_balance": str(wallet.balance),
+                        "new_balance": str(transaction.balance_after),
                     },
                     status=status.HTTP_200_OK,
                 )
@@ -676,17 +807,16 @@ class VerifyWalletFundingView(APIView):
                 logger.error(f"❌ Payment verification FAILED")
                 logger.error(f"   Reason: {verification_result.get('status')}")
 
-                transaction.status = "FAILED"
-                transaction.metadata.update(
+                transaction = WalletService.fail_funding(
+                    transaction,
                     {
                         "failure_reason": verification_result.get("status"),
                         "verification_response": str(
                             verification_result.get("raw_response")
                         ),
-                    }
+                    },
                 )
-                transaction.save()
-                logger.info("💾 Saved FAILED status to database")
+                logger.info(f"💾 Saved {transaction.status} status to database")
 
                 return Response(
                     {